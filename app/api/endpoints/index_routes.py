@@ -1,25 +1,62 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 
 from app.models.index_models import IndexQuote
 from app.services.index_service import IndexService
+from app.services.movers_service import MoverRanking, MoversService
+from app.core.config import settings
+from app.utils.cache import get_cache_entry
+from app.utils.query import ListQuery, list_query
+from app.utils.response import ResponseFormat, list_response, variant_response
 
 router = APIRouter()
 index_service = IndexService()
+movers_service = MoversService()
 
 @router.get("/quotes", response_model=List[IndexQuote])
-async def get_index_quotes(symbol: str = Query("沪深重要指数", description="指数类型，如'沪深重要指数'")):
+async def get_index_quotes(
+    request: Request,
+    symbol: str = Query("沪深重要指数", description="指数类型，如'沪深重要指数'"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取指数实时行情列表"""
     try:
-        result = await index_service.get_index_quotes(symbol)
-        if not result:
+        # 未指定查询参数时直接输出缓存中的预序列化数据
+        entry = await get_cache_entry(index_service.get_index_quotes, symbol)
+        if not entry.value:
             raise HTTPException(status_code=404, detail=f"未找到指数类型 {symbol} 的行情数据")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取指数行情列表失败: {str(e)}")
 
+@router.get("/movers/{ranking}", response_model=List[IndexQuote])
+async def get_index_movers(
+    request: Request,
+    ranking: MoverRanking,
+    symbol: str = Query("沪深重要指数", description="指数类型，如'沪深重要指数'"),
+    limit: int = Query(20, ge=1, le=settings.MOVERS_TOP_COUNT, description="返回的指数数")
+):
+    """
+    指数类别内的行情排行
+    
+    ranking可选gainers(涨幅榜)、losers(跌幅榜)、amount(成交额榜)、volume_ratio(量比榜)，
+    排行在指数行情缓存刷新时预先计算并编码。
+    """
+    try:
+        table = await movers_service.get_index_movers(symbol)
+        if table.size == 0:
+            raise HTTPException(status_code=404, detail=f"未找到指数类型 {symbol} 的行情数据")
+        return variant_response(request, table.entry, f"{ranking}|{limit}", lambda: table.payload(ranking, limit))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取指数行情排行失败: {str(e)}")
+
 @router.get("/{index_code}", response_model=IndexQuote)
 async def get_index_quote(index_code: str):
     """获取单个指数实时行情"""
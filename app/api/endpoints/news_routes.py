@@ -1,36 +1,49 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from enum import Enum
 
-from app.models.news_models import InteractiveQuestion, GlobalFinanceNews, CLSTelegraph
+from app.models.news_models import InteractiveQuestion, GlobalFinanceNews, CLSTelegraph, NewsFeedPage
 from app.services.news_service import NewsService
+from app.services.news_feed_service import NewsFeedService
+from app.utils.cache import get_cache_entry
+from app.utils.query import ListQuery, list_query
+from app.utils.response import ResponseFormat, list_response
 
 router = APIRouter()
 news_service = NewsService()
+news_feed_service = NewsFeedService()
 
 @router.get("/interactive/questions", response_model=List[InteractiveQuestion])
 async def get_interactive_questions(
-    symbol: str = Query(..., description="股票代码，如002594")
+    request: Request,
+    symbol: str = Query(..., description="股票代码，如002594"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取互动易提问数据"""
     try:
-        result = await news_service.get_interactive_questions(symbol)
-        if not result:
+        entry = await get_cache_entry(news_service.get_interactive_questions, symbol)
+        if not entry.value:
             raise HTTPException(status_code=404, detail=f"未找到股票 {symbol} 的互动易提问数据")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取互动易提问数据失败: {str(e)}")
 
 @router.get("/global-finance", response_model=List[GlobalFinanceNews])
-async def get_global_finance_news():
+async def get_global_finance_news(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取全球财经快讯数据（东方财富-全球财经快讯）"""
     try:
-        result = await news_service.get_global_finance_news()
-        if not result:
+        entry = await get_cache_entry(news_service.get_global_finance_news)
+        if not entry.value:
             raise HTTPException(status_code=404, detail="未获取到全球财经快讯数据")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
@@ -45,15 +58,65 @@ class CLSSymbolType(str, Enum):
 
 @router.get("/cls-telegraph", response_model=List[CLSTelegraph])
 async def get_cls_telegraph(
-    symbol: CLSSymbolType = Query(CLSSymbolType.ALL, description="类型: 全部或重点")
+    request: Request,
+    symbol: CLSSymbolType = Query(CLSSymbolType.ALL, description="类型: 全部或重点"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取财联社电报数据"""
     try:
-        result = await news_service.get_cls_telegraph(symbol)
-        if not result:
+        # 使用枚举值调用，与增量资讯采集共用缓存
+        entry = await get_cache_entry(news_service.get_cls_telegraph, symbol.value)
+        if not entry.value:
             raise HTTPException(status_code=404, detail=f"未获取到财联社电报数据: {symbol}")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取财联社电报数据失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取财联社电报数据失败: {str(e)}")
+
+
+# 增量资讯的路径名到资讯源的映射
+NEWS_FEEDS = {"cls-telegraph": "cls", "global-finance": "global"}
+
+
+@router.get("/{feed}/feed", response_model=NewsFeedPage)
+async def get_news_feed(
+    feed: Literal["cls-telegraph", "global-finance"],
+    since: Optional[str] = Query(None, description="上次返回的游标，只返回之后的新资讯；不指定时返回最新的资讯"),
+    limit: int = Query(50, ge=1, le=500, description="最多返回的条数")
+):
+    """
+    增量获取财联社电报或全球财经快讯
+    
+    服务端持续采集资讯、按内容去重并分配递增的游标，客户端每次传入上次返回的cursor即可只获取新资讯。
+    has_more为true时可立即以新的cursor继续获取；truncated为true表示游标之后有资讯已被淘汰或服务已重启。
+    """
+    try:
+        return await news_feed_service.get_news_feed(NEWS_FEEDS[feed], since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取增量资讯失败: {str(e)}")
+
+
+@router.get("/{feed}/stream")
+async def stream_news(
+    feed: Literal["cls-telegraph", "global-finance"],
+    since: Optional[str] = Query(None, description="游标，先补发该游标之后的资讯；不指定时只推送之后的新资讯"),
+    last_event_id: Optional[str] = Header(None, description="EventSource断线重连时自动带回的最后事件ID")
+):
+    """
+    以SSE(Server-Sent Events)推送新采集的财联社电报或全球财经快讯
+    
+    每条资讯为一个news事件，事件ID为资讯的游标。EventSource重连时通过Last-Event-ID请求头从断点继续。
+    """
+    try:
+        stream = news_feed_service.stream(NEWS_FEEDS[feed], since or last_event_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,22 +1,43 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, status
+from typing import List, Literal, Optional
+from urllib.parse import quote
 
 # 修改导入语句，确保导入所有需要的模型类型
 from app.models.sector_models import (
     ConceptBoard, IndustryBoard, BoardSpot, 
     ConceptBoardSpot, IndustryBoardSpot,
-    ConceptBoardConstituent, IndustryBoardConstituent
+    ConceptBoardConstituent, IndustryBoardConstituent,
+    BoardConstituentsBatch, BoardConstituentsBatchRequest, BoardAnalytics
 )
+from app.core.config import settings
 from app.services.sector_service import SectorService
+from app.services.board_stream_service import BOARD_TYPES, BoardStreamService
+from app.services.movers_service import MoverRanking, MoversService
+from app.services.board_analytics_service import BoardAnalyticsService
+from app.utils.cache import get_cache_entry
+from app.utils.query import ListQuery, list_query
+from app.utils.response import ResponseFormat, negotiate_format, query_response, list_response, variant_response
 
 router = APIRouter()
 sector_service = SectorService()
+board_stream_service = BoardStreamService()
+movers_service = MoversService()
+board_analytics_service = BoardAnalyticsService()
 
 @router.get("/concept", response_model=List[ConceptBoard])
-async def get_concept_boards():
+async def get_concept_boards(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取概念板块列表及实时行情"""
     try:
-        return await sector_service.get_concept_boards()
+        # 未指定查询参数时直接输出缓存中的预序列化数据
+        entry = await get_cache_entry(sector_service.get_concept_boards)
+        return list_response(request, entry, query, format)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取概念板块列表失败: {str(e)}")
 
@@ -40,16 +61,29 @@ async def get_concept_board_spot_by_name(
 # 使用更具体的路径，避免与 /concept/{board_code} 冲突
 @router.get("/concept/by-symbol/constituents", response_model=List[ConceptBoardConstituent])
 async def get_concept_board_constituents(
-    symbol: str = Query(..., description="板块名称或代码，如'融资融券'或'BK0655'")
+    request: Request,
+    symbol: str = Query(..., description="板块名称或代码，如'融资融券'或'BK0655'"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取概念板块成份股"""
     try:
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            # 查询参数和列式格式直接在服务层的DataFrame上处理
+            frame = await sector_service.get_concept_board_constituents_frame(symbol)
+            if frame.empty:
+                raise HTTPException(status_code=404, detail=f"未找到板块 {symbol} 的成份股数据")
+            return query_response(request, frame, query, response_format)
+        
         # 直接传递参数给服务方法，不需要额外处理
         # AKShare的接口支持直接使用板块名称或代码
         result = await sector_service.get_concept_board_constituents(symbol)
         if not result:
             raise HTTPException(status_code=404, detail=f"未找到板块 {symbol} 的成份股数据")
         return result
+    except HTTPException:
+        raise
     except ValueError as e:
         # 捕获并处理ValueError异常
         raise HTTPException(status_code=404, detail=str(e))
@@ -103,18 +137,61 @@ async def get_concept_board_spot_by_code(board_code: str):
         raise HTTPException(status_code=500, detail=f"获取概念板块实时行情详情失败: {str(e)}")
 
 @router.get("/concept/{board_code}/constituents", response_model=List[ConceptBoardConstituent])
-async def get_concept_board_constituents_by_code(board_code: str):
+async def get_concept_board_constituents_by_code(
+    request: Request,
+    board_code: str,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """通过板块代码获取概念板块成份股"""
     try:
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            frame = await sector_service.get_concept_board_constituents_frame(board_code)
+            return query_response(request, frame, query, response_format)
         return await sector_service.get_concept_board_constituents(board_code)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取概念板块成份股失败: {str(e)}")
 
+@router.get("/concept/{board_code}/movers/{ranking}", response_model=List[ConceptBoardConstituent])
+async def get_concept_board_movers(
+    request: Request,
+    board_code: str,
+    ranking: MoverRanking,
+    limit: int = Query(20, ge=1, le=settings.MOVERS_TOP_COUNT, description="返回的成份股数")
+):
+    """
+    概念板块成份股的行情排行
+    
+    ranking可选gainers(涨幅榜)、losers(跌幅榜)、turnover(换手率榜)、amount(成交额榜)，
+    排行在成份股行情缓存刷新时预先计算并编码。
+    """
+    try:
+        table = await movers_service.get_board_movers("concept", board_code)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"获取概念板块成份股排行失败: {str(e)}")
+    if table.size == 0:
+        raise HTTPException(status_code=404, detail=f"未找到板块 {board_code} 的成份股数据")
+    try:
+        return variant_response(request, table.entry, f"{ranking}|{limit}", lambda: table.payload(ranking, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/industry", response_model=List[IndustryBoard])
-async def get_industry_boards():
+async def get_industry_boards(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取行业板块列表及实时行情"""
     try:
-        return await sector_service.get_industry_boards()
+        # 未指定查询参数时直接输出缓存中的预序列化数据
+        entry = await get_cache_entry(sector_service.get_industry_boards)
+        return list_response(request, entry, query, format)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取行业板块列表失败: {str(e)}")
 
@@ -137,11 +214,21 @@ async def get_industry_board_spot(
 # 使用更具体的路径，避免与 /industry/{board_code} 冲突
 @router.get("/industry/by-symbol/constituents", response_model=List[IndustryBoardConstituent])
 async def get_industry_board_constituents(
-    symbol: str = Query(..., description="板块名称或代码，如'小金属'或'BK1027'")
+    request: Request,
+    symbol: str = Query(..., description="板块名称或代码，如'小金属'或'BK1027'"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取行业板块成份股"""
     try:
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            # 查询参数和列式格式直接在服务层的DataFrame上处理
+            frame = await sector_service.get_industry_board_constituents_frame(symbol)
+            return query_response(request, frame, query, response_format)
         return await sector_service.get_industry_board_constituents(symbol)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取行业板块成份股失败: {str(e)}")
 
@@ -172,9 +259,134 @@ async def get_industry_board_spot_by_code(board_code: str):
         raise HTTPException(status_code=500, detail=f"获取行业板块实时行情详情失败: {str(e)}")
 
 @router.get("/industry/{board_code}/constituents", response_model=List[IndustryBoardConstituent])
-async def get_industry_board_constituents_by_code(board_code: str):
+async def get_industry_board_constituents_by_code(
+    request: Request,
+    board_code: str,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """通过板块代码获取行业板块成份股"""
     try:
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            frame = await sector_service.get_industry_board_constituents_frame(board_code)
+            return query_response(request, frame, query, response_format)
         return await sector_service.get_industry_board_constituents(board_code)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"获取行业板块成份股失败: {str(e)}")
+
+@router.get("/industry/{board_code}/movers/{ranking}", response_model=List[IndustryBoardConstituent])
+async def get_industry_board_movers(
+    request: Request,
+    board_code: str,
+    ranking: MoverRanking,
+    limit: int = Query(20, ge=1, le=settings.MOVERS_TOP_COUNT, description="返回的成份股数")
+):
+    """
+    行业板块成份股的行情排行
+    
+    ranking可选gainers(涨幅榜)、losers(跌幅榜)、turnover(换手率榜)、amount(成交额榜)，
+    排行在成份股行情缓存刷新时预先计算并编码。
+    """
+    try:
+        table = await movers_service.get_board_movers("industry", board_code)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"获取行业板块成份股排行失败: {str(e)}")
+    if table.size == 0:
+        raise HTTPException(status_code=404, detail=f"未找到板块 {board_code} 的成份股数据")
+    try:
+        return variant_response(request, table.entry, f"{ranking}|{limit}", lambda: table.payload(ranking, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/analytics", response_model=List[BoardAnalytics])
+async def get_board_analytics(
+    request: Request,
+    board_type: Optional[Literal["concept", "industry"]] = Query(None, description="板块类型，不指定时返回概念板块和行业板块"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    由成份股行情汇总的板块统计
+    
+    包括涨跌家数、涨跌停家数、收于当日最高价的上涨家数、平均及中位数涨跌幅、成交额加权涨跌幅和资金集中度，
+    每次全市场快照刷新后对全部板块重新计算。统计在第一次请求时开始，尚未完成第一次计算时返回503。
+    支持查询参数，如sort=-weighted_change_percent&limit=20。
+    """
+    try:
+        frame = await board_analytics_service.get_board_analytics(board_type)
+        return query_response(request, frame, query, negotiate_format(request, format))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=404, detail=f"获取行业板块成份股失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取板块统计失败: {str(e)}")
+
+@router.post("/constituents/batch", response_model=BoardConstituentsBatch)
+async def get_board_constituents_batch(
+    request: Request,
+    batch: BoardConstituentsBatchRequest,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式(仅layout为long时有效): json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    批量获取概念板块和行业板块成份股
+    
+    layout为mapping时返回板块到成份股列表的映射及逐个板块的错误信息；
+    layout为long时返回带board_type和board列的长表，支持查询参数和多种响应格式，
+    获取失败的板块以"板块类型:板块"的形式经URL编码后通过X-Failed-Boards响应头返回。
+    """
+    board_count = len(batch.concept) + len(batch.industry)
+    if board_count == 0:
+        raise HTTPException(status_code=400, detail="至少需要指定一个概念板块或行业板块")
+    if board_count > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}个板块")
+    try:
+        if batch.layout == "mapping":
+            return await sector_service.get_board_constituents_batch(batch.concept, batch.industry)
+        
+        frames, errors = await sector_service.get_board_constituents_frames(batch.concept, batch.industry)
+        frame = sector_service.constituents_long_table(frames)
+        headers = None
+        if errors:
+            headers = {"X-Failed-Boards": ",".join(quote(f"{board_type}:{board}") for board_type, board in errors)}
+        return query_response(request, frame, query, negotiate_format(request, format), headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取板块成份股失败: {str(e)}")
+
+@router.websocket("/ws")
+async def stream_boards(
+    websocket: WebSocket,
+    boards: str = Query("concept,industry", description="逗号分隔的板块类型，可选concept(概念板块)、industry(行业板块)")
+):
+    """
+    通过WebSocket推送概念板块和行业板块排行的变化
+    
+    连接后每种板块类型先推送snapshot消息，包含完整板块表、领涨板块和市场宽度；
+    之后每次板块列表刷新时推送diff消息，只包含字段变化的板块、新增和移除的板块、
+    以及有变化时的领涨板块和市场宽度。消费过慢的连接会以1013关闭码断开，重连后重新获得snapshot。
+    """
+    board_types = [board_type.strip() for board_type in boards.split(",") if board_type.strip()]
+    if not board_types or any(board_type not in BOARD_TYPES for board_type in board_types):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"板块类型可选: {', '.join(BOARD_TYPES)}")
+        return
+    await websocket.accept()
+    
+    async def send():
+        async for message in board_stream_service.stream(board_types):
+            await websocket.send_text(message)
+        # 推送结束说明连接消息积压已被断开
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="消息积压")
+    
+    sender = asyncio.create_task(send())
+    try:
+        # 客户端无需发送消息，持续接收以便及时发现断开
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
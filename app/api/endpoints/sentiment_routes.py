@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Literal, Optional
 from datetime import datetime
 
 from app.models.sentiment_models import MarginDetail, StockHotRank, StockHotUpRank, StockHotKeyword
+from app.models.stock_models import StockBatchRequest
+from app.core.config import settings
 from app.services.sentiment_service import SentimentService
+from app.utils.cache import get_cache_entry
+from app.utils.query import ListQuery, list_query, apply_list_query
+from app.utils.response import ORJSONResponse, ResponseFormat, negotiate_format, query_response, list_response
 
 router = APIRouter()
 sentiment_service = SentimentService()
 
 @router.get("/margin/details", response_model=List[MarginDetail])
 async def get_margin_details(
-    trade_date: str = Query(..., description="交易日期，格式为YYYYMMDD，如20230922")
+    request: Request,
+    trade_date: str = Query(..., description="交易日期，格式为YYYYMMDD，如20230922"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取融资融券明细数据（上海和深圳市场合并）"""
     try:
@@ -20,6 +28,14 @@ async def get_margin_details(
         except ValueError:
             raise HTTPException(status_code=400, detail="日期格式错误，应为YYYYMMDD，如20230922")
         
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            # 查询参数和列式格式直接在服务层的DataFrame上处理
+            frame = await sentiment_service.get_margin_details_frame(trade_date)
+            if frame.empty:
+                raise HTTPException(status_code=404, detail=f"未找到 {trade_date} 的融资融券明细数据")
+            return query_response(request, frame, query, response_format)
+        
         result = await sentiment_service.get_margin_details(trade_date)
         if not result:
             raise HTTPException(status_code=404, detail=f"未找到 {trade_date} 的融资融券明细数据")
@@ -29,27 +45,76 @@ async def get_margin_details(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取融资融券明细数据失败: {str(e)}")
 
+@router.get("/margin/details/range")
+async def get_margin_details_range(
+    request: Request,
+    start_date: str = Query(..., description="开始日期，格式为YYYYMMDD，如20230901"),
+    end_date: str = Query(..., description="结束日期，格式为YYYYMMDD，如20230930"),
+    layout: Literal["long", "series"] = Query("long", description="输出形式: long(长表), series(股票代码到按日期排列的时间序列的映射)"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式(仅layout为long时有效): json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    获取日期区间内的融资融券明细数据（上海和深圳市场合并）
+    
+    区间内各交易日并发获取，获取失败的交易日通过X-Failed-Dates响应头返回。
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y%m%d")
+        end = datetime.strptime(end_date, "%Y%m%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式错误，应为YYYYMMDD，如20230922")
+    if start > end:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    if (end - start).days + 1 > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"日期区间最多{settings.BATCH_MAX_ITEMS}天")
+    
+    try:
+        frame, errors = await sentiment_service.get_margin_details_range_frame(start_date, end_date)
+        if frame.empty:
+            raise HTTPException(status_code=404, detail=f"未找到 {start_date}-{end_date} 的融资融券明细数据")
+        
+        headers = {"X-Failed-Dates": ",".join(errors)} if errors else None
+        if layout == "series":
+            if query.fields and "stock_code" not in query.fields:
+                query.fields.insert(0, "stock_code")
+            return ORJSONResponse(sentiment_service.margin_series(apply_list_query(frame, query)), headers=headers)
+        return query_response(request, frame, query, negotiate_format(request, format), headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取融资融券明细区间数据失败: {str(e)}")
+
 @router.get("/stock/hot-rank", response_model=List[StockHotRank])
-async def get_stock_hot_rank():
+async def get_stock_hot_rank(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取股票热度排名数据（东方财富网-人气榜-A股）"""
     try:
-        result = await sentiment_service.get_stock_hot_rank()
-        if not result:
+        # 未指定查询参数时直接输出缓存中的预序列化数据
+        entry = await get_cache_entry(sentiment_service.get_stock_hot_rank)
+        if not entry.value:
             raise HTTPException(status_code=404, detail="未获取到股票热度排名数据")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取股票热度排名数据失败: {str(e)}")
 
 @router.get("/stock/hot-up-rank", response_model=List[StockHotUpRank])
-async def get_stock_hot_up_rank():
+async def get_stock_hot_up_rank(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
     """获取股票飙升榜数据（东方财富网-个股人气榜-飙升榜）"""
     try:
-        result = await sentiment_service.get_stock_hot_up_rank()
-        if not result:
+        entry = await get_cache_entry(sentiment_service.get_stock_hot_up_rank)
+        if not entry.value:
             raise HTTPException(status_code=404, detail="未获取到股票飙升榜数据")
-        return result
+        return list_response(request, entry, query, format)
     except HTTPException:
         raise
     except Exception as e:
@@ -57,15 +122,46 @@ async def get_stock_hot_up_rank():
 
 @router.get("/stock/hot-keywords", response_model=List[StockHotKeyword])
 async def get_stock_hot_keywords(
-    symbol: str = Query(..., description="股票代码，如SZ000665")
+    request: Request,
+    symbol: str = Query(..., description="股票代码，如SZ000665"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取股票热门关键词数据（东方财富网-个股人气榜-热门关键词）"""
     try:
-        result = await sentiment_service.get_stock_hot_keywords(symbol)
-        if not result:
+        entry = await get_cache_entry(sentiment_service.get_stock_hot_keywords, symbol)
+        if not entry.value:
             raise HTTPException(status_code=404, detail=f"未找到股票 {symbol} 的热门关键词数据")
-        return result
+        return list_response(request, entry, query, format)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取股票热门关键词数据失败: {str(e)}")
+
+@router.post("/stock/hot-keywords/batch", response_model=List[StockHotKeyword])
+async def get_stock_hot_keywords_batch(
+    request: Request,
+    batch: StockBatchRequest,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    批量获取多只股票的热门关键词数据
+    
+    返回各股票热门关键词合并后的长表，以stock_code区分股票，适合以columns或arrow格式获取。
+    获取失败或无数据的股票代码通过X-Failed-Codes响应头返回。
+    """
+    if len(batch.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        frame, errors = await sentiment_service.get_stock_hot_keywords_frame(batch.codes)
+        if frame.empty:
+            raise HTTPException(status_code=404, detail=f"未找到热门关键词数据: {'; '.join(f'{code}: {error}' for code, error in errors.items())}")
+        headers = {"X-Failed-Codes": ",".join(errors)} if errors else None
+        return query_response(request, frame, query, negotiate_format(request, format), headers)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票热门关键词数据失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"批量获取股票热门关键词数据失败: {str(e)}")
@@ -1,12 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import pandas as pd
+from dataclasses import replace
+from typing import List, Literal, Optional
 from datetime import datetime
 
-from app.models.stock_models import StockInfo, StockQuote, StockFinancial, StockFundFlow, StockHistory
+from app.models.stock_models import (
+    StockInfo, StockInfoBatch, StockQuote, StockQuoteBatch, StockBatchRequest, StockFinancial, StockFundFlow,
+    StockHistory, StockHistoryBatchRequest, StockDossier, StockSpotPoint
+)
+from app.core.config import settings
 from app.services.stock_service import StockService
+from app.services.dossier_service import DOSSIER_SECTIONS, DossierService
+from app.services.quote_stream_service import QuoteStreamService
+from app.services.spot_history_service import SpotHistoryService
+from app.services.screener_service import ScreenerService
+from app.services.movers_service import MoverRanking, MoversService
+from app.utils.bars import parse_period
+from app.utils.query import ListQuery, list_query, apply_list_query
+from app.utils.response import MEDIA_TYPES, ResponseFormat, iter_ndjson, negotiate_format, query_response, variant_response
+from app.utils.serialization import dumps
 
 router = APIRouter()
 stock_service = StockService()
+dossier_service = DossierService()
+quote_stream_service = QuoteStreamService()
+spot_history_service = SpotHistoryService()
+screener_service = ScreenerService()
+movers_service = MoversService()
 
 # 修改路径，移除"/stock"前缀，因为这个前缀可能在主应用中通过prefix参数添加
 @router.get("/{stock_code}/info", response_model=StockInfo)
@@ -17,6 +38,134 @@ async def get_stock_info(stock_code: str):
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取个股信息失败: {str(e)}")
 
+@router.post("/info/batch", response_model=StockInfoBatch)
+async def get_stock_infos(request: StockBatchRequest):
+    """批量获取个股基本信息，未缓存的股票并发获取，返回部分结果和逐只的错误信息"""
+    if len(request.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        return await stock_service.get_stock_infos(request.codes)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取个股信息失败: {str(e)}")
+
+@router.post("/quotes", response_model=StockQuoteBatch)
+async def get_stock_quotes(request: StockBatchRequest):
+    """批量获取个股实时行情，所有行情取自同一份全市场快照"""
+    try:
+        return await stock_service.get_stock_quotes(request.codes)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取个股行情失败: {str(e)}")
+
+@router.get("/quotes/stream")
+async def stream_stock_quotes(
+    codes: str = Query(..., description="逗号分隔的股票代码，如'000001,600000'")
+):
+    """
+    以SSE(Server-Sent Events)推送个股实时行情
+    
+    首先推送snapshot事件，包含所有订阅股票的当前行情；之后每次全市场快照刷新时，
+    推送update事件，只包含行情发生变化的订阅股票。所有连接共享同一个上游轮询。
+    """
+    code_list = [code.strip() for code in codes.split(",") if code.strip()]
+    if not code_list:
+        raise HTTPException(status_code=400, detail="请指定至少一个股票代码")
+    if len(code_list) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多订阅{settings.BATCH_MAX_ITEMS}只股票")
+    return StreamingResponse(
+        quote_stream_service.stream(code_list),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/spot/as-of", response_model=List[StockQuote])
+async def get_spot_as_of(
+    request: Request,
+    at: Optional[datetime] = Query(None, description="时间点，如'2024-01-02T10:30:00'，返回该时间点及之前最近的一份快照"),
+    ago: Optional[int] = Query(None, ge=0, description="距现在的秒数，与at二选一，如300表示5分钟前"),
+    codes: Optional[str] = Query(None, description="逗号分隔的股票代码，不指定时返回全市场"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    获取过去某一时间的全市场实时行情快照
+    
+    服务端持续记录全市场快照的增量，保留约SPOT_HISTORY_SIZE份快照，由基准快照和增量重建指定时间的快照。
+    记录在第一次查询行情历史时开始，时间早于记录窗口时返回400。
+    """
+    code_list = [code.strip() for code in codes.split(",") if code.strip()] if codes else None
+    try:
+        frame = await spot_history_service.get_spot_as_of(at, ago, code_list)
+        return query_response(request, frame, query, negotiate_format(request, format))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取历史行情快照失败: {str(e)}")
+
+@router.get("/screener", response_model=List[StockQuote])
+async def screen_stocks(
+    request: Request,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    全市场选股
+    
+    在全市场实时行情快照上按where条件筛选，如where=pe_ratio>0,pe_ratio<30,pb_ratio<3,volume_ratio>2，
+    按sort排序并取前limit只，如sort=-change_percent&limit=50。筛选在服务端缓存的列式快照上完成，
+    响应头X-Screen-Time给出筛选耗时(毫秒)。
+    """
+    try:
+        frame, elapsed = await screener_service.screen(query)
+        page_query = replace(query, where=[], sort=[], limit=None)
+        headers = {"X-Screen-Time": f"{elapsed:.3f}"}
+        return query_response(request, frame, page_query, negotiate_format(request, format), headers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"选股失败: {str(e)}")
+
+@router.get("/movers/{ranking}", response_model=List[StockQuote])
+async def get_stock_movers(
+    request: Request,
+    ranking: MoverRanking,
+    limit: int = Query(20, ge=1, le=settings.MOVERS_TOP_COUNT, description="返回的股票数")
+):
+    """
+    全市场行情排行
+    
+    ranking可选gainers(涨幅榜)、losers(跌幅榜)、turnover(换手率榜)、amount(成交额榜)、volume_ratio(量比榜)。
+    排行在每次全市场快照刷新时预先计算并编码，请求只截取前limit条。
+    """
+    try:
+        table = await movers_service.get_market_movers()
+        return variant_response(request, table.entry, f"{ranking}|{limit}", lambda: table.payload(ranking, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取行情排行失败: {str(e)}")
+
+@router.get("/{stock_code}/spot-history", response_model=List[StockSpotPoint])
+async def get_stock_spot_history(
+    request: Request,
+    stock_code: str,
+    start: Optional[datetime] = Query(None, description="开始时间，不指定时从记录窗口内最早的快照开始"),
+    end: Optional[datetime] = Query(None, description="结束时间，不指定时到最新的快照为止"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """获取个股在行情历史记录窗口内每份全市场快照中的行情，用于查看盘中走势"""
+    try:
+        frame = await spot_history_service.get_stock_spot_series(stock_code, start, end)
+        return query_response(request, frame, query, negotiate_format(request, format))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取个股盘中行情历史失败: {str(e)}")
+
 @router.get("/{stock_code}/quote", response_model=StockQuote)
 async def get_stock_quote(stock_code: str):
     """获取个股实时行情"""
@@ -25,6 +174,21 @@ async def get_stock_quote(stock_code: str):
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"获取个股行情失败: {str(e)}")
 
+@router.get("/{stock_code}/dossier", response_model=StockDossier)
+async def get_stock_dossier(
+    stock_code: str,
+    sections: Optional[str] = Query(None, description=f"需要获取的部分，逗号分隔，默认为全部: {','.join(DOSSIER_SECTIONS)}"),
+    timeout: Optional[float] = Query(None, gt=0, le=60, description="每个部分的超时时间(秒)，默认使用服务端配置")
+):
+    """获取个股综合信息，各部分并发获取，返回已完成的部分及各部分的状态"""
+    section_list = [name.strip() for name in sections.split(",") if name.strip()] if sections else None
+    try:
+        return await dossier_service.get_stock_dossier(stock_code, section_list, timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取个股综合信息失败: {str(e)}")
+
 @router.get("/{stock_code}/financial", response_model=StockFinancial)
 async def get_stock_financial(stock_code: str):
     """获取个股财务信息"""
@@ -51,18 +215,88 @@ async def get_stock_margin(stock_code: str):
 
 @router.get("/{stock_code}/history", response_model=List[StockHistory])
 async def get_stock_history(
+    request: Request,
     stock_code: str,
-    period: str = Query("daily", description="数据周期: daily(日线), weekly(周线), monthly(月线)"),
+    period: str = Query("daily", description="数据周期: daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)，日线以外的周期由日线合成"),
     start_date: Optional[str] = Query(None, description="开始日期，格式YYYYMMDD，如20210101"),
-    end_date: Optional[str] = Query(None, description="结束日期，格式YYYYMMDD，如20210630")
+    end_date: Optional[str] = Query(None, description="结束日期，格式YYYYMMDD，如20210630"),
+    adjust: Literal["qfq", "hfq", ""] = Query("qfq", description="复权方式: qfq(前复权), hfq(后复权), 空字符串(不复权)，由同一份不复权K线和复权因子计算"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取个股历史行情数据"""
     try:
-        result = await stock_service.get_stock_history(stock_code, period, start_date, end_date)
+        parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        response_format = negotiate_format(request, format)
+        if response_format != ResponseFormat.JSON or not query.is_empty():
+            # 查询参数和列式格式直接在服务层的DataFrame上处理
+            frame = await stock_service.get_stock_history_frame(stock_code, period, start_date, end_date, adjust)
+            return query_response(request, frame, query, response_format)
+        
+        result = await stock_service.get_stock_history(stock_code, period, start_date, end_date, adjust)
         if not result:
             raise HTTPException(status_code=404, detail=f"未找到股票代码 {stock_code} 的历史行情数据")
         return result
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取个股历史行情数据失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取个股历史行情数据失败: {str(e)}")
+
+@router.post("/history/batch")
+async def get_stock_histories(
+    request: Request,
+    batch: StockHistoryBatchRequest,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    批量获取多只股票的历史行情数据
+    
+    layout为long时返回与单只股票历史行情字段一致的长表，layout为wide时返回行为交易日、列为股票代码的宽表。
+    获取失败的股票代码通过X-Failed-Codes响应头返回。
+    长表以NDJSON格式输出且未指定sort、limit和分页参数时，按获取完成的顺序逐只流式输出，
+    获取失败的股票输出为{"stock_code": 股票代码, "error": 错误信息}。
+    """
+    if len(batch.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        parse_period(batch.period)
+        response_format = negotiate_format(request, format)
+        args = (batch.codes, batch.period, batch.start_date, batch.end_date, batch.adjust)
+        
+        if (
+            batch.layout == "long" and response_format == ResponseFormat.NDJSON
+            and not query.sort and query.limit is None and query.page_size is None
+        ):
+            # 在开始输出前校验查询参数中的字段
+            apply_list_query(pd.DataFrame(columns=list(StockHistory.model_fields)), query)
+            
+            async def stream():
+                async for code, frame, error in stock_service.iter_stock_history_frames(*args):
+                    if error is not None:
+                        yield dumps({"stock_code": code, "error": error}) + b"\n"
+                        continue
+                    for chunk in iter_ndjson(apply_list_query(frame, query)):
+                        yield chunk
+            
+            return StreamingResponse(stream(), media_type=MEDIA_TYPES[ResponseFormat.NDJSON])
+        
+        frames, errors = await stock_service.get_stock_history_frames(*args)
+        if not frames:
+            raise HTTPException(status_code=404, detail=f"未找到历史行情数据: {'; '.join(f'{code}: {error}' for code, error in errors.items())}")
+        
+        if batch.layout == "wide":
+            frame = stock_service.history_panel(frames, batch.field)
+        else:
+            frame = pd.concat(frames.values(), ignore_index=True)
+        headers = {"X-Failed-Codes": ",".join(errors)} if errors else None
+        return query_response(request, frame, query, response_format, headers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取个股历史行情数据失败: {str(e)}")
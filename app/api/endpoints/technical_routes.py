@@ -1,24 +1,146 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Any, Dict, List, Literal, Optional
 
-from app.models.technical_models import ChipDistribution
+from app.core.config import settings
+from app.models.technical_models import (
+    BacktestRequest, BacktestResult, ChipDistribution, ChipDistributionBatchRequest, CorrelationRequest, CorrelationResult
+)
+from app.services.backtest_service import BacktestService
+from app.services.correlation_service import CorrelationService
 from app.services.technical_service import TechnicalService
+from app.utils.bars import parse_period
+from app.utils.cache import get_cache_entry
+from app.utils.indicators import IndicatorParams, indicator_params
+from app.utils.query import ListQuery, list_query
+from app.utils.response import PayloadResponse, ResponseFormat, list_response, negotiate_format, query_response
+from app.utils.serialization import dumps
 
 router = APIRouter()
 technical_service = TechnicalService()
+correlation_service = CorrelationService()
+backtest_service = BacktestService()
+
+@router.get("/indicators", response_model=List[Dict[str, Any]])
+async def get_indicators(
+    request: Request,
+    symbol: str = Query(..., description="股票代码，如'000001'"),
+    period: str = Query("daily", description="周期: daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)"),
+    start_date: Optional[str] = Query(None, description="开始日期，格式YYYYMMDD，默认为上一年的1月1日，EMA、MACD、RSI、KDJ等递推指标从该日开始计算"),
+    end_date: Optional[str] = Query(None, description="结束日期，格式YYYYMMDD，默认为当天"),
+    adjust: Literal["", "qfq", "hfq"] = Query("qfq", description="复权方式: qfq(前复权), hfq(后复权), 空字符串(不复权)"),
+    params: IndicatorParams = Depends(indicator_params),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    计算个股的技术指标(MA、EMA、MACD、RSI、BOLL、KDJ、ATR)
+    
+    每根K线一行，指标列名由参数决定，如ma5、ema12、dif、dea、macd、rsi6、boll_mid、k、d、j、atr14。
+    同一股票和参数组合的计算状态保留在服务端，新K线到来时只计算新增部分。
+    """
+    try:
+        parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        frame = await technical_service.get_indicators(symbol, params, period, start_date, end_date, adjust)
+        return query_response(request, frame, query, negotiate_format(request, format))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"计算技术指标失败: {str(e)}")
 
 @router.get("/chip-distribution", response_model=List[ChipDistribution])
 async def get_chip_distribution(
+    request: Request,
     symbol: str = Query(..., description="股票代码，如'000001'"),
-    adjust: str = Query("", description="复权类型，可选值为'qfq'(前复权)、'hfq'(后复权)、''(不复权)，默认为不复权")
+    adjust: str = Query("", description="复权类型，可选值为'qfq'(前复权)、'hfq'(后复权)、''(不复权)，默认为不复权"),
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
 ):
     """获取股票筹码分布数据"""
     try:
-        result = await technical_service.get_chip_distribution(symbol, adjust)
-        if not result:
+        entry = await get_cache_entry(technical_service.get_chip_distribution, symbol, adjust)
+        if not entry.value:
             raise HTTPException(status_code=404, detail=f"未找到股票代码 {symbol} 的筹码分布数据")
-        return result
+        return list_response(request, entry, query, format)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取股票筹码分布数据失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取股票筹码分布数据失败: {str(e)}")
+
+@router.post("/chip-distribution/batch", response_model=List[ChipDistribution])
+async def get_chip_distribution_batch(
+    request: Request,
+    batch: ChipDistributionBatchRequest,
+    query: ListQuery = Depends(list_query),
+    format: Optional[ResponseFormat] = Query(None, description="响应格式: json(默认)、columns(列式JSON)、ndjson(NDJSON流)、arrow(Arrow IPC流)、parquet，也可通过Accept请求头指定")
+):
+    """
+    批量获取多只股票的筹码分布数据
+    
+    返回各股票筹码分布合并后的长表，以stock_code区分股票，适合以columns或arrow格式获取。
+    获取失败或无数据的股票代码通过X-Failed-Codes响应头返回。
+    """
+    if len(batch.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        frame, errors = await technical_service.get_chip_distribution_frame(batch.codes, batch.adjust)
+        if frame.empty:
+            raise HTTPException(status_code=404, detail=f"未找到筹码分布数据: {'; '.join(f'{code}: {error}' for code, error in errors.items())}")
+        headers = {"X-Failed-Codes": ",".join(errors)} if errors else None
+        return query_response(request, frame, query, negotiate_format(request, format), headers)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取股票筹码分布数据失败: {str(e)}")
+
+@router.post("/correlation", response_model=CorrelationResult)
+async def get_correlation(correlation: CorrelationRequest):
+    """
+    计算股票组合的相关系数矩阵、协方差矩阵和相对基准指数的beta
+    
+    各股票的日K线取自历史行情缓存，按基准指数的交易日对齐后计算日收益率，停牌日不参与计算。
+    rolling为true时另外返回每个交易日结束的窗口的beta和与基准的相关系数。
+    相同组合和参数的结果在服务端缓存，获取失败的股票代码通过errors返回。
+    """
+    if len(correlation.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        entry = await correlation_service.get_correlation_entry(
+            correlation.codes, correlation.benchmark, correlation.window, correlation.start_date,
+            correlation.end_date, correlation.adjust, correlation.rolling
+        )
+        return PayloadResponse.from_entry(entry)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"计算组合相关性失败: {str(e)}")
+
+@router.post("/backtest", response_model=BacktestResult)
+async def run_backtest(backtest: BacktestRequest):
+    """
+    在历史行情上回测简单的信号规则
+    
+    规则形如"ma5 cross_above ma20"、"rsi6 < 30"、"close > boll_upper"，
+    入场规则全部满足时按当日收盘价买入，离场规则任一满足时卖出。
+    股票池中每只股票占相同的资金份额，返回组合和每只股票的净值曲线及统计，获取失败的股票代码通过errors返回。
+    """
+    if len(backtest.codes) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多请求{settings.BATCH_MAX_ITEMS}只股票")
+    try:
+        result = await backtest_service.run_backtest(
+            backtest.codes, backtest.entry, backtest.exit, backtest.start_date,
+            backtest.end_date, backtest.adjust, backtest.fee_rate
+        )
+        return PayloadResponse(content=dumps(result))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"回测失败: {str(e)}")
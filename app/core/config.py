@@ -15,6 +15,14 @@ class Settings(BaseSettings):
     # 缓存设置
     CACHE_ENABLED: bool = True
     CACHE_EXPIRATION: int = 300  # 缓存过期时间(秒)
+    CACHE_MAX_ENTRIES: int = 1024  # 进程内缓存最大条目数
+    INDICATOR_CACHE_MAX_ENTRIES: int = 256  # 技术指标增量计算状态的最大保留数(按股票和参数组合)
+    CHIP_CACHE_MAX_ENTRIES: int = 1024  # 筹码分布增量计算状态的最大保留数(按股票和复权方式)
+    HISTORY_CACHE_EXPIRATION: int = 30 * 24 * 3600  # 已收盘交易日等不再变化数据的缓存时间(秒)
+    ADJUST_FACTOR_CACHE_EXPIRATION: int = 6 * 3600  # 复权因子的缓存时间(秒)，K线中出现新的除权除息日时提前重新获取
+    SPOT_CACHE_EXPIRATION: int = 10  # 全市场实时行情快照缓存时间(秒)
+    BOARD_CACHE_EXPIRATION: int = 30  # 概念板块和行业板块列表行情的缓存时间(秒)
+    NEWS_CACHE_EXPIRATION: int = 30  # 财联社电报和全球财经快讯列表的缓存时间(秒)，也是资讯采集的轮询间隔
     
     # 日志设置
     LOG_LEVEL: str = "INFO"
@@ -22,6 +30,26 @@ class Settings(BaseSettings):
     # AKShare设置
     AKSHARE_TIMEOUT: float = 60.0  # AKShare接口超时时间(秒)
     
+    # 批量接口设置
+    BATCH_MAX_ITEMS: int = 500  # 单次批量请求的最大条目数
+    BATCH_CONCURRENCY: int = 8  # 批量请求中未命中缓存条目的最大并发获取数
+    BATCH_ITEM_TIMEOUT: float = 30.0  # 批量请求中单个条目的超时时间(秒)
+    UPSTREAM_CONCURRENCY: int = 16  # 全局同时进行的AKShare调用数上限
+    PROCESS_POOL_WORKERS: int = max(1, min(4, (os.cpu_count() or 1)))  # 回测等CPU密集计算的进程池大小
+    BACKTEST_CHUNK_SIZE: int = 50  # 回测时每个进程池任务模拟的股票数，股票数不超过该值时在当前进程中模拟
+    DOSSIER_SECTION_TIMEOUT: float = 10.0  # 个股综合信息中每个部分的超时时间(秒)
+    
+    # 推送接口设置
+    STREAM_QUEUE_SIZE: int = 32  # 每个推送连接的待发送消息队列长度，积压超过后断开该连接
+    STREAM_HEARTBEAT_INTERVAL: float = 15.0  # 无消息时发送心跳的间隔(秒)
+    NEWS_FEED_MAX_ITEMS: int = 2000  # 每个资讯源在内存中保留的最大条目数
+    SPOT_HISTORY_SIZE: int = 360  # 行情历史保留的快照增量数，窗口长度约为该值乘以SPOT_CACHE_EXPIRATION秒
+    MOVERS_TOP_COUNT: int = 100  # 涨幅榜等排行每份快照预先计算的条目数，也是排行接口limit的上限
+    MOVERS_IDLE_TIMEOUT: float = 300.0  # 排行在最后一次请求后继续跟随快照刷新的时间(秒)
+    BOARD_MEMBERSHIP_EXPIRATION: int = 3600  # 板块统计重新获取全部板块成份股构成的间隔(秒)
+    BOARD_ANALYTICS_IDLE_TIMEOUT: float = 300.0  # 板块统计在最后一次请求后继续运行后台任务的时间(秒)
+    CORRELATION_CACHE_MAX_ENTRIES: int = 64  # 进程内保留的组合相关性结果数，超过后按LRU淘汰
+    
     # Redis缓存设置
     REDIS_ENABLED: bool = True  # 是否启用Redis缓存
     REDIS_HOST: str = "localhost"  # Redis服务器地址
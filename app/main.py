@@ -4,12 +4,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router  # 使用router.py中的api_router
 from app.core.config import settings
 from app.mcp.router import mcp_router  # 修改导入路径
+from app.utils.response import ORJSONResponse
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="股票分析服务API，基于AKShare数据",
     version="0.1.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse  # 使用orjson渲染所有REST和MCP响应
 )
 
 # 设置CORS
@@ -5,6 +5,7 @@ from app.mcp.sector_mcp import SectorMCP  # 修改导入路径
 from app.mcp.sentiment_mcp import SentimentMCP  # 修改导入路径
 from app.mcp.technical_mcp import TechnicalMCP  # 修改导入路径
 from app.mcp.news_mcp import NewsMCP  # 修改导入路径
+from app.models.stock_models import StockBatchRequest
 
 mcp_router = APIRouter(prefix="/mcp")
 
@@ -19,10 +20,22 @@ news_mcp = NewsMCP()
 # 股票MCP路由
 @mcp_router.get("/stock/info/{stock_code}")
 async def get_stock_info(stock_code: str):
-    return stock_mcp.get_stock_info(stock_code)
+    return await stock_mcp.get_stock_info(stock_code)
+
+@mcp_router.post("/stock/info/batch")
+async def get_stock_infos(request: StockBatchRequest):
+    return await stock_mcp.get_stock_infos(request.codes)
+
+@mcp_router.get("/stock/dossier/{stock_code}")
+async def get_stock_dossier(stock_code: str):
+    return await stock_mcp.get_stock_dossier(stock_code)
 
 @mcp_router.get("/stock/quote/{stock_code}")
 async def get_stock_quote(stock_code: str):
-    return stock_mcp.get_stock_quote(stock_code)
+    return await stock_mcp.get_stock_quote(stock_code)
+
+@mcp_router.post("/stock/quotes")
+async def get_stock_quotes(request: StockBatchRequest):
+    return await stock_mcp.get_stock_quotes(request.codes)
 
 # 添加其他MCP接口路由...
\ No newline at end of file
@@ -1,6 +1,8 @@
 from typing import Dict, List, Optional
 from app.core.logging import get_logger
 from app.services.sector_service import SectorService
+from app.services.board_analytics_service import BoardAnalyticsService
+from app.utils.columnar import frame_to_records
 
 logger = get_logger(__name__)
 
@@ -20,6 +22,7 @@ class SectorMCP:
     def __init__(self):
         """初始化SectorMCP，创建服务实例"""
         self.sector_service = SectorService()
+        self.board_analytics_service = BoardAnalyticsService()
     
     async def get_concept_boards(self) -> List[Dict]:
         """
@@ -135,6 +138,67 @@ class SectorMCP:
             logger.error(f"获取概念板块成份股失败: {str(e)}")
             raise Exception(f"获取概念板块成份股失败: {str(e)}")
     
+    async def get_board_constituents_batch(
+        self,
+        concept_boards: Optional[List[str]] = None,
+        industry_boards: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        批量获取概念板块和行业板块成份股
+        
+        未缓存的板块并发获取，单个板块失败不影响其他板块。
+        
+        Args:
+            concept_boards: 概念板块名称或代码列表，如["融资融券", "BK0655"]
+            industry_boards: 行业板块名称或代码列表，如["小金属", "BK1027"]
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - concept: Dict[str, List[Dict]], 概念板块到成份股列表的映射
+                - industry: Dict[str, List[Dict]], 行业板块到成份股列表的映射
+                - errors: List[Dict], 获取失败的板块(key，形如"concept:融资融券")及错误信息(error)
+        """
+        concept_boards = concept_boards or []
+        industry_boards = industry_boards or []
+        logger.info(f"MCP批量获取板块成份股: 概念板块{len(concept_boards)}个, 行业板块{len(industry_boards)}个")
+        try:
+            # 调用服务层获取数据
+            result = await self.sector_service.get_board_constituents_batch(concept_boards, industry_boards)
+            
+            # 将Pydantic模型转换为字典
+            return result.model_dump()
+        except Exception as e:
+            logger.error(f"批量获取板块成份股失败: {str(e)}")
+            raise Exception(f"批量获取板块成份股失败: {str(e)}")
+    
+    async def get_board_analytics(self, board_type: Optional[str] = None, sort_by: Optional[str] = None,
+                                  limit: Optional[int] = None) -> List[Dict]:
+        """
+        获取由成份股行情汇总的板块统计
+        
+        Args:
+            board_type: 板块类型，concept或industry，默认返回全部板块
+            sort_by: 降序排序的字段，如weighted_change_percent、limit_up_count、top_amount_ratio
+            limit: 返回的最大板块数
+            
+        Returns:
+            List[Dict]: 板块统计列表，字段包括涨跌家数、涨跌停家数、收于当日最高价的上涨家数、
+                平均及中位数涨跌幅、成交额加权涨跌幅、成交额和资金集中度(top_amount_ratio)
+        """
+        logger.info(f"MCP获取板块统计: {board_type or '全部'}")
+        try:
+            frame = await self.board_analytics_service.get_board_analytics(board_type)
+            if sort_by:
+                if sort_by not in frame.columns:
+                    raise ValueError(f"未知字段: {sort_by}")
+                frame = frame.sort_values(sort_by, ascending=False, kind="stable")
+            if limit is not None:
+                frame = frame.head(limit)
+            return frame_to_records(frame)
+        except Exception as e:
+            logger.error(f"获取板块统计失败: {str(e)}")
+            raise Exception(f"获取板块统计失败: {str(e)}")
+    
     async def get_industry_boards(self) -> List[Dict]:
         """
         获取行业板块列表及实时行情
@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional
 from app.core.logging import get_logger
 from app.services.sentiment_service import SentimentService
+from app.utils.columnar import frame_to_columns, frame_to_records
 
 logger = get_logger(__name__)
 
@@ -42,6 +43,37 @@ class SentimentMCP:
             logger.error(f"获取融资融券明细数据失败: {str(e)}")
             raise Exception(f"获取融资融券明细数据失败: {str(e)}")
     
+    async def get_margin_details_range(self, start_date: str, end_date: str, layout: str = "long") -> Dict:
+        """
+        获取日期区间内的融资融券明细数据（上海和深圳市场合并）
+        
+        Args:
+            start_date: 开始日期，格式为"YYYYMMDD"，如"20230901"
+            end_date: 结束日期，格式为"YYYYMMDD"，如"20230930"
+            layout: 输出形式，long为长表，series为股票代码到按日期排列的时间序列的映射
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - data: 长表记录列表，或股票代码到记录列表的映射
+                - errors: List[Dict], 获取失败的交易日期(key)及错误信息(error)
+        """
+        logger.info(f"MCP获取融资融券明细区间数据: {start_date}-{end_date}")
+        try:
+            # 调用服务层获取数据
+            frame, errors = await self.sentiment_service.get_margin_details_range_frame(start_date, end_date)
+            
+            if layout == "series":
+                data = self.sentiment_service.margin_series(frame)
+            else:
+                data = frame_to_records(frame)
+            return {
+                "data": data,
+                "errors": [{"key": trade_date, "error": error} for trade_date, error in errors.items()]
+            }
+        except Exception as e:
+            logger.error(f"获取融资融券明细区间数据失败: {str(e)}")
+            raise Exception(f"获取融资融券明细区间数据失败: {str(e)}")
+    
     async def get_stock_hot_rank(self) -> List[Dict]:
         """
         获取股票热度排名数据
@@ -97,4 +129,31 @@ class SentimentMCP:
             return [keyword.model_dump() for keyword in keywords]
         except Exception as e:
             logger.error(f"获取股票热门关键词数据失败: {str(e)}")
-            raise Exception(f"获取股票热门关键词数据失败: {str(e)}")
\ No newline at end of file
+            raise Exception(f"获取股票热门关键词数据失败: {str(e)}")
+    
+    async def get_stock_hot_keywords_batch(self, symbols: List[str]) -> Dict:
+        """
+        批量获取多只股票的热门关键词数据
+        
+        未缓存的股票并发获取，单只股票失败不影响其他股票。
+        
+        Args:
+            symbols: 股票代码列表，如["000665", "600000"]
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - data: Dict[str, List], 各股票热门关键词合并后的列式数据，以stock_code区分股票
+                - errors: List[Dict], 获取失败或无数据的股票代码(key)及错误信息(error)
+        """
+        logger.info(f"MCP批量获取股票热门关键词数据: {len(symbols)}只")
+        try:
+            # 调用服务层获取数据
+            frame, errors = await self.sentiment_service.get_stock_hot_keywords_frame(symbols)
+            
+            return {
+                "data": frame_to_columns(frame),
+                "errors": [{"key": code, "error": error} for code, error in errors.items()]
+            }
+        except Exception as e:
+            logger.error(f"批量获取股票热门关键词数据失败: {str(e)}")
+            raise Exception(f"批量获取股票热门关键词数据失败: {str(e)}")
@@ -3,6 +3,12 @@ import pandas as pd
 from typing import Dict, List, Optional, Union
 from app.core.logging import get_logger
 from app.services.stock_service import StockService
+from app.services.dossier_service import DossierService
+from app.services.screener_service import ScreenerService
+from app.services.movers_service import MoversService
+from app.utils.columnar import frame_to_records
+from app.utils.query import parse_list_query
+from app.utils.serialization import loads
 
 logger = get_logger(__name__)
 
@@ -22,6 +28,9 @@ class StockMCP:
     def __init__(self):
         """初始化StockMCP，创建服务实例"""
         self.stock_service = StockService()
+        self.dossier_service = DossierService()
+        self.screener_service = ScreenerService()
+        self.movers_service = MoversService()
     
     async def get_stock_info(self, stock_code: str) -> Dict:
         """
@@ -68,6 +77,31 @@ class StockMCP:
             logger.error(f"获取个股信息失败: {str(e)}")
             raise Exception(f"获取个股信息失败: {str(e)}")
     
+    async def get_stock_infos(self, stock_codes: List[str]) -> Dict:
+        """
+        批量获取个股基本信息
+        
+        未缓存的股票并发获取，单只股票失败或超时不影响其他股票。
+        
+        Args:
+            stock_codes: 股票代码列表，如["000001", "600000"]
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - items: List[Dict], 获取成功的个股基本信息，顺序与请求一致
+                - errors: List[Dict], 获取失败的股票代码(key)及错误信息(error)
+        """
+        logger.info(f"MCP批量获取个股基本信息: {len(stock_codes)}只")
+        try:
+            # 调用服务层获取数据
+            infos = await self.stock_service.get_stock_infos(stock_codes)
+            
+            # 将Pydantic模型转换为字典
+            return infos.model_dump()
+        except Exception as e:
+            logger.error(f"批量获取个股信息失败: {str(e)}")
+            raise Exception(f"批量获取个股信息失败: {str(e)}")
+    
     async def get_stock_quote(self, stock_code: str) -> Dict:
         """
         获取个股实时行情
@@ -89,17 +123,99 @@ class StockMCP:
             logger.error(f"获取个股行情失败: {str(e)}")
             raise Exception(f"获取个股行情失败: {str(e)}")
     
+    async def get_stock_quotes(self, stock_codes: List[str]) -> Dict:
+        """
+        批量获取个股实时行情
+        
+        所有行情取自同一份全市场快照，一次调用即可替代逐只调用get_stock_quote。
+        
+        Args:
+            stock_codes: 股票代码列表，如["000001", "600000"]
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - quotes: List[Dict], 实时行情列表，顺序与请求一致
+                - not_found: List[str], 快照中不存在的股票代码
+                - update_time: datetime, 快照时间
+        """
+        logger.info(f"MCP批量获取个股实时行情: {len(stock_codes)}只")
+        try:
+            # 调用服务层获取数据
+            quotes = await self.stock_service.get_stock_quotes(stock_codes)
+            
+            # 将Pydantic模型转换为字典
+            return quotes.model_dump()
+        except Exception as e:
+            logger.error(f"批量获取个股行情失败: {str(e)}")
+            raise Exception(f"批量获取个股行情失败: {str(e)}")
+    
+    async def screen_stocks(self, where: Optional[str] = None, sort: Optional[str] = None,
+                            limit: Optional[int] = 50, fields: Optional[str] = None) -> Dict:
+        """
+        全市场选股
+        
+        在全市场实时行情快照上按条件筛选并排序，替代下载全市场行情后在本地筛选。
+        
+        Args:
+            where: 逗号分隔的过滤条件且同时满足，如"pe_ratio>0,pe_ratio<30,pb_ratio<3,volume_ratio>2"，
+                可用字段为实时行情的字段，如price、change_percent、turnover_rate、volume_ratio、pe_ratio、pb_ratio、market_cap
+            sort: 逗号分隔的排序字段，前缀"-"表示降序，如"-change_percent"
+            limit: 返回的最大股票数，默认50，为None时返回全部满足条件的股票
+            fields: 逗号分隔的返回字段，如"code,name,price"，默认返回全部字段
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - items: List[Dict], 入选股票的实时行情，按排序字段排列
+                - elapsed_ms: float, 筛选耗时(毫秒)
+        """
+        logger.info(f"MCP全市场选股: {where}, 排序: {sort}, 数量: {limit}")
+        try:
+            query = parse_list_query(fields=fields, where=where, sort=sort, limit=limit)
+            frame, elapsed = await self.screener_service.screen(query)
+            if query.fields:
+                unknown = [name for name in query.fields if name not in frame.columns]
+                if unknown:
+                    raise ValueError(f"未知字段: {', '.join(unknown)}")
+                frame = frame[query.fields]
+            return {"items": frame_to_records(frame), "elapsed_ms": elapsed}
+        except Exception as e:
+            logger.error(f"选股失败: {str(e)}")
+            raise Exception(f"选股失败: {str(e)}")
+    
+    async def get_stock_movers(self, ranking: str = "gainers", limit: int = 20) -> List[Dict]:
+        """
+        获取全市场行情排行
+        
+        排行在每次全市场快照刷新时预先计算，调用时不排序、不访问上游。
+        
+        Args:
+            ranking: 排行类型，可选 gainers(涨幅榜), losers(跌幅榜), turnover(换手率榜), amount(成交额榜), volume_ratio(量比榜)
+            limit: 返回的股票数，最多为服务端配置的MOVERS_TOP_COUNT
+            
+        Returns:
+            List[Dict]: 排行中股票的实时行情，按排行顺序排列
+        """
+        logger.info(f"MCP获取全市场行情排行: {ranking}, 数量: {limit}")
+        try:
+            table = await self.movers_service.get_market_movers()
+            return loads(table.payload(ranking, limit))
+        except Exception as e:
+            logger.error(f"获取行情排行失败: {str(e)}")
+            raise Exception(f"获取行情排行失败: {str(e)}")
+    
     async def get_stock_history(self, stock_code: str, period: str = "daily",
                           start_date: Optional[str] = None,
-                          end_date: Optional[str] = None) -> List[Dict]:
+                          end_date: Optional[str] = None,
+                          adjust: str = "qfq") -> List[Dict]:
         """
         获取个股历史行情
 
         Args:
             stock_code: 股票代码
-            period: 周期，可选 daily, weekly, monthly
+            period: 周期，可选 daily, weekly, monthly, quarterly, Nd(每N个交易日，如5d)
             start_date: 开始日期，格式YYYYMMDD
             end_date: 结束日期，格式YYYYMMDD
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
 
         Returns:
             List[Dict]: 包含历史行情数据的字典列表
@@ -108,7 +224,7 @@ class StockMCP:
         try:
             # 调用服务层获取数据
             history_data = await self.stock_service.get_stock_history(
-                stock_code, period, start_date, end_date
+                stock_code, period, start_date, end_date, adjust
             )
 
             # 将Pydantic模型列表转换为字典列表
@@ -117,6 +233,81 @@ class StockMCP:
             logger.error(f"获取个股历史行情失败: {str(e)}")
             raise Exception(f"获取个股历史行情失败: {str(e)}")
     
+    async def get_stock_histories(self, stock_codes: List[str], period: str = "daily",
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            adjust: str = "qfq",
+                            layout: str = "long",
+                            field: str = "close") -> Dict:
+        """
+        批量获取多只股票的历史行情
+        
+        未缓存的股票并发获取，单只股票失败不影响其他股票。
+
+        Args:
+            stock_codes: 股票代码列表
+            period: 周期，可选 daily, weekly, monthly, quarterly, Nd(每N个交易日，如5d)
+            start_date: 开始日期，格式YYYYMMDD
+            end_date: 结束日期，格式YYYYMMDD
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            layout: 输出形式，long为长表，wide为行为交易日、列为股票代码的宽表
+            field: 宽表的取值字段，如close、volume，仅layout为wide时有效
+
+        Returns:
+            Dict: 包含以下字段的字典：
+                - data: List[Dict], 长表或宽表的记录列表
+                - errors: List[Dict], 获取失败的股票代码(key)及错误信息(error)
+        """
+        logger.info(f"MCP批量获取个股历史行情: {len(stock_codes)}只, 周期: {period}, 形式: {layout}")
+        try:
+            # 调用服务层获取数据
+            frames, errors = await self.stock_service.get_stock_history_frames(
+                stock_codes, period, start_date, end_date, adjust
+            )
+            
+            if layout == "wide":
+                frame = self.stock_service.history_panel(frames, field)
+            else:
+                frame = pd.concat(frames.values(), ignore_index=True) if frames else pd.DataFrame()
+            
+            return {
+                "data": frame_to_records(frame),
+                "errors": [{"key": code, "error": error} for code, error in errors.items()]
+            }
+        except Exception as e:
+            logger.error(f"批量获取个股历史行情失败: {str(e)}")
+            raise Exception(f"批量获取个股历史行情失败: {str(e)}")
+    
+    async def get_stock_dossier(self, stock_code: str, sections: Optional[List[str]] = None,
+                                timeout: Optional[float] = None) -> Dict:
+        """
+        获取个股综合信息
+        
+        在服务端并发获取基本信息、实时行情、历史行情、筹码分布、热门关键词和互动易提问，
+        每个部分单独超时，单个部分失败不影响其他部分。
+        
+        Args:
+            stock_code: 股票代码，如"000001"
+            sections: 需要获取的部分，默认为全部，可选 info, quote, history, chip, hot_keywords, questions
+            timeout: 每个部分的超时时间(秒)，默认使用服务端配置
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - code: str, 股票代码
+                - sections: Dict[str, Dict], 各部分的status(ok/error/timeout)、elapsed_ms、error和data
+                - update_time: datetime, 更新时间
+        """
+        logger.info(f"MCP获取个股综合信息: {stock_code}")
+        try:
+            # 调用服务层获取数据
+            dossier = await self.dossier_service.get_stock_dossier(stock_code, sections, timeout)
+            
+            # 将Pydantic模型转换为字典
+            return dossier.model_dump()
+        except Exception as e:
+            logger.error(f"获取个股综合信息失败: {str(e)}")
+            raise Exception(f"获取个股综合信息失败: {str(e)}")
+    
     async def get_stock_financial(self, stock_code: str) -> Dict:
         """
         获取个股财务信息
@@ -1,6 +1,10 @@
 from typing import Dict, List, Optional
 from app.core.logging import get_logger
 from app.services.technical_service import TechnicalService
+from app.services.correlation_service import CorrelationService
+from app.services.backtest_service import BacktestService
+from app.utils.columnar import frame_to_columns
+from app.utils.indicators import parse_indicator_params
 
 logger = get_logger(__name__)
 
@@ -8,7 +12,7 @@ class TechnicalMCP:
     """
     技术指标MCP接口
     
-    本类提供了与技术指标相关的数据查询接口，包括筹码分布等。
+    本类提供了与技术指标相关的数据查询接口，包括筹码分布、MA/MACD/KDJ等技术指标、股票组合相关性和信号规则回测。
     所有接口通过调用服务层实现，共享服务层的数据处理和缓存机制。
     
     使用示例:
@@ -19,6 +23,8 @@ class TechnicalMCP:
     def __init__(self):
         """初始化TechnicalMCP，创建服务实例"""
         self.technical_service = TechnicalService()
+        self.correlation_service = CorrelationService()
+        self.backtest_service = BacktestService()
     
     async def get_chip_distribution(self, symbol: str, adjust: str = "") -> List[Dict]:
         """
@@ -40,4 +46,134 @@ class TechnicalMCP:
             return [chip.model_dump() for chip in chips]
         except Exception as e:
             logger.error(f"获取筹码分布数据失败: {str(e)}")
-            raise Exception(f"获取筹码分布数据失败: {str(e)}")
\ No newline at end of file
+            raise Exception(f"获取筹码分布数据失败: {str(e)}")
+    
+    async def get_chip_distribution_batch(self, symbols: List[str], adjust: str = "") -> Dict:
+        """
+        批量获取多只股票的筹码分布数据
+        
+        未缓存的股票并发获取，单只股票失败不影响其他股票。
+        
+        Args:
+            symbols: 股票代码列表，如["000001", "600000"]
+            adjust: 复权类型，可选值为"qfq"(前复权)、"hfq"(后复权)、""(不复权)，默认为不复权
+            
+        Returns:
+            Dict: 包含以下字段的字典：
+                - data: Dict[str, List], 各股票筹码分布合并后的列式数据，以stock_code区分股票
+                - errors: List[Dict], 获取失败或无数据的股票代码(key)及错误信息(error)
+        """
+        logger.info(f"MCP批量获取股票筹码分布数据: {len(symbols)}只, 复权类型: {adjust}")
+        try:
+            # 调用服务层获取数据
+            frame, errors = await self.technical_service.get_chip_distribution_frame(symbols, adjust)
+            
+            return {
+                "data": frame_to_columns(frame),
+                "errors": [{"key": code, "error": error} for code, error in errors.items()]
+            }
+        except Exception as e:
+            logger.error(f"批量获取筹码分布数据失败: {str(e)}")
+            raise Exception(f"批量获取筹码分布数据失败: {str(e)}")
+    
+    async def get_indicators(
+        self,
+        symbol: str,
+        indicators: Optional[str] = None,
+        period: str = "daily",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq",
+        **periods: str
+    ) -> Dict[str, List]:
+        """
+        计算个股的技术指标
+        
+        Args:
+            symbol: 股票代码，如"000001"
+            indicators: 逗号分隔的技术指标，可选ma、ema、macd、rsi、boll、kdj、atr，默认为全部
+            period: 周期，可选 daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)
+            start_date: 开始日期，格式YYYYMMDD，默认为上一年的1月1日
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            **periods: 各指标的参数，如ma="5,10,20"、macd="12,26,9"、boll="20,2"、atr=14
+            
+        Returns:
+            Dict[str, List]: 列式数据，列为trade_date、stock_code、close和各指标
+        """
+        logger.info(f"MCP计算技术指标: {symbol}, 指标: {indicators or '全部'}")
+        try:
+            params = parse_indicator_params(indicators, **periods)
+            frame = await self.technical_service.get_indicators(symbol, params, period, start_date, end_date, adjust)
+            return frame_to_columns(frame)
+        except Exception as e:
+            logger.error(f"计算技术指标失败: {str(e)}")
+            raise Exception(f"计算技术指标失败: {str(e)}")
+    
+    async def get_correlation(
+        self,
+        codes: List[str],
+        benchmark: str = "000300",
+        window: int = 60,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq",
+        rolling: bool = False
+    ) -> Dict:
+        """
+        计算股票组合的相关系数矩阵、协方差矩阵和相对基准指数的beta
+        
+        Args:
+            codes: 股票代码列表，如["000001", "600000"]
+            benchmark: 基准指数代码，默认为"000300"(沪深300)
+            window: 滚动窗口长度(交易日)，5到250
+            start_date: 开始日期，格式YYYYMMDD，默认取足够计算一个窗口的日期
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            rolling: 是否返回每个交易日的滚动beta和与基准的滚动相关系数
+            
+        Returns:
+            Dict: 相关性结果，矩阵和列表的顺序与codes字段一致，获取失败的股票代码通过errors返回
+        """
+        logger.info(f"MCP计算组合相关性: {len(codes)}只, 基准: {benchmark}, 窗口: {window}")
+        try:
+            entry = await self.correlation_service.get_correlation_entry(
+                codes, benchmark, window, start_date, end_date, adjust, rolling
+            )
+            return entry.value.model_dump()
+        except Exception as e:
+            logger.error(f"计算组合相关性失败: {str(e)}")
+            raise Exception(f"计算组合相关性失败: {str(e)}")
+    
+    async def run_backtest(
+        self,
+        codes: List[str],
+        entry: List[str],
+        exit: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq",
+        fee_rate: float = 0.0003
+    ) -> Dict:
+        """
+        在历史行情上回测简单的信号规则
+        
+        Args:
+            codes: 股票池代码列表，如["000001", "600000"]
+            entry: 入场规则，全部满足时买入，如["ma5 cross_above ma20", "rsi6 < 70"]
+            exit: 离场规则，任一满足时卖出，如["ma5 cross_below ma20"]，为空时入场规则不再满足即卖出
+            start_date: 开始日期，格式YYYYMMDD，默认为上一年的1月1日
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            fee_rate: 单边交易费率
+            
+        Returns:
+            Dict: 组合(equity、statistics)和每只股票(symbols)的净值曲线及统计，获取失败的股票代码通过errors返回
+        """
+        logger.info(f"MCP回测: {len(codes)}只, 入场: {entry}, 离场: {exit}")
+        try:
+            result = await self.backtest_service.run_backtest(codes, entry, exit, start_date, end_date, adjust, fee_rate)
+            return result.model_dump()
+        except Exception as e:
+            logger.error(f"回测失败: {str(e)}")
+            raise Exception(f"回测失败: {str(e)}")
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+class BatchItemError(BaseModel):
+    """批量请求中单个条目的错误信息"""
+    key: str = Field(..., description="出错的条目，如股票代码或板块名称")
+    error: str = Field(..., description="错误信息")
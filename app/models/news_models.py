@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class GlobalFinanceNews(BaseModel):
@@ -33,4 +33,11 @@ class CLSTelegraph(BaseModel):
     content: str = Field(..., description="内容")
     publish_date: str = Field(..., description="发布日期")
     publish_time: str = Field(..., description="发布时间")
-    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
\ No newline at end of file
+    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
+
+class NewsFeedPage(BaseModel):
+    """增量资讯模型"""
+    items: List[Dict[str, Any]] = Field(..., description="资讯条目，按采集顺序排列，每条包含资讯字段及其游标cursor")
+    cursor: str = Field(..., description="最后一条资讯的游标，下次请求通过since参数传入即可只获取之后的新资讯")
+    has_more: bool = Field(..., description="游标之后是否还有未返回的资讯")
+    truncated: bool = Field(False, description="since游标之后的部分资讯已被淘汰或服务已重启，返回的资讯不连续")
\ No newline at end of file
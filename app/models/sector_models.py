@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 from datetime import datetime
+from app.models.common_models import BatchItemError
 
 class ConceptBoard(BaseModel):
     """概念板块模型"""
@@ -101,4 +102,39 @@ class IndustryBoardConstituent(BaseModel):
     turnover_rate: float = Field(..., description="换手率(%)")
     pe_ratio: Optional[float] = Field(None, description="市盈率-动态")
     pb_ratio: Optional[float] = Field(None, description="市净率")
-    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
\ No newline at end of file
+    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
+
+
+class BoardAnalytics(BaseModel):
+    """由成份股行情汇总的板块统计模型"""
+    board_type: Literal["concept", "industry"] = Field(..., description="板块类型")
+    code: str = Field(..., description="板块代码")
+    name: str = Field(..., description="板块名称")
+    constituent_count: int = Field(..., description="成份股数")
+    traded_count: int = Field(..., description="有成交价的成份股数，不含停牌")
+    up_count: int = Field(..., description="上涨家数")
+    down_count: int = Field(..., description="下跌家数")
+    limit_up_count: int = Field(..., description="涨停家数")
+    limit_down_count: int = Field(..., description="跌停家数")
+    close_at_high_count: int = Field(..., description="上涨且最新价为当日最高价的家数")
+    mean_change_percent: Optional[float] = Field(None, description="平均涨跌幅(%)")
+    median_change_percent: Optional[float] = Field(None, description="涨跌幅中位数(%)")
+    weighted_change_percent: Optional[float] = Field(None, description="成交额加权涨跌幅(%)")
+    amount: float = Field(..., description="成份股成交额合计")
+    top_amount_ratio: Optional[float] = Field(None, description="成交额前5只成份股占板块成交额的比例，衡量资金集中度")
+    update_time: datetime = Field(..., description="行情快照时间")
+
+
+class BoardConstituentsBatchRequest(BaseModel):
+    """批量板块成份股请求模型"""
+    concept: List[str] = Field(default_factory=list, description="概念板块名称或代码列表，如['融资融券', 'BK0655']")
+    industry: List[str] = Field(default_factory=list, description="行业板块名称或代码列表，如['小金属', 'BK1027']")
+    layout: Literal["mapping", "long"] = Field("mapping", description="输出形式: mapping(板块到成份股列表的映射), long(带board_type和board列的长表)")
+
+
+class BoardConstituentsBatch(BaseModel):
+    """批量板块成份股模型"""
+    concept: Dict[str, List[ConceptBoardConstituent]] = Field(default_factory=dict, description="概念板块到成份股列表的映射")
+    industry: Dict[str, List[IndustryBoardConstituent]] = Field(default_factory=dict, description="行业板块到成份股列表的映射")
+    errors: List[BatchItemError] = Field(default_factory=list, description="获取失败的板块(板块类型:板块名称)及错误信息")
+
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field  # 添加 Field 的导入
-from typing import Optional, List
+from typing import Any, Dict, Literal, Optional, List
 from datetime import datetime, date
+from app.models.common_models import BatchItemError
 
 class StockInfo(BaseModel):
     """个股基本信息模型"""
@@ -26,10 +27,43 @@ class StockQuote(BaseModel):
     volume: int
     amount: float
     turnover_rate: float
+    volume_ratio: Optional[float] = None
     pe_ratio: Optional[float] = None
     pb_ratio: Optional[float] = None
     market_cap: Optional[float] = None
     update_time: datetime
+
+class StockSpotPoint(BaseModel):
+    """个股行情历史中的一份快照"""
+    update_time: datetime = Field(..., description="快照时间")
+    price: float
+    change: float
+    change_percent: float
+    open: float
+    high: float
+    low: float
+    volume: int
+    amount: float
+    turnover_rate: float
+    volume_ratio: Optional[float] = None
+    pe_ratio: Optional[float] = None
+    pb_ratio: Optional[float] = None
+    market_cap: Optional[float] = None
+
+class StockInfoBatch(BaseModel):
+    """批量个股基本信息模型"""
+    items: List[StockInfo] = Field(..., description="获取成功的个股基本信息，顺序与请求一致")
+    errors: List[BatchItemError] = Field(default_factory=list, description="获取失败的股票代码及错误信息")
+    
+class StockBatchRequest(BaseModel):
+    """批量个股请求模型"""
+    codes: List[str] = Field(..., min_length=1, description="股票代码列表，如[\"000001\", \"600000\"]")
+
+class StockQuoteBatch(BaseModel):
+    """批量实时行情模型，所有行情取自同一份全市场快照"""
+    quotes: List[StockQuote] = Field(..., description="实时行情列表，顺序与请求一致")
+    not_found: List[str] = Field(default_factory=list, description="快照中不存在的股票代码")
+    update_time: datetime = Field(..., description="快照时间")
     
 class StockFinancial(BaseModel):
     """个股财务信息模型"""
@@ -69,4 +103,28 @@ class StockHistory(BaseModel):
     amplitude: float = Field(..., description="振幅(%)")
     change_percent: float = Field(..., description="涨跌幅(%)")
     change_amount: float = Field(..., description="涨跌额(元)")
-    turnover: float = Field(..., description="换手率(%)")
\ No newline at end of file
+    turnover: float = Field(..., description="换手率(%)")
+
+class StockHistoryBatchRequest(BaseModel):
+    """批量历史行情请求模型"""
+    codes: List[str] = Field(..., min_length=1, description="股票代码列表")
+    period: str = Field("daily", description="数据周期: daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)")
+    start_date: Optional[str] = Field(None, description="开始日期，格式YYYYMMDD，如20210101")
+    end_date: Optional[str] = Field(None, description="结束日期，格式YYYYMMDD，如20210630")
+    adjust: Literal["qfq", "hfq", ""] = Field("qfq", description="复权方式: qfq(前复权), hfq(后复权), 空字符串(不复权)")
+    layout: Literal["long", "wide"] = Field("long", description="输出形式: long(长表，每行一只股票一个交易日), wide(宽表，行为交易日、列为股票代码)")
+    field: str = Field("close", description="宽表的取值字段，如close、volume，仅layout为wide时有效")
+
+class DossierSection(BaseModel):
+    """个股综合信息中的单个部分"""
+    status: Literal["ok", "error", "timeout"] = Field(..., description="获取状态: ok(成功), error(失败), timeout(超时)")
+    elapsed_ms: int = Field(..., description="耗时(毫秒)")
+    error: Optional[str] = Field(None, description="错误信息")
+    data: Any = Field(None, description="数据，获取失败或超时时为None")
+
+class StockDossier(BaseModel):
+    """个股综合信息模型"""
+    code: str = Field(..., description="股票代码")
+    sections: Dict[str, DossierSection] = Field(..., description="各部分的数据和获取状态")
+    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
+
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime, date
+from app.models.common_models import BatchItemError
 
 # ... 保留现有的模型 ...
 
@@ -16,4 +17,74 @@ class ChipDistribution(BaseModel):
     cost_70_low: float = Field(..., description="70成本-低")
     cost_70_high: float = Field(..., description="70成本-高")
     concentration_70: float = Field(..., description="70集中度")
-    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
\ No newline at end of file
+    update_time: datetime = Field(default_factory=datetime.now, description="更新时间")
+
+class ChipDistributionBatchRequest(BaseModel):
+    """批量筹码分布请求模型"""
+    codes: List[str] = Field(..., min_length=1, description="股票代码列表，如[\"000001\", \"600000\"]")
+    adjust: Literal["", "qfq", "hfq"] = Field("", description="复权类型: qfq(前复权), hfq(后复权), 空字符串(不复权)")
+
+class CorrelationRequest(BaseModel):
+    """股票组合相关性请求模型"""
+    codes: List[str] = Field(..., min_length=1, description="股票代码列表，如[\"000001\", \"600000\"]")
+    benchmark: str = Field("000300", description="计算beta的基准指数代码，默认为沪深300")
+    window: int = Field(60, ge=5, le=250, description="滚动窗口长度(交易日)")
+    start_date: Optional[str] = Field(None, description="开始日期，格式YYYYMMDD，默认取足够计算一个窗口的日期")
+    end_date: Optional[str] = Field(None, description="结束日期，格式YYYYMMDD，默认为当天")
+    adjust: Literal["", "qfq", "hfq"] = Field("qfq", description="复权方式: qfq(前复权), hfq(后复权), 空字符串(不复权)")
+    rolling: bool = Field(False, description="是否返回每个交易日的滚动beta和与基准的滚动相关系数")
+
+class CorrelationResult(BaseModel):
+    """股票组合相关性模型，矩阵和列表的顺序与codes一致，样本不足时为null"""
+    codes: List[str] = Field(..., description="参与计算的股票代码，顺序与请求一致")
+    benchmark: str = Field(..., description="基准指数代码")
+    window: int = Field(..., description="滚动窗口长度(交易日)")
+    start_date: Optional[str] = Field(None, description="最近一个窗口的第一个交易日")
+    end_date: Optional[str] = Field(None, description="最近一个窗口的最后一个交易日")
+    correlation: List[List[Optional[float]]] = Field(..., description="最近一个窗口日收益率的相关系数矩阵")
+    covariance: List[List[Optional[float]]] = Field(..., description="最近一个窗口日收益率的协方差矩阵")
+    beta: List[Optional[float]] = Field(..., description="最近一个窗口相对基准的beta")
+    benchmark_correlation: List[Optional[float]] = Field(..., description="最近一个窗口与基准的相关系数")
+    rolling_dates: Optional[List[str]] = Field(None, description="滚动序列的交易日，仅rolling为true时返回")
+    rolling_beta: Optional[List[List[Optional[float]]]] = Field(None, description="每个交易日结束的窗口的beta，行为交易日、列为股票")
+    rolling_correlation: Optional[List[List[Optional[float]]]] = Field(None, description="每个交易日结束的窗口与基准的相关系数")
+    errors: List[BatchItemError] = Field(default_factory=list, description="获取历史行情失败的股票代码及错误信息")
+
+
+class BacktestRequest(BaseModel):
+    """回测请求模型"""
+    codes: List[str] = Field(..., min_length=1, description="股票池代码列表，如[\"000001\", \"600000\"]")
+    entry: List[str] = Field(..., min_length=1, description="入场规则，全部满足时买入，如[\"ma5 cross_above ma20\", \"rsi6 < 70\"]")
+    exit: List[str] = Field(default_factory=list, description="离场规则，任一满足时卖出，如[\"ma5 cross_below ma20\"]，为空时入场规则不再满足即卖出")
+    start_date: Optional[str] = Field(None, description="开始日期，格式YYYYMMDD，默认为上一年的1月1日，技术指标从该日开始计算")
+    end_date: Optional[str] = Field(None, description="结束日期，格式YYYYMMDD，默认为当天")
+    adjust: Literal["", "qfq", "hfq"] = Field("qfq", description="复权方式: qfq(前复权), hfq(后复权), 空字符串(不复权)")
+    fee_rate: float = Field(0.0003, ge=0, le=0.01, description="单边交易费率，买入和卖出时分别扣除")
+
+class BacktestStatistics(BaseModel):
+    """回测统计模型"""
+    total_return: float = Field(..., description="累计收益率")
+    annual_return: Optional[float] = Field(None, description="年化收益率(按252个交易日)")
+    annual_volatility: float = Field(..., description="年化波动率")
+    sharpe_ratio: Optional[float] = Field(None, description="夏普比率(无风险利率为0)")
+    max_drawdown: float = Field(..., description="最大回撤，为负数")
+    exposure: float = Field(..., description="平均持仓比例")
+    trade_count: int = Field(..., description="交易次数(买入后卖出或持有至结束为一次)")
+    win_rate: Optional[float] = Field(None, description="盈利交易的比例")
+
+class BacktestSymbolResult(BaseModel):
+    """单只股票的回测结果模型"""
+    code: str = Field(..., description="股票代码")
+    statistics: BacktestStatistics = Field(..., description="该股票的回测统计")
+    equity: List[float] = Field(..., description="该股票的净值曲线，与dates对应，上市或有数据之前为1")
+
+class BacktestResult(BaseModel):
+    """回测结果模型"""
+    codes: List[str] = Field(..., description="参与回测的股票代码，顺序与请求一致")
+    start_date: str = Field(..., description="第一个交易日")
+    end_date: str = Field(..., description="最后一个交易日")
+    dates: List[str] = Field(..., description="净值曲线的交易日")
+    equity: List[float] = Field(..., description="组合净值曲线，每只股票占相同的资金份额，每日再平衡")
+    statistics: BacktestStatistics = Field(..., description="组合的回测统计")
+    symbols: List[BacktestSymbolResult] = Field(..., description="每只股票的回测统计和净值曲线")
+    errors: List[BatchItemError] = Field(default_factory=list, description="获取历史行情失败的股票代码及错误信息")
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from app.models.common_models import BatchItemError
+from app.models.technical_models import BacktestResult, BacktestStatistics, BacktestSymbolResult
+from app.services.stock_service import StockService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.backtest import (
+    BAR_FIELDS, SymbolBacktest, backtest_statistics, parse_rule, rule_indicator_params, simulate_symbols
+)
+from app.utils.concurrency import run_in_process
+
+logger = get_logger(__name__)
+
+
+class BacktestService:
+    """
+    回测服务
+
+    股票池的日K线取自历史行情缓存，每只股票按信号规则向量化模拟持仓，
+    股票数超过BACKTEST_CHUNK_SIZE时按批在进程池中并行模拟，
+    再按交易日对齐汇总为等权组合的净值曲线和统计。
+    """
+
+    def __init__(self):
+        """初始化BacktestService，创建服务实例"""
+        self.stock_service = StockService()
+
+    async def run_backtest(
+        self,
+        codes: List[str],
+        entry: List[str],
+        exit: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq",
+        fee_rate: float = 0.0003
+    ) -> BacktestResult:
+        """
+        运行回测
+
+        Args:
+            codes: 股票池代码列表，可带市场前缀
+            entry: 入场规则，全部满足时买入，如["ma5 cross_above ma20"]
+            exit: 离场规则，任一满足时卖出，为空时入场规则不再满足即卖出
+            start_date: 开始日期，格式YYYYMMDD，默认为上一年的1月1日
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            fee_rate: 单边交易费率
+
+        Returns:
+            BacktestResult: 组合和每只股票的净值曲线及统计
+
+        Raises:
+            ValueError: 规则无效或没有股票获取到历史行情时抛出
+        """
+        entry_rules = [parse_rule(rule) for rule in entry]
+        exit_rules = [parse_rule(rule) for rule in exit or []]
+        params = rule_indicator_params(entry_rules + exit_rules)
+        start_date = start_date or f"{datetime.now().year - 1}0101"
+
+        frames, errors = await self.stock_service.get_stock_history_frames(codes, "daily", start_date, end_date, adjust)
+        if not frames:
+            raise ValueError(f"股票池中没有股票获取到历史行情: {'; '.join(f'{code}: {error}' for code, error in errors.items())}")
+        items = [
+            (code, {field: frame[field].to_numpy(dtype=object if field == "trade_date" else np.float64)
+                    for field in ("trade_date",) + BAR_FIELDS})
+            for code, frame in frames.items()
+        ]
+
+        started = time.perf_counter()
+        size = settings.BACKTEST_CHUNK_SIZE
+        if len(items) <= size:
+            results = simulate_symbols(items, entry_rules, exit_rules, params, fee_rate)
+        else:
+            chunks = await asyncio.gather(*(
+                run_in_process(simulate_symbols, items[i:i + size], entry_rules, exit_rules, params, fee_rate)
+                for i in range(0, len(items), size)
+            ))
+            results = [result for chunk in chunks for result in chunk]
+        logger.info(
+            f"回测: {len(results)}只, 入场: {entry}, 离场: {exit or '入场规则不满足'}, "
+            f"模拟耗时{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return self.portfolio(results, errors)
+
+    @staticmethod
+    def portfolio(results: List[SymbolBacktest], errors: Dict[str, str]) -> BacktestResult:
+        """
+        将各股票的模拟结果按交易日对齐，汇总为等权组合
+
+        每只股票占1/N的资金份额并每日再平衡，没有K线的日期(上市前、停牌)该份额收益为0。
+
+        Args:
+            results: 各股票的模拟结果，按请求顺序排列
+            errors: 获取历史行情失败的股票代码和错误信息
+
+        Returns:
+            BacktestResult: 回测结果
+        """
+        positions, dates = pd.factorize(np.concatenate([result.trade_dates for result in results]), sort=True)
+        returns = np.zeros((len(dates), len(results)))
+        held = np.zeros((len(dates), len(results)))
+        start = 0
+        for i, result in enumerate(results):
+            rows = positions[start:start + len(result.returns)]
+            returns[rows, i] = result.returns
+            held[rows, i] = result.position
+            start += len(result.returns)
+
+        portfolio_returns = returns.mean(axis=1)
+        trade_returns = np.concatenate([result.trade_returns for result in results])
+        symbol_equity = np.cumprod(1 + returns, axis=0).round(6)
+        return BacktestResult.model_construct(
+            codes=[result.code for result in results],
+            start_date=str(dates[0]),
+            end_date=str(dates[-1]),
+            dates=[str(date) for date in dates],
+            equity=np.cumprod(1 + portfolio_returns).round(6).tolist(),
+            statistics=BacktestStatistics(**backtest_statistics(portfolio_returns, float(held.mean()), trade_returns)),
+            symbols=[
+                BacktestSymbolResult.model_construct(
+                    code=result.code,
+                    statistics=BacktestStatistics(**backtest_statistics(
+                        result.returns, float(result.position.mean()), result.trade_returns
+                    )),
+                    equity=symbol_equity[:, i].tolist()
+                )
+                for i, result in enumerate(results)
+            ],
+            errors=[BatchItemError(key=code, error=error) for code, error in errors.items()]
+        )
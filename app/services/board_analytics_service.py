@@ -0,0 +1,279 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.services.stock_service import StockService
+from app.services.sector_service import SectorService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry
+from app.utils.stream import follow_cache_entry
+
+logger = get_logger(__name__)
+
+# 计算资金集中度时取成交额最大的成份股数
+CONCENTRATION_TOP_COUNT = 5
+
+
+@dataclass
+class BoardMembership:
+    """
+    全部板块的成份股构成
+
+    boards每个板块一行(board_type、code、name)，members为所有板块成份股代码的拼接，
+    board_index为每个成份股所属板块在boards中的行号。
+    """
+    boards: pd.DataFrame
+    members: np.ndarray
+    board_index: np.ndarray
+
+    @classmethod
+    def from_frames(cls, boards: pd.DataFrame, frames: Dict[Tuple[str, str], pd.DataFrame]) -> "BoardMembership":
+        """
+        由各板块的成份股构建板块构成
+
+        Args:
+            boards: 板块列表，列为board_type、code和name
+            frames: 以(板块类型, 板块代码)为键的成份股数据，不在其中的板块被去掉
+
+        Returns:
+            BoardMembership: 板块构成
+        """
+        keys = list(zip(boards["board_type"], boards["code"]))
+        found = [key in frames for key in keys]
+        boards = boards[found].reset_index(drop=True)
+        codes = [frames[key]["code"].astype(str).to_numpy() for key, ok in zip(keys, found) if ok]
+        sizes = np.array([len(part) for part in codes], dtype=np.intp)
+        return cls(
+            boards=boards,
+            members=np.concatenate(codes) if codes else np.array([], dtype=object),
+            board_index=np.repeat(np.arange(len(boards), dtype=np.intp), sizes)
+        )
+
+
+def price_limit_ratios(codes: np.ndarray, names: np.ndarray) -> np.ndarray:
+    """
+    股票的涨跌停幅度
+
+    创业板(300、301)和科创板(688、689)为20%，北交所(4、8、92开头)为30%，
+    其余为10%，主板ST股票为5%。不区分新股上市初期等无涨跌幅限制的情况。
+
+    Args:
+        codes: 股票代码
+        names: 股票名称
+
+    Returns:
+        np.ndarray: 涨跌停幅度，如0.1
+    """
+    codes = pd.Series(codes, dtype=str)
+    ratios = np.full(len(codes), 0.10)
+    ratios[pd.Series(names, dtype=str).str.upper().str.contains("ST", regex=False).to_numpy()] = 0.05
+    ratios[codes.str.startswith(("300", "301", "688", "689")).to_numpy()] = 0.20
+    ratios[codes.str.startswith(("4", "8", "92")).to_numpy()] = 0.30
+    return ratios
+
+
+def _limit_move(pre_close: np.ndarray, ratio: np.ndarray) -> np.ndarray:
+    """按昨收价和幅度计算涨跌停的价格变动，四舍五入到分"""
+    return np.floor(pre_close * ratio * 100 + 0.5) / 100
+
+
+def board_analytics(membership: BoardMembership, spot: pd.DataFrame) -> pd.DataFrame:
+    """
+    由全市场行情快照向量化计算全部板块的统计
+
+    所有板块的成份股拼接为一个数组，按所属板块用bincount汇总，
+    中位数和成交额前几名通过按(板块, 值)排序后在每个板块的起始位置上取值得到。
+    停牌(最新价为0)的成份股只计入constituent_count。
+
+    Args:
+        membership: 板块构成
+        spot: 全市场行情快照，列名与StockQuote字段一致
+
+    Returns:
+        pd.DataFrame: 每个板块一行，列名与BoardAnalytics字段一致
+    """
+    n = len(membership.boards)
+    positions = pd.Index(spot["code"]).get_indexer(membership.members)
+    board = membership.board_index[positions >= 0]
+    positions = positions[positions >= 0]
+
+    def column(name: str) -> np.ndarray:
+        return spot[name].to_numpy(dtype=np.float64, na_value=np.nan)[positions]
+
+    price = column("price")
+    traded = price > 0
+    board, positions, price = board[traded], positions[traded], price[traded]
+    change, change_percent, high, amount = column("change"), column("change_percent"), column("high"), column("amount")
+
+    def count(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(board[mask], minlength=n)
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(board, weights=values, minlength=n)
+
+    traded_count = np.bincount(board, minlength=n)
+    pre_close = price - change
+    ratios = price_limit_ratios(spot["code"].to_numpy(), spot["name"].to_numpy())[positions]
+    valid_close = pre_close > 0
+    limit_up = valid_close & (price >= pre_close + _limit_move(pre_close, ratios) - 0.001)
+    limit_down = valid_close & (price <= pre_close - _limit_move(pre_close, ratios) + 0.001)
+
+    amount_total = total(amount)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_change = total(change_percent) / traded_count
+        weighted_change = total(amount * change_percent) / amount_total
+
+    # 每个板块在按板块排序后数组中的起始位置
+    starts = np.concatenate([[0], np.cumsum(traded_count)[:-1]]).astype(np.intp)
+    has_traded = traded_count > 0
+    median_change = np.full(n, np.nan)
+    if len(board):
+        ordered = change_percent[np.lexsort((change_percent, board))]
+        lower = starts + (traded_count - 1) // 2
+        upper = starts + traded_count // 2
+        median_change[has_traded] = (ordered[lower[has_traded]] + ordered[upper[has_traded]]) / 2
+
+    order = np.lexsort((-amount, board))
+    ranks = np.arange(len(order)) - starts[board[order]]
+    top = order[ranks < CONCENTRATION_TOP_COUNT]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        top_ratio = np.bincount(board[top], weights=amount[top], minlength=n) / amount_total
+
+    result = membership.boards[["board_type", "code", "name"]].copy()
+    result["constituent_count"] = np.bincount(membership.board_index, minlength=n)
+    result["traded_count"] = traded_count
+    result["up_count"] = count(change_percent > 0)
+    result["down_count"] = count(change_percent < 0)
+    result["limit_up_count"] = count(limit_up)
+    result["limit_down_count"] = count(limit_down)
+    result["close_at_high_count"] = count((price >= high) & (change > 0))
+    result["mean_change_percent"] = mean_change.round(4)
+    result["median_change_percent"] = median_change.round(4)
+    result["weighted_change_percent"] = weighted_change.round(4)
+    result["amount"] = amount_total
+    result["top_amount_ratio"] = np.where(amount_total > 0, top_ratio, np.nan).round(4)
+    result["update_time"] = spot["update_time"].iloc[0] if not spot.empty else pd.Timestamp.now()
+    return result
+
+
+class BoardAnalyticsService:
+    """
+    板块统计服务
+
+    后台任务每隔BOARD_MEMBERSHIP_EXPIRATION秒通过板块成份股缓存获取全部概念板块和行业板块的构成，
+    并跟随全市场行情快照缓存的刷新，每份快照刷新后用当前构成向量化重新计算全部板块的统计，
+    查询直接返回最近一次的结果。任务在第一次查询时启动，
+    超过BOARD_ANALYTICS_IDLE_TIMEOUT没有查询时停止，之后的查询重新启动。
+    """
+
+    def __init__(self):
+        """初始化BoardAnalyticsService，创建服务实例"""
+        self.stock_service = StockService()
+        self.sector_service = SectorService()
+        self.membership: Optional[BoardMembership] = None
+        self.analytics: Optional[pd.DataFrame] = None
+        self._spot: Optional[pd.DataFrame] = None
+        self._tasks: List[asyncio.Task] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._last_access = time.monotonic()
+
+    def _active(self) -> bool:
+        """最近一次查询后是否仍在BOARD_ANALYTICS_IDLE_TIMEOUT内"""
+        return time.monotonic() - self._last_access < settings.BOARD_ANALYTICS_IDLE_TIMEOUT
+
+    def _stop(self) -> None:
+        """快照跟随任务因空闲结束后停止全部统计任务"""
+        for task in self._tasks:
+            task.cancel()
+        logger.info("板块统计任务空闲停止")
+
+    def _compute(self) -> None:
+        """用当前的板块构成和最新快照重新计算统计"""
+        if self.membership is None or self._spot is None:
+            return
+        started = time.perf_counter()
+        self.analytics = board_analytics(self.membership, self._spot)
+        self._ready.set()
+        logger.debug(
+            f"板块统计更新: {len(self.analytics)}个板块, "
+            f"耗时{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    def _record_spot(self, entry: CacheEntry) -> None:
+        """记录刷新后的快照并重新计算"""
+        self._spot = entry.value
+        self._compute()
+
+    async def _load_membership(self) -> None:
+        """获取全部板块的成份股构成"""
+        concept_boards = await self.sector_service.get_concept_boards()
+        industry_boards = await self.sector_service.get_industry_boards()
+        boards = pd.DataFrame(
+            [("concept", board.code, board.name) for board in concept_boards]
+            + [("industry", board.code, board.name) for board in industry_boards],
+            columns=["board_type", "code", "name"]
+        )
+        frames, _ = await self.sector_service.get_board_constituents_frames(
+            [board.code for board in concept_boards], [board.code for board in industry_boards]
+        )
+        self.membership = BoardMembership.from_frames(boards, frames)
+        logger.info(f"板块统计构成更新: {len(self.membership.boards)}个板块, {len(self.membership.members)}条成份股")
+        self._compute()
+
+    async def _follow_membership(self) -> None:
+        """定期更新板块构成，获取失败时保留上一次的构成"""
+        while True:
+            try:
+                await self._load_membership()
+            except Exception as e:
+                logger.warning(f"板块统计获取板块构成失败: {str(e)}")
+            await asyncio.sleep(settings.BOARD_MEMBERSHIP_EXPIRATION)
+
+    async def _ensure_started(self) -> None:
+        """确保统计任务在当前事件循环中运行，并等待第一次计算完成"""
+        loop = asyncio.get_running_loop()
+        if not self._tasks or any(task.done() for task in self._tasks) or self._tasks[0].get_loop() is not loop:
+            for task in self._tasks:
+                task.cancel()
+            # 停止期间的快照和统计已过期，等待新的快照重新计算，未完成前查询返回尚未完成
+            self._spot = None
+            self.analytics = None
+            self._ready = asyncio.Event()
+            spot_task = asyncio.create_task(follow_cache_entry(
+                self.stock_service.get_spot_frame,
+                self._record_spot,
+                self._active,
+                settings.SPOT_CACHE_EXPIRATION
+            ))
+            self._tasks = [asyncio.create_task(self._follow_membership()), spot_task]
+            spot_task.add_done_callback(lambda _: self._stop() if self._tasks and self._tasks[1] is spot_task else None)
+            logger.info("板块统计任务启动")
+        try:
+            await asyncio.wait_for(self._ready.wait(), settings.BATCH_ITEM_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("板块统计首次计算超时")
+
+    async def get_board_analytics(self, board_type: Optional[str] = None) -> pd.DataFrame:
+        """
+        获取板块统计
+
+        Args:
+            board_type: 板块类型，concept或industry，为None时返回全部板块
+
+        Returns:
+            pd.DataFrame: 每个板块一行，列名与BoardAnalytics字段一致
+
+        Raises:
+            ValueError: 第一次计算尚未完成时抛出
+        """
+        self._last_access = time.monotonic()
+        await self._ensure_started()
+        analytics = self.analytics
+        if analytics is None:
+            raise ValueError("板块统计尚未完成，请稍后重试")
+        if board_type is not None:
+            analytics = analytics[analytics["board_type"] == board_type].reset_index(drop=True)
+        return analytics
@@ -0,0 +1,244 @@
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from app.services.sector_service import SectorService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry
+from app.utils.columnar import frame_to_records
+from app.utils.serialization import dumps
+from app.utils.stream import Broadcaster, follow_cache_entry
+
+logger = get_logger(__name__)
+
+# 支持推送的板块类型
+BOARD_TYPES = ("concept", "industry")
+
+# 判断板块是否变化时比较的字段，不含板块代码和更新时间
+BOARD_DIFF_FIELDS = [
+    "rank", "name", "price", "change", "change_percent", "market_value", "turnover_rate",
+    "up_count", "down_count", "leading_stock", "leading_stock_change_percent",
+]
+
+# 领涨板块的数量
+BOARD_LEADER_COUNT = 10
+
+class BoardStreamService:
+    """
+    板块排行推送服务
+
+    每种板块类型由一个后台任务跟随板块列表缓存的刷新，计算与上一次相比的变化：
+    字段变化的板块(只含变化的字段)、新增和移除的板块、领涨板块的变化以及涨跌家数等市场宽度的变化。
+    每次刷新的消息只编码一次，由所有连接共享；新连接先收到完整快照，之后收到增量。
+    后台任务在第一个关注该板块类型的连接到来时启动，最后一个连接离开后停止。
+    """
+
+    def __init__(self):
+        """初始化BoardStreamService，创建服务实例"""
+        self.sector_service = SectorService()
+        self._fetchers = {
+            "concept": self.sector_service.get_concept_boards,
+            "industry": self.sector_service.get_industry_boards,
+        }
+        # 消息为板块类型和编码后的JSON文本
+        self._broadcaster: Broadcaster[Tuple[str, str]] = Broadcaster()
+        self._watchers: Counter = Counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 各板块类型的最新板块表(以板块代码为索引)和快照消息，快照消息在需要时才编码
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._snapshots: Dict[str, str] = {}
+        self._sequences: Counter = Counter()
+
+    @staticmethod
+    def board_leaders(boards: pd.DataFrame, count: int = BOARD_LEADER_COUNT) -> List[Dict[str, Any]]:
+        """
+        按排名取领涨板块
+
+        Args:
+            boards: 板块表，以板块代码为索引
+            count: 板块数量
+
+        Returns:
+            List[Dict[str, Any]]: 领涨板块的代码、名称和涨跌幅，按排名排列
+        """
+        leaders = boards.nsmallest(count, "rank")[["name", "change_percent"]].reset_index()
+        return frame_to_records(leaders)
+
+    @staticmethod
+    def board_breadth(boards: pd.DataFrame) -> Dict[str, int]:
+        """
+        统计市场宽度
+
+        Args:
+            boards: 板块表
+
+        Returns:
+            Dict[str, int]: 上涨、下跌板块数及各板块上涨、下跌家数的合计
+        """
+        return {
+            "boards_up": int((boards["change_percent"] > 0).sum()),
+            "boards_down": int((boards["change_percent"] < 0).sum()),
+            "stocks_up": int(boards["up_count"].sum()),
+            "stocks_down": int(boards["down_count"].sum()),
+        }
+
+    @classmethod
+    def diff_boards(cls, previous: pd.DataFrame, current: pd.DataFrame) -> Dict[str, Any]:
+        """
+        计算两次板块表之间的变化
+
+        Args:
+            previous: 上一次的板块表，以板块代码为索引
+            current: 当前的板块表，以板块代码为索引
+
+        Returns:
+            Dict[str, Any]: 变化内容，没有变化的部分不包含在内：
+                - changed: 字段变化的板块，每项包含code和变化后的字段值
+                - added: 新增板块的完整数据
+                - removed: 移除的板块代码
+                - leaders: 领涨板块或其排名顺序有变化时为新的领涨板块
+                - breadth: 市场宽度有变化时为新的市场宽度
+        """
+        diff: Dict[str, Any] = {}
+
+        common = current.index.intersection(previous.index)
+        before = previous.loc[common, BOARD_DIFF_FIELDS]
+        after = current.loc[common, BOARD_DIFF_FIELDS]
+        changed_mask = ~((after == before) | (after.isna() & before.isna()))
+        rows = changed_mask.any(axis=1).to_numpy()
+        if rows.any():
+            fields = np.array(BOARD_DIFF_FIELDS)
+            values = after[rows].astype(object).where(after[rows].notna(), None).to_numpy()
+            diff["changed"] = [
+                {"code": code, **dict(zip(fields[mask], row[mask]))}
+                for code, row, mask in zip(after.index[rows], values, changed_mask[rows].to_numpy())
+            ]
+
+        added = current.index.difference(previous.index)
+        if len(added):
+            diff["added"] = frame_to_records(current.loc[added].reset_index())
+        removed = previous.index.difference(current.index)
+        if len(removed):
+            diff["removed"] = removed.tolist()
+
+        leaders = cls.board_leaders(current)
+        if [leader["code"] for leader in leaders] != [leader["code"] for leader in cls.board_leaders(previous)]:
+            diff["leaders"] = leaders
+        breadth = cls.board_breadth(current)
+        if breadth != cls.board_breadth(previous):
+            diff["breadth"] = breadth
+        return diff
+
+    def _apply_boards(self, board_type: str, entry: CacheEntry) -> None:
+        """用刷新后的板块表更新状态，并向连接发布增量"""
+        frame = entry.as_frame()
+        if frame.empty:
+            return
+        current = frame.set_index("code")
+        previous = self._frames.get(board_type)
+        self._frames[board_type] = current
+        self._snapshots.pop(board_type, None)
+
+        if previous is None:
+            # 第一次获取，已连接的客户端尚未收到快照
+            self._sequences[board_type] += 1
+            self._broadcaster.publish((board_type, self._snapshot(board_type)))
+            return
+
+        diff = self.diff_boards(previous, current)
+        if not diff:
+            return
+        self._sequences[board_type] += 1
+        message = dumps({
+            "type": "diff",
+            "board_type": board_type,
+            "seq": self._sequences[board_type],
+            "update_time": frame["update_time"].iloc[0],
+            **diff,
+        }).decode()
+        dropped = self._broadcaster.publish((board_type, message))
+        logger.debug(f"板块推送{board_type}第{self._sequences[board_type]}次刷新: 变化{len(diff.get('changed', []))}个板块")
+        if dropped:
+            logger.warning(f"板块推送断开{dropped}个积压的连接")
+
+    def _snapshot(self, board_type: str) -> str:
+        """编码板块类型的完整快照消息"""
+        if board_type not in self._snapshots:
+            boards = self._frames[board_type]
+            self._snapshots[board_type] = dumps({
+                "type": "snapshot",
+                "board_type": board_type,
+                "seq": self._sequences[board_type],
+                "update_time": boards["update_time"].iloc[0],
+                "boards": frame_to_records(boards.reset_index()),
+                "leaders": self.board_leaders(boards),
+                "breadth": self.board_breadth(boards),
+            }).decode()
+        return self._snapshots[board_type]
+
+    async def _poll(self, board_type: str) -> None:
+        """后台跟随板块列表缓存的刷新"""
+        logger.info(f"板块推送{board_type}任务启动")
+        try:
+            await follow_cache_entry(
+                self._fetchers[board_type],
+                lambda entry: self._apply_boards(board_type, entry),
+                lambda: self._watchers[board_type] > 0,
+                settings.BOARD_CACHE_EXPIRATION
+            )
+        finally:
+            # 没有连接后不再更新，清除状态以免下一个连接收到过期的快照
+            self._frames.pop(board_type, None)
+            self._snapshots.pop(board_type, None)
+            logger.info(f"板块推送{board_type}任务停止")
+
+    async def stream(self, board_types: List[str]) -> AsyncIterator[str]:
+        """
+        订阅板块排行的变化
+
+        每种板块类型先产出snapshot消息(包含完整板块表、领涨板块和市场宽度)，
+        之后每次板块列表刷新时产出diff消息，只包含变化的部分。消息中的seq为该板块类型的消息序号，
+        diff的seq比上一条消息大1，可据此发现遗漏。消费过慢的连接被关闭后迭代结束，客户端重连后重新获得snapshot。
+
+        Args:
+            board_types: 板块类型列表，可选concept(概念板块)、industry(行业板块)
+
+        Yields:
+            str: JSON编码的消息
+
+        Raises:
+            ValueError: 板块类型不支持时抛出
+        """
+        unknown = [board_type for board_type in board_types if board_type not in BOARD_TYPES]
+        if unknown:
+            raise ValueError(f"不支持的板块类型: {', '.join(unknown)}")
+        board_types = list(dict.fromkeys(board_types))
+
+        subscription = self._broadcaster.subscribe()
+        for board_type in board_types:
+            self._watchers[board_type] += 1
+            task = self._tasks.get(board_type)
+            if task is None or task.done():
+                self._tasks[board_type] = asyncio.create_task(self._poll(board_type))
+        logger.info(f"板块推送新增连接: {', '.join(board_types)}, 连接数{len(self._broadcaster)}")
+
+        try:
+            # 已有数据的板块类型立即发送快照，其余在第一次获取完成后随广播收到快照
+            for board_type in board_types:
+                if board_type in self._frames:
+                    yield self._snapshot(board_type)
+
+            while True:
+                message = await subscription.get()
+                if message is None:
+                    return
+                board_type, text = message
+                if board_type in board_types:
+                    yield text
+        finally:
+            self._broadcaster.unsubscribe(subscription)
+            for board_type in board_types:
+                self._watchers[board_type] -= 1
+            logger.info(f"板块推送连接断开, 连接数{len(self._broadcaster)}")
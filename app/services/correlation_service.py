@@ -0,0 +1,231 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.models.common_models import BatchItemError
+from app.models.technical_models import CorrelationResult
+from app.services.stock_service import StockService
+from app.services.index_service import IndexService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry
+from app.utils.serialization import dumps
+from app.utils.symbols import normalize_stock_code
+
+logger = get_logger(__name__)
+
+# 组合相关性结果，键为组合及参数的哈希，按LRU顺序保存
+_correlation_cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+
+def _min_count(window: int) -> int:
+    """窗口内计算协方差所需的最少成对样本数"""
+    return max(2, window // 2)
+
+
+def window_covariance(returns: np.ndarray, min_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算收益率的协方差矩阵和相关系数矩阵，成对剔除缺失值
+
+    缺失值置0后用矩阵乘法一次得到每对股票在共同有效交易日上的样本数、和与平方和，
+    结果与逐对剔除缺失值后计算一致。
+
+    Args:
+        returns: 以交易日为行、股票为列的收益率，停牌等缺失为NaN
+        min_count: 最少成对样本数，不足时结果为NaN
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 协方差矩阵和相关系数矩阵
+    """
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype(np.float64)
+    n = m.T @ m
+    # sx[i, j]为股票i在i、j均有效的交易日上的收益率之和
+    sx = x.T @ m
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = (sxy - sx * sx.T / n) / (n - 1)
+        variance = (sxx - sx * sx / n) / (n - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+    insufficient = n < min_count
+    covariance[insufficient] = np.nan
+    correlation[insufficient] = np.nan
+    return covariance, np.clip(correlation, -1.0, 1.0)
+
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int, min_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每只股票相对基准的滚动beta和滚动相关系数
+
+    以累积和相减得到所有窗口的样本数、和与乘积和，不逐窗口循环。
+
+    Args:
+        returns: 以交易日为行、股票为列的收益率，缺失为NaN
+        benchmark: 基准收益率，长度与returns的行数一致
+        window: 窗口长度
+        min_count: 窗口内最少有效样本数，不足时结果为NaN
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: beta和相关系数，行为以每个交易日结束的窗口(共T-window+1个)
+    """
+    valid = ~np.isnan(returns) & ~np.isnan(benchmark)[:, None]
+    m = valid.astype(np.float64)
+    x = np.where(valid, returns, 0.0)
+    b = np.where(valid, np.nan_to_num(benchmark)[:, None], 0.0)
+
+    def window_sum(values: np.ndarray) -> np.ndarray:
+        total = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        return total[window:] - total[:-window]
+
+    n, sx, sb = window_sum(m), window_sum(x), window_sum(b)
+    sxx, sbb, sxb = window_sum(x * x), window_sum(b * b), window_sum(x * b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = sxb - sx * sb / n
+        variance_x = sxx - sx * sx / n
+        variance_b = sbb - sb * sb / n
+        beta = covariance / variance_b
+        correlation = np.clip(covariance / np.sqrt(variance_x * variance_b), -1.0, 1.0)
+    beta[n < min_count] = np.nan
+    correlation[n < min_count] = np.nan
+    return beta, correlation
+
+
+class CorrelationService:
+    """
+    股票组合相关性服务
+
+    组合中各股票和基准指数的日K线取自历史行情缓存，按基准指数的交易日对齐后计算日收益率，
+    再以NumPy矩阵运算一次得到最近一个窗口的相关系数矩阵、协方差矩阵和各股票相对基准的(滚动)beta。
+    结果及其JSON编码按组合和参数的哈希缓存CACHE_EXPIRATION秒。
+    """
+
+    def __init__(self):
+        """初始化CorrelationService，创建服务实例"""
+        self.stock_service = StockService()
+        self.index_service = IndexService()
+
+    @staticmethod
+    def basket_key(codes: List[str], *params) -> str:
+        """组合及参数的哈希"""
+        raw = "|".join([",".join(codes)] + [str(param) for param in params])
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    async def get_correlation_entry(
+        self,
+        codes: List[str],
+        benchmark: str = "000300",
+        window: int = 60,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq",
+        rolling: bool = False
+    ) -> CacheEntry:
+        """
+        计算股票组合的相关性，返回包含结果及其JSON编码的缓存项
+
+        Args:
+            codes: 股票代码列表，可带市场前缀，重复的代码只计算一次
+            benchmark: 基准指数代码，如"000300"
+            window: 滚动窗口长度(交易日)
+            start_date: 开始日期，格式YYYYMMDD，默认为结束日期前window*2+20天
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            rolling: 是否计算每个交易日的滚动beta和滚动相关系数
+
+        Returns:
+            CacheEntry: 值为CorrelationResult的缓存项
+
+        Raises:
+            ValueError: 基准指数行情获取失败、没有股票获取成功或交易日少于窗口长度时抛出
+        """
+        codes = list(dict.fromkeys(normalize_stock_code(code) for code in codes))
+        end = datetime.strptime(end_date, "%Y%m%d") if end_date else datetime.now()
+        end_date = end.strftime("%Y%m%d")
+        start_date = start_date or (end - timedelta(days=window * 2 + 20)).strftime("%Y%m%d")
+
+        key = self.basket_key(codes, benchmark, window, start_date, end_date, adjust, rolling)
+        entry = _correlation_cache.get(key)
+        if entry is not None and entry.expire_at > time.time():
+            _correlation_cache.move_to_end(key)
+            return entry
+
+        index_history = await self.index_service.get_index_history_frame(benchmark, start_date, end_date)
+        frames, errors = await self.stock_service.get_stock_history_frames(codes, "daily", start_date, end_date, adjust)
+        if not frames:
+            raise ValueError(f"组合中没有股票获取到历史行情: {'; '.join(f'{code}: {error}' for code, error in errors.items())}")
+
+        started = time.perf_counter()
+        result = self.compute(frames, index_history, benchmark, window, rolling)
+        result.errors = [BatchItemError(key=code, error=error) for code, error in errors.items()]
+        # 结果由model_construct构造，字段已是列表，直接编码字段字典，跳过Pydantic序列化
+        entry = CacheEntry(value=result, payload=dumps(dict(result)), expire_at=time.time() + settings.CACHE_EXPIRATION)
+        logger.info(
+            f"计算组合相关性: {len(result.codes)}只, 基准: {benchmark}, 窗口: {window}, "
+            f"耗时{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+        _correlation_cache[key] = entry
+        _correlation_cache.move_to_end(key)
+        while len(_correlation_cache) > settings.CORRELATION_CACHE_MAX_ENTRIES:
+            _correlation_cache.popitem(last=False)
+        return entry
+
+    def compute(
+        self,
+        frames: "dict[str, pd.DataFrame]",
+        index_history: pd.DataFrame,
+        benchmark: str,
+        window: int,
+        rolling: bool = False
+    ) -> CorrelationResult:
+        """
+        由各股票和基准指数的日K线计算相关性
+
+        Args:
+            frames: 股票代码到日K线的映射，按请求顺序排列
+            index_history: 基准指数日K线
+            benchmark: 基准指数代码
+            window: 滚动窗口长度(交易日)
+            rolling: 是否返回滚动序列
+
+        Returns:
+            CorrelationResult: 相关性结果，不含errors
+
+        Raises:
+            ValueError: 交易日少于窗口长度时抛出
+        """
+        dates = index_history["trade_date"].to_numpy()
+        closes = self.stock_service.history_panel(frames, "close").set_index("trade_date").reindex(dates)
+        codes = list(closes.columns)
+        prices = closes.to_numpy(dtype=np.float64)
+        index_prices = index_history["close"].to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = prices[1:] / prices[:-1] - 1
+            index_returns = index_prices[1:] / index_prices[:-1] - 1
+        if len(returns) < window:
+            raise ValueError(f"只有{len(returns)}个交易日的收益率，少于窗口长度{window}，请提前开始日期")
+
+        min_count = _min_count(window)
+        covariance, correlation = window_covariance(returns[-window:], min_count)
+        betas, correlations = rolling_beta(returns, index_returns, window, min_count)
+        return_dates = dates[1:]
+        return CorrelationResult.model_construct(
+            codes=codes,
+            benchmark=benchmark,
+            window=window,
+            start_date=str(return_dates[-window]),
+            end_date=str(return_dates[-1]),
+            correlation=correlation.round(6).tolist(),
+            covariance=covariance.tolist(),
+            beta=betas[-1].round(6).tolist(),
+            benchmark_correlation=correlations[-1].round(6).tolist(),
+            rolling_dates=[str(date) for date in return_dates[window - 1:]] if rolling else None,
+            rolling_beta=betas.round(6).tolist() if rolling else None,
+            rolling_correlation=correlations.round(6).tolist() if rolling else None,
+            errors=[]
+        )
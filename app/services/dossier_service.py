@@ -0,0 +1,101 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.models.stock_models import DossierSection, StockDossier
+from app.services.stock_service import StockService
+from app.services.technical_service import TechnicalService
+from app.services.sentiment_service import SentimentService
+from app.services.news_service import NewsService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.symbols import normalize_stock_code
+
+logger = get_logger(__name__)
+
+# 个股综合信息包含的部分，按输出顺序排列
+DOSSIER_SECTIONS = ("info", "quote", "history", "chip", "hot_keywords", "questions")
+
+class DossierService:
+    """
+    个股综合信息服务
+    
+    将个股详情页所需的基本信息、实时行情、历史行情、筹码分布、热门关键词和互动易提问
+    在服务端并发获取，每个部分单独超时，返回已完成的部分及各部分的状态。
+    """
+    
+    def __init__(self):
+        """初始化DossierService，创建各服务实例"""
+        self.stock_service = StockService()
+        self.technical_service = TechnicalService()
+        self.sentiment_service = SentimentService()
+        self.news_service = NewsService()
+    
+    def _section_fetchers(self, stock_code: str) -> Dict[str, Callable[[], Awaitable]]:
+        """各部分的获取函数"""
+        # 历史行情默认取最近30天，与单只股票历史行情接口的默认范围一致
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)
+        return {
+            "info": lambda: self.stock_service.get_stock_info(stock_code),
+            "quote": lambda: self.stock_service.get_stock_quote(stock_code),
+            "history": lambda: self.stock_service.get_stock_history(
+                stock_code, "daily", start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d")
+            ),
+            "chip": lambda: self.technical_service.get_chip_distribution(stock_code),
+            "hot_keywords": lambda: self.sentiment_service.get_stock_hot_keywords(stock_code),
+            "questions": lambda: self.news_service.get_interactive_questions(stock_code),
+        }
+    
+    async def get_stock_dossier(
+        self,
+        stock_code: str,
+        sections: Optional[List[str]] = None,
+        timeout: Optional[float] = None
+    ) -> StockDossier:
+        """
+        获取个股综合信息
+        
+        各部分并发获取，总耗时约等于最慢部分的耗时，单个部分失败或超时不影响其他部分。
+        超时的部分在后台继续执行，结果写入缓存，下次请求可直接命中。
+        
+        Args:
+            stock_code: 股票代码，如"000001"，可带市场前缀
+            sections: 需要获取的部分，默认为全部，可选值见DOSSIER_SECTIONS
+            timeout: 每个部分的超时时间(秒)，默认使用DOSSIER_SECTION_TIMEOUT
+            
+        Returns:
+            StockDossier: 各部分的数据和获取状态
+            
+        Raises:
+            ValueError: 指定了不存在的部分时抛出
+        """
+        stock_code = normalize_stock_code(stock_code)
+        sections = list(dict.fromkeys(sections or DOSSIER_SECTIONS))
+        unknown = [name for name in sections if name not in DOSSIER_SECTIONS]
+        if unknown:
+            raise ValueError(f"未知的部分: {', '.join(unknown)}，可选: {', '.join(DOSSIER_SECTIONS)}")
+        timeout = timeout or settings.DOSSIER_SECTION_TIMEOUT
+        logger.info(f"获取个股综合信息: {stock_code}, 部分: {', '.join(sections)}")
+        
+        fetchers = self._section_fetchers(stock_code)
+        
+        async def run(name: str) -> DossierSection:
+            started = time.perf_counter()
+            task = asyncio.ensure_future(fetchers[name]())
+            try:
+                data = await asyncio.wait_for(asyncio.shield(task), timeout)
+                status, error = "ok", None
+            except asyncio.TimeoutError:
+                # 超时后任务继续执行，取走其异常以免产生未处理异常的警告
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                data, status, error = None, "timeout", f"获取超时({timeout}秒)"
+            except Exception as e:
+                data, status, error = None, "error", str(e)
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            if status != "ok":
+                logger.warning(f"获取个股综合信息 {stock_code} 的 {name} 部分失败: {error}")
+            return DossierSection(status=status, elapsed_ms=elapsed_ms, error=error, data=data)
+        
+        results = await asyncio.gather(*(run(name) for name in sections))
+        return StockDossier(code=stock_code, sections=dict(zip(sections, results)))
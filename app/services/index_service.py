@@ -6,6 +6,9 @@ from app.models.index_models import IndexQuote
 from app.utils.akshare_wrapper import handle_akshare_exception
 from app.core.logging import get_logger
 from app.utils.cache import cache_result
+from app.utils.columnar import rename_columns, numeric_column, date_column
+from app.utils.concurrency import run_sync
+from app.services.stock_service import HISTORY_COLUMNS
 
 logger = get_logger(__name__)
 
@@ -99,4 +102,40 @@ class IndexService:
                 continue
         
         logger.warning(f"未找到指数代码 {index_code} 的实时行情数据")
-        return None
\ No newline at end of file
+        return None
+    
+    @cache_result()
+    @handle_akshare_exception
+    async def get_index_history_frame(self, index_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        获取指数日K线(DataFrame)
+        
+        Args:
+            index_code: 指数代码，如"000300"(沪深300)，可带市场前缀
+            start_date: 开始日期，格式YYYYMMDD
+            end_date: 结束日期，格式YYYYMMDD
+            
+        Returns:
+            pd.DataFrame: 按日期升序排列的日K线，第一列为index_code，其余列名与StockHistory字段一致
+            
+        Raises:
+            ValueError: 未获取到数据时抛出
+        """
+        logger.info(f"获取指数日K线: {index_code}, 开始日期: {start_date}, 结束日期: {end_date}")
+        if index_code.lower().startswith(("sh", "sz")):
+            index_code = index_code[2:]
+        
+        # 调用AKShare接口获取指数历史行情，在线程池中执行以便与个股历史行情并发获取
+        df = await run_sync(
+            ak.index_zh_a_hist, symbol=index_code, period="daily", start_date=start_date, end_date=end_date
+        )
+        if df.empty:
+            logger.warning(f"未找到指数代码 {index_code} 的历史行情数据")
+            raise ValueError(f"未找到指数代码 {index_code} 的历史行情数据")
+        
+        frame = rename_columns(df, HISTORY_COLUMNS)
+        frame["trade_date"] = date_column(frame["trade_date"])
+        for column in list(HISTORY_COLUMNS.values())[1:]:
+            frame[column] = numeric_column(frame[column])
+        frame.insert(0, "index_code", index_code)
+        return frame
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.services.stock_service import StockService
+from app.services.index_service import IndexService
+from app.services.sector_service import SectorService
+from app.services.screener_service import top_positions
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry, get_cache_entry
+from app.utils.columnar import frame_to_records
+from app.utils.serialization import dumps
+from app.utils.stream import follow_cache_entry
+
+logger = get_logger(__name__)
+
+# 排行类型
+MoverRanking = Literal["gainers", "losers", "turnover", "amount", "volume_ratio"]
+
+# 排行类型对应的排序字段和是否升序
+MOVER_RANKINGS: Dict[str, Tuple[str, bool]] = {
+    "gainers": ("change_percent", False),   # 涨幅榜
+    "losers": ("change_percent", True),     # 跌幅榜
+    "turnover": ("turnover_rate", False),   # 换手率榜
+    "amount": ("amount", False),            # 成交额榜
+    "volume_ratio": ("volume_ratio", False),  # 量比榜
+}
+
+
+@dataclass
+class MoverTable:
+    """一份快照上预先计算的各排行，每条记录已编码为JSON字节"""
+    entry: CacheEntry
+    size: int
+    rankings: Dict[str, List[bytes]]
+
+    @classmethod
+    def build(cls, entry: CacheEntry, count: int) -> "MoverTable":
+        """
+        在快照上计算各排行的前count条
+
+        每个排行用argpartition部分排序，排序字段为空的行不参与排行，
+        出现在多个排行中的行只编码一次。
+
+        Args:
+            entry: 快照的缓存项，值为DataFrame或数据模型列表
+            count: 每个排行保留的条目数
+
+        Returns:
+            MoverTable: 预先计算的排行
+        """
+        frame = entry.as_frame()
+        orders = {}
+        for ranking, (name, ascending) in MOVER_RANKINGS.items():
+            if name not in frame.columns:
+                continue
+            keys = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = np.flatnonzero(~np.isnan(keys))
+            if len(valid):
+                orders[ranking] = valid[top_positions(keys[valid], count, ascending)]
+
+        positions = np.unique(np.concatenate(list(orders.values()))) if orders else np.array([], dtype=np.intp)
+        encoded = dict(zip(positions.tolist(), map(dumps, frame_to_records(frame.iloc[positions]))))
+        rankings = {ranking: [encoded[p] for p in order.tolist()] for ranking, order in orders.items()}
+        return cls(entry=entry, size=len(frame), rankings=rankings)
+
+    def payload(self, ranking: str, limit: int) -> bytes:
+        """
+        排行前limit条的JSON数组
+
+        Args:
+            ranking: 排行类型
+            limit: 条目数，不超过预先计算的条目数
+
+        Returns:
+            bytes: JSON数组
+
+        Raises:
+            ValueError: 快照中没有该排行的排序字段时抛出
+        """
+        records = self.rankings.get(ranking)
+        if records is None:
+            raise ValueError(f"该行情数据不支持{ranking}排行，支持: {', '.join(self.rankings)}")
+        return b"[" + b",".join(records[:limit]) + b"]"
+
+
+@dataclass
+class MoverFeed:
+    """跟随一份快照缓存刷新的排行"""
+    table: MoverTable
+    task: Optional[asyncio.Task] = None
+    last_access: float = field(default_factory=time.monotonic)
+
+    def active(self) -> bool:
+        """最近一次请求后是否仍在MOVERS_IDLE_TIMEOUT内"""
+        return time.monotonic() - self.last_access < settings.MOVERS_IDLE_TIMEOUT
+
+
+class MoversService:
+    """
+    行情排行服务
+
+    提供全市场、指数类别和板块成份股的涨幅榜、跌幅榜、换手率榜、成交额榜和量比榜。
+    每个数据源在第一次请求时计算排行，并启动后台任务跟随快照缓存的刷新重新计算，
+    之后的请求直接截取预先编码的字节，不排序、不访问上游；
+    超过MOVERS_IDLE_TIMEOUT没有请求时后台任务停止。
+    """
+
+    def __init__(self):
+        """初始化MoversService，创建服务实例"""
+        self.stock_service = StockService()
+        self.index_service = IndexService()
+        self.sector_service = SectorService()
+        self._feeds: Dict[tuple, MoverFeed] = {}
+        # 正在计算第一份排行的数据源，同一数据源的并发请求等待同一个任务，只启动一个跟随任务
+        self._starting: Dict[tuple, asyncio.Task] = {}
+
+    def _refresh(self, feed: MoverFeed, entry: CacheEntry) -> None:
+        """快照刷新后重新计算排行"""
+        if entry.etag != feed.table.entry.etag:
+            feed.table = MoverTable.build(entry, settings.MOVERS_TOP_COUNT)
+
+    async def _get_table(self, key: tuple, method: Callable, args: tuple, interval: float) -> MoverTable:
+        """
+        获取数据源当前的排行，必要时计算第一份排行并启动跟随任务
+
+        Args:
+            key: 数据源标识
+            method: 返回快照的服务方法
+            args: 服务方法的调用参数
+            interval: 跟随任务获取失败时的重试间隔(秒)
+
+        Returns:
+            MoverTable: 预先计算的排行
+        """
+        loop = asyncio.get_running_loop()
+        feed = self._feeds.get(key)
+        if feed is None or feed.task is None or feed.task.done() or feed.task.get_loop() is not loop:
+            starting = self._starting.get(key)
+            if starting is None or starting.get_loop() is not loop:
+                starting = asyncio.create_task(self._start_feed(key, method, args, interval))
+                starting.add_done_callback(
+                    lambda _: self._starting.pop(key, None) if self._starting.get(key) is starting else None
+                )
+                self._starting[key] = starting
+            # 某个请求被取消时不取消其他请求等待的任务
+            feed = await asyncio.shield(starting)
+        feed.last_access = time.monotonic()
+        return feed.table
+
+    async def _start_feed(self, key: tuple, method: Callable, args: tuple, interval: float) -> MoverFeed:
+        """计算数据源的第一份排行并启动跟随任务，参数同_get_table"""
+        entry = await get_cache_entry(method, *args)
+        feed = MoverFeed(table=MoverTable.build(entry, settings.MOVERS_TOP_COUNT))
+        feed.task = asyncio.create_task(follow_cache_entry(
+            method, lambda entry: self._refresh(feed, entry), feed.active, interval, args
+        ))
+        feed.task.add_done_callback(lambda _: self._feeds.pop(key, None) if self._feeds.get(key) is feed else None)
+        self._feeds[key] = feed
+        logger.info(f"行情排行跟随任务启动: {key}")
+        return feed
+
+    async def get_market_movers(self) -> MoverTable:
+        """获取全市场行情排行"""
+        return await self._get_table(
+            ("market",), self.stock_service.get_spot_frame, (), settings.SPOT_CACHE_EXPIRATION
+        )
+
+    async def get_index_movers(self, symbol: str = "沪深重要指数") -> MoverTable:
+        """
+        获取指数类别内的行情排行
+
+        Args:
+            symbol: 指数类型，如"沪深重要指数"
+
+        Returns:
+            MoverTable: 预先计算的排行，指数行情没有换手率榜
+        """
+        return await self._get_table(
+            ("index", symbol), self.index_service.get_index_quotes, (symbol,), settings.CACHE_EXPIRATION
+        )
+
+    async def get_board_movers(self, board_type: str, symbol: str) -> MoverTable:
+        """
+        获取板块成份股的行情排行
+
+        Args:
+            board_type: 板块类型，concept或industry
+            symbol: 板块名称或代码，如"融资融券"或"BK0655"
+
+        Returns:
+            MoverTable: 预先计算的排行，成份股行情没有量比榜
+        """
+        if board_type == "concept":
+            method = self.sector_service.get_concept_board_constituents_frame
+        else:
+            method = self.sector_service.get_industry_board_constituents_frame
+        return await self._get_table((board_type, symbol), method, (symbol,), settings.CACHE_EXPIRATION)
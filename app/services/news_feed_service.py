@@ -0,0 +1,257 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from app.models.news_models import NewsFeedPage
+from app.services.news_service import NewsService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry
+from app.utils.serialization import dumps
+from app.utils.stream import SSE_HEARTBEAT, Broadcaster, follow_cache_entry, sse_event
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class FeedItem:
+    """已采集的资讯条目"""
+    seq: int
+    record: Dict[str, Any]
+    payload: bytes
+
+
+class NewsFeed:
+    """
+    单个资讯源的增量存储
+
+    按内容哈希去重，新资讯按发布时间排序后分配递增的序号，最多保留NEWS_FEED_MAX_ITEMS条。
+    游标形如"纪元:序号"，纪元在服务启动时生成，服务重启后旧游标可被识别为失效。
+    """
+
+    def __init__(self, name: str, fetch: Callable, args: tuple, order_fields: Tuple[str, ...]):
+        """
+        Args:
+            name: 资讯源名称
+            fetch: 获取资讯列表的服务方法，由cache_result装饰
+            args: 服务方法的调用参数
+            order_fields: 排序新资讯时使用的发布时间字段
+        """
+        self.name = name
+        self.fetch = fetch
+        self.args = args
+        self.order_fields = order_fields
+        self.epoch = format(int(time.time()), "x")
+        self.seq = 0
+        self.items: List[FeedItem] = []
+        self.broadcaster: Broadcaster[List[FeedItem]] = Broadcaster()
+        self.task: Optional[asyncio.Task] = None
+        self.ready: Optional[asyncio.Event] = None
+        # 已见过的内容哈希，比保留的条目多保留一倍，避免被淘汰的资讯仍在上游列表中时被重复采集
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+
+    def cursor(self, seq: int) -> str:
+        """序号对应的游标"""
+        return f"{self.epoch}:{seq}"
+
+    def parse_cursor(self, cursor: str) -> Optional[int]:
+        """
+        解析游标
+
+        Returns:
+            Optional[int]: 游标对应的序号，游标属于服务重启前的纪元时返回None
+
+        Raises:
+            ValueError: 游标格式错误时抛出
+        """
+        epoch, _, seq = cursor.partition(":")
+        if not epoch or not seq.isdigit():
+            raise ValueError(f"无效的游标: {cursor}")
+        return int(seq) if epoch == self.epoch else None
+
+    def ingest(self, entry: CacheEntry) -> List[FeedItem]:
+        """采集资讯列表中的新资讯，返回新增的条目"""
+        fresh = []
+        for news in entry.value:
+            record = news.model_dump()
+            # 更新时间是获取时间，每次获取都不同，不参与去重
+            digest = hashlib.blake2b(
+                dumps({key: value for key, value in record.items() if key != "update_time"}),
+                digest_size=16
+            ).hexdigest()
+            if digest in self._seen:
+                continue
+            self._seen[digest] = None
+            fresh.append(record)
+        if not fresh:
+            return []
+
+        fresh.sort(key=lambda record: tuple(str(record[field]) for field in self.order_fields))
+        added = []
+        for record in fresh:
+            self.seq += 1
+            record["cursor"] = self.cursor(self.seq)
+            added.append(FeedItem(seq=self.seq, record=record, payload=dumps(record)))
+        self.items.extend(added)
+
+        max_items = settings.NEWS_FEED_MAX_ITEMS
+        if len(self.items) > max_items:
+            del self.items[:len(self.items) - max_items]
+        while len(self._seen) > 2 * max_items:
+            self._seen.popitem(last=False)
+        return added
+
+    def items_since(self, since: Optional[str]) -> Tuple[List[FeedItem], bool]:
+        """
+        获取游标之后的条目
+
+        Args:
+            since: 游标，为None时返回全部保留的条目
+
+        Returns:
+            Tuple[List[FeedItem], bool]: 按序号排列的条目，以及游标之后是否有条目已被淘汰或游标已失效
+        """
+        if since is None:
+            return self.items, False
+        seq = self.parse_cursor(since)
+        if seq is None:
+            return self.items, True
+        start = bisect.bisect_right(self.items, seq, key=lambda item: item.seq)
+        truncated = bool(self.items) and seq < self.items[0].seq - 1
+        return self.items[start:], truncated
+
+
+class NewsFeedService:
+    """
+    增量资讯服务
+
+    每个资讯源由一个后台采集任务跟随资讯列表缓存的刷新，在第一次使用时启动并持续运行。
+    客户端通过游标只获取新资讯，或订阅SSE推送，不再每次拉取并比对完整列表。
+    """
+
+    def __init__(self):
+        """初始化NewsFeedService，创建服务实例"""
+        self.news_service = NewsService()
+        self._feeds = {
+            "cls": NewsFeed("cls", self.news_service.get_cls_telegraph, ("全部",), ("publish_date", "publish_time")),
+            "global": NewsFeed("global", self.news_service.get_global_finance_news, (), ("publish_time",)),
+        }
+
+    def _feed(self, name: str) -> NewsFeed:
+        """获取资讯源"""
+        if name not in self._feeds:
+            raise ValueError(f"不支持的资讯源: {name}")
+        return self._feeds[name]
+
+    def _apply(self, feed: NewsFeed, entry: CacheEntry) -> None:
+        """采集新资讯并推送"""
+        added = feed.ingest(entry)
+        feed.ready.set()
+        if added:
+            logger.info(f"资讯源{feed.name}新增{len(added)}条, 最新序号{feed.seq}")
+            feed.broadcaster.publish(added)
+
+    async def _ensure_started(self, feed: NewsFeed) -> None:
+        """确保采集任务在当前事件循环中运行，并等待第一次采集完成"""
+        loop = asyncio.get_running_loop()
+        if feed.task is None or feed.task.done() or feed.task.get_loop() is not loop:
+            # 新任务第一次获取时总会回调采集，此后才认为资讯已是最新
+            feed.ready = asyncio.Event()
+            feed.task = asyncio.create_task(follow_cache_entry(
+                feed.fetch,
+                lambda entry: self._apply(feed, entry),
+                lambda: True,
+                settings.NEWS_CACHE_EXPIRATION,
+                feed.args
+            ))
+            logger.info(f"资讯源{feed.name}采集任务启动")
+        try:
+            await asyncio.wait_for(feed.ready.wait(), settings.BATCH_ITEM_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"资讯源{feed.name}首次采集超时")
+
+    async def get_news_feed(self, feed_name: str, since: Optional[str] = None, limit: int = 50) -> NewsFeedPage:
+        """
+        获取增量资讯
+
+        Args:
+            feed_name: 资讯源，可选cls(财联社电报)、global(全球财经快讯)
+            since: 游标，返回该游标之后的资讯(最早的limit条)；为None时返回最新的limit条
+            limit: 最多返回的条数
+
+        Returns:
+            NewsFeedPage: 资讯条目及下次请求使用的游标
+
+        Raises:
+            ValueError: 资讯源不支持或游标格式错误时抛出
+        """
+        feed = self._feed(feed_name)
+        await self._ensure_started(feed)
+
+        items, truncated = feed.items_since(since)
+        if since is None:
+            page, has_more = items[-limit:], False
+        else:
+            page, has_more = items[:limit], len(items) > limit
+
+        if page:
+            cursor = page[-1].record["cursor"]
+        elif since is not None and not truncated:
+            cursor = since
+        else:
+            cursor = feed.cursor(feed.seq)
+        return NewsFeedPage(
+            items=[item.record for item in page],
+            cursor=cursor,
+            has_more=has_more,
+            truncated=truncated
+        )
+
+    def stream(self, feed_name: str, since: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        订阅新资讯，生成SSE事件
+
+        每条资讯为一个news事件，事件ID为该资讯的游标，EventSource断线重连时会通过Last-Event-ID
+        自动带回，从断点继续推送。指定since时先补发该游标之后的资讯。
+
+        Args:
+            feed_name: 资讯源，可选cls(财联社电报)、global(全球财经快讯)
+            since: 游标，为None时只推送之后新采集的资讯
+
+        Returns:
+            AsyncIterator[bytes]: SSE事件
+
+        Raises:
+            ValueError: 资讯源不支持或游标格式错误时抛出，在开始推送前检查
+        """
+        feed = self._feed(feed_name)
+        if since is not None:
+            feed.parse_cursor(since)
+        return self._stream(feed, since)
+
+    async def _stream(self, feed: NewsFeed, since: Optional[str]) -> AsyncIterator[bytes]:
+        """生成资讯源的SSE事件"""
+        subscription = feed.broadcaster.subscribe()
+        try:
+            await self._ensure_started(feed)
+            backlog = feed.items_since(since)[0] if since is not None else []
+            last_seq = backlog[-1].seq if backlog else feed.seq
+            for item in backlog:
+                yield sse_event(item.payload, event="news", id=item.record["cursor"])
+
+            while True:
+                added = await subscription.get(settings.STREAM_HEARTBEAT_INTERVAL)
+                if added is None:
+                    if subscription.closed:
+                        return
+                    yield SSE_HEARTBEAT
+                    continue
+                for item in added:
+                    if item.seq > last_seq:
+                        last_seq = item.seq
+                        yield sse_event(item.payload, event="news", id=item.record["cursor"])
+        finally:
+            feed.broadcaster.unsubscribe(subscription)
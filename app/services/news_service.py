@@ -5,8 +5,10 @@ from typing import List, Optional
 from app.models.news_models import InteractiveQuestion, GlobalFinanceNews, CLSTelegraph
 # 修改这一行，从 akshare_wrapper 导入 handle_akshare_exception
 from app.utils.akshare_wrapper import handle_akshare_exception
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.utils.cache import cache_result
+from app.utils.concurrency import run_sync
 
 logger = get_logger(__name__)
 
@@ -31,8 +33,8 @@ class NewsService:
         if symbol.startswith(("sh", "sz", "bj")):
             symbol = symbol[2:]
         
-        # 调用AKShare接口获取互动易提问数据
-        df = ak.stock_irm_cninfo(symbol=symbol)
+        # 调用AKShare接口获取互动易提问数据，在线程池中执行以便与其他请求并发
+        df = await run_sync(ak.stock_irm_cninfo, symbol=symbol)
         
         if df.empty:
             logger.warning(f"未获取到股票 {symbol} 的互动易提问数据")
@@ -110,7 +112,7 @@ class NewsService:
         
         return result
     
-    @cache_result()
+    @cache_result(expire=settings.NEWS_CACHE_EXPIRATION)
     @handle_akshare_exception
     async def get_global_finance_news(self) -> List[GlobalFinanceNews]:
         """
@@ -121,8 +123,8 @@ class NewsService:
         """
         logger.info("获取全球财经快讯数据")
         
-        # 调用AKShare接口获取全球财经快讯数据
-        df = ak.stock_info_global_em()
+        # 调用AKShare接口获取全球财经快讯数据，在线程池中执行以免阻塞资讯推送连接
+        df = await run_sync(ak.stock_info_global_em)
         
         if df.empty:
             logger.warning("未获取到全球财经快讯数据")
@@ -142,7 +144,7 @@ class NewsService:
         
         return result
     
-    @cache_result()
+    @cache_result(expire=settings.NEWS_CACHE_EXPIRATION)
     @handle_akshare_exception
     async def get_cls_telegraph(self, symbol: str = "全部") -> List[CLSTelegraph]:
         """
@@ -156,8 +158,8 @@ class NewsService:
         """
         logger.info(f"获取财联社电报数据: {symbol}")
         
-        # 调用AKShare接口获取财联社电报数据
-        df = ak.stock_info_global_cls(symbol=symbol)
+        # 调用AKShare接口获取财联社电报数据，在线程池中执行以免阻塞资讯推送连接
+        df = await run_sync(ak.stock_info_global_cls, symbol=symbol)
         
         if df.empty:
             logger.warning(f"未获取到财联社电报数据: {symbol}")
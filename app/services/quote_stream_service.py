@@ -0,0 +1,140 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import pandas as pd
+from app.services.stock_service import SPOT_COLUMNS, StockService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.columnar import frame_to_records
+from app.utils.serialization import dumps
+from app.utils.stream import SSE_HEARTBEAT, Broadcaster, follow_cache_entry, sse_event
+from app.utils.symbols import normalize_stock_code
+
+logger = get_logger(__name__)
+
+# 判断行情是否变化时比较的字段，不含代码、名称和快照时间
+QUOTE_DIFF_FIELDS = [field for field in SPOT_COLUMNS.values() if field not in ("code", "name")]
+
+class QuoteStreamService:
+    """
+    实时行情推送服务
+
+    所有订阅者共享一个后台轮询任务：每当全市场行情快照刷新，计算与上一份快照相比发生变化的股票，
+    每只变化股票的行情只编码一次，再按各订阅者关注的代码分发。
+    轮询任务在第一个订阅者到来时启动，最后一个订阅者离开后停止。
+    """
+
+    def __init__(self):
+        """初始化QuoteStreamService，创建服务实例"""
+        self.stock_service = StockService()
+        self._broadcaster: Broadcaster[Tuple[int, Dict[str, bytes]]] = Broadcaster()
+        self._task: Optional[asyncio.Task] = None
+        # 最新快照，按代码索引，用于计算下一次刷新的变化
+        self._frame: Optional[pd.DataFrame] = None
+        # 最新快照中每只股票编码后的行情，用于新订阅者的初始快照
+        self._quotes: Dict[str, bytes] = {}
+        self._sequence = 0
+
+    @staticmethod
+    def changed_quotes(previous: Optional[pd.DataFrame], current: pd.DataFrame) -> pd.DataFrame:
+        """
+        找出两份行情快照之间发生变化的股票
+
+        Args:
+            previous: 上一份快照，以代码为索引，为None时视为全部变化
+            current: 当前快照，以代码为索引
+
+        Returns:
+            pd.DataFrame: 当前快照中行情字段有变化或新出现的股票
+        """
+        if previous is None:
+            return current
+        before = previous.reindex(current.index)[QUOTE_DIFF_FIELDS]
+        after = current[QUOTE_DIFF_FIELDS]
+        unchanged = ((after == before) | (after.isna() & before.isna())).all(axis=1)
+        return current[~unchanged]
+
+    def _apply_snapshot(self, spot: pd.DataFrame) -> None:
+        """用新的快照更新状态，并向订阅者发布变化的行情"""
+        current = spot.set_index("code")
+        changed = self.changed_quotes(self._frame, current).reset_index()
+        self._frame = current
+        if changed.empty:
+            return
+
+        quotes = {code: dumps(record) for code, record in zip(changed["code"], frame_to_records(changed))}
+        self._quotes.update(quotes)
+        self._sequence += 1
+        dropped = self._broadcaster.publish((self._sequence, quotes))
+        logger.debug(f"行情推送第{self._sequence}次刷新: 变化{len(quotes)}只, 订阅者{len(self._broadcaster)}个")
+        if dropped:
+            logger.warning(f"行情推送断开{dropped}个积压的订阅者")
+
+    async def _poll(self) -> None:
+        """后台跟随全市场行情快照的刷新，快照缓存过期后立即刷新"""
+        logger.info("行情推送轮询任务启动")
+        try:
+            # 与行情查询接口共用快照缓存，每次缓存过期只下载一次全市场行情
+            await follow_cache_entry(
+                self.stock_service.get_spot_frame,
+                lambda entry: self._apply_snapshot(entry.value),
+                lambda: len(self._broadcaster) > 0,
+                settings.SPOT_CACHE_EXPIRATION
+            )
+        finally:
+            # 没有订阅者后不再更新，清除状态以免下一个订阅者收到过期的快照
+            self._frame = None
+            self._quotes = {}
+            logger.info("行情推送轮询任务停止")
+
+    @staticmethod
+    def _pack(quotes: Dict[str, bytes], codes: List[str]) -> Optional[bytes]:
+        """拼接指定代码的已编码行情为JSON数组，没有相关行情时返回None"""
+        parts = [quotes[code] for code in codes if code in quotes]
+        if not parts:
+            return None
+        return b"[" + b",".join(parts) + b"]"
+
+    async def stream(self, stock_codes: List[str]) -> AsyncIterator[bytes]:
+        """
+        订阅指定股票的实时行情，生成SSE事件
+
+        第一个事件为snapshot，包含所有已订阅股票的当前行情；之后每次快照刷新时，
+        若有订阅的股票行情变化，则发送update事件，只包含变化的股票。
+        事件数据为与StockQuote字段一致的行情列表，事件ID为快照刷新序号。
+        长时间无事件时发送心跳注释。消费过慢的连接会被服务端关闭，客户端重连后重新获得snapshot。
+
+        Args:
+            stock_codes: 股票代码列表，可带市场前缀
+
+        Yields:
+            bytes: SSE事件
+        """
+        codes = list(dict.fromkeys(normalize_stock_code(code) for code in stock_codes))
+        subscription = self._broadcaster.subscribe()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        logger.info(f"行情推送新增订阅: {len(codes)}只, 订阅者{len(self._broadcaster)}个")
+
+        try:
+            event = "snapshot"
+            if self._quotes:
+                yield sse_event(self._pack(self._quotes, codes) or b"[]", event=event, id=str(self._sequence))
+                event = "update"
+
+            while True:
+                message = await subscription.get(settings.STREAM_HEARTBEAT_INTERVAL)
+                if message is None:
+                    if subscription.closed:
+                        return
+                    yield SSE_HEARTBEAT
+                    continue
+
+                sequence, quotes = message
+                payload = self._pack(quotes, codes)
+                if payload is None and event == "update":
+                    continue
+                yield sse_event(payload or b"[]", event=event, id=str(sequence))
+                event = "update"
+        finally:
+            self._broadcaster.unsubscribe(subscription)
+            logger.info(f"行情推送取消订阅, 剩余订阅者{len(self._broadcaster)}个")
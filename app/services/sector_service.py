@@ -2,18 +2,45 @@ import akshare as ak
 import pandas as pd
 import math
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.models.sector_models import (
     ConceptBoard, IndustryBoard, BoardSpot, 
     ConceptBoardSpot, IndustryBoardSpot,
-    ConceptBoardConstituent, IndustryBoardConstituent
+    ConceptBoardConstituent, IndustryBoardConstituent, BoardConstituentsBatch
 )
+from app.models.common_models import BatchItemError
 from app.utils.akshare_wrapper import handle_akshare_exception
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.utils.cache import cache_result
+from app.utils.columnar import rename_columns, numeric_column, frame_to_records
+from app.utils.concurrency import gather_limited, run_sync
 
 logger = get_logger(__name__)
 
+# 板块成份股DataFrame列名到成份股模型字段的映射
+CONSTITUENT_COLUMNS = {
+    "序号": "rank",
+    "代码": "code",
+    "名称": "name",
+    "最新价": "price",
+    "涨跌幅": "change_percent",
+    "涨跌额": "change",
+    "成交量": "volume",
+    "成交额": "amount",
+    "振幅": "amplitude",
+    "最高": "high",
+    "最低": "low",
+    "今开": "open",
+    "昨收": "pre_close",
+    "换手率": "turnover_rate",
+    "市盈率-动态": "pe_ratio",
+    "市净率": "pb_ratio",
+}
+
+# 成份股中允许为空的字段，其余数值字段缺失时按0处理
+NULLABLE_CONSTITUENT_FIELDS = ("pe_ratio", "pb_ratio")
+
 # 添加一个辅助函数来处理特殊浮点值
 def safe_float(value, default=None):
     """
@@ -40,7 +67,7 @@ def safe_float(value, default=None):
 class SectorService:
     """板块服务"""
     
-    @cache_result()
+    @cache_result(expire=settings.BOARD_CACHE_EXPIRATION)
     @handle_akshare_exception
     async def get_concept_boards(self) -> List[ConceptBoard]:
         """
@@ -51,8 +78,8 @@ class SectorService:
         """
         logger.info("获取概念板块列表")
         
-        # 调用AKShare接口获取概念板块数据
-        df = ak.stock_board_concept_name_em()
+        # 调用AKShare接口获取概念板块数据，在线程池中执行以免阻塞推送连接
+        df = await run_sync(ak.stock_board_concept_name_em)
         
         if df.empty:
             logger.warning("未获取到概念板块数据")
@@ -206,48 +233,145 @@ class SectorService:
         Returns:
             List[ConceptBoardConstituent]: 概念板块成份股列表
         """
+        df = await self.get_concept_board_constituents_frame(symbol)
+        
+        # 将DataFrame转换为ConceptBoardConstituent对象列表
+        return [ConceptBoardConstituent(**record) for record in frame_to_records(df)]
+
+    @cache_result()
+    @handle_akshare_exception
+    async def get_concept_board_constituents_frame(self, symbol: str) -> pd.DataFrame:
+        """
+        获取概念板块成份股(DataFrame)
+        
+        列名与ConceptBoardConstituent字段一致，供列式、Arrow和Parquet格式输出直接使用。
+        
+        Args:
+            symbol: 板块名称或代码，如"融资融券"或"BK0655"
+            
+        Returns:
+            pd.DataFrame: 概念板块成份股数据
+        """
         logger.info(f"获取概念板块成份股: {symbol}")
         
         try:
-            # 调用AKShare接口获取概念板块成份股
-            df = ak.stock_board_concept_cons_em(symbol=symbol)
+            # 调用AKShare接口获取概念板块成份股，在线程池中执行以便多个板块并发获取
+            df = await run_sync(ak.stock_board_concept_cons_em, symbol=symbol)
             
             if df.empty:
                 logger.warning(f"未获取到板块 {symbol} 的成份股数据")
-                return []
+                return pd.DataFrame(columns=list(CONSTITUENT_COLUMNS.values()) + ["update_time"])
             
-            # 将DataFrame转换为ConceptBoardConstituent对象列表
-            result = []
-            for _, row in df.iterrows():
-                # 使用safe_float函数处理所有浮点值
-                constituent = ConceptBoardConstituent(
-                    rank=int(row["序号"]),
-                    code=row["代码"],
-                    name=row["名称"],
-                    price=safe_float(row["最新价"], 0),
-                    change_percent=safe_float(row["涨跌幅"], 0),
-                    change=safe_float(row["涨跌额"], 0),
-                    volume=safe_float(row["成交量"], 0),
-                    amount=safe_float(row["成交额"], 0),
-                    amplitude=safe_float(row["振幅"], 0),
-                    high=safe_float(row["最高"], 0),
-                    low=safe_float(row["最低"], 0),
-                    open=safe_float(row["今开"], 0),
-                    pre_close=safe_float(row["昨收"], 0),
-                    turnover_rate=safe_float(row["换手率"], 0),
-                    pe_ratio=safe_float(row["市盈率-动态"]),
-                    pb_ratio=safe_float(row["市净率"]),
-                    update_time=datetime.now()
-                )
-                result.append(constituent)
-            
-            return result
+            return self._constituents_frame(df)
         except Exception as e:
             logger.error(f"获取概念板块成份股失败: {str(e)}")
             # 重要：这里需要抛出异常，而不是返回None
             raise ValueError(f"获取概念板块成份股失败: {str(e)}")
 
-    @cache_result()
+    @staticmethod
+    def _constituents_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        将AKShare返回的板块成份股数据转换为与成份股模型字段一致的DataFrame
+        
+        Args:
+            df: AKShare返回的原始成份股数据
+            
+        Returns:
+            pd.DataFrame: 转换后的成份股数据
+        """
+        frame = rename_columns(df, CONSTITUENT_COLUMNS)
+        frame["rank"] = frame["rank"].astype("int64")
+        for field in list(CONSTITUENT_COLUMNS.values())[3:]:
+            # 与safe_float一致：可空字段保留NaN，其余字段以0填充
+            default = None if field in NULLABLE_CONSTITUENT_FIELDS else 0
+            frame[field] = numeric_column(frame[field], default)
+        frame["update_time"] = datetime.now()
+        return frame
+
+    async def get_board_constituents_frames(
+        self,
+        concept_boards: List[str],
+        industry_boards: List[str]
+    ) -> Tuple[Dict[Tuple[str, str], pd.DataFrame], Dict[Tuple[str, str], str]]:
+        """
+        批量获取概念板块和行业板块的成份股(DataFrame)
+        
+        已缓存的板块直接从缓存返回，其余板块以BATCH_CONCURRENCY为上限并发获取，
+        单个板块失败不影响其他板块。
+        
+        Args:
+            concept_boards: 概念板块名称或代码列表
+            industry_boards: 行业板块名称或代码列表
+            
+        Returns:
+            Tuple[Dict[Tuple[str, str], pd.DataFrame], Dict[Tuple[str, str], str]]:
+            以(板块类型, 板块)为键的成份股数据和获取失败的错误信息，板块类型为concept或industry
+        """
+        fetchers = {
+            "concept": self.get_concept_board_constituents_frame,
+            "industry": self.get_industry_board_constituents_frame,
+        }
+        keys = [("concept", board) for board in concept_boards] + [("industry", board) for board in industry_boards]
+        logger.info(f"批量获取板块成份股: 概念板块{len(concept_boards)}个, 行业板块{len(industry_boards)}个")
+        
+        frames, errors = await gather_limited(keys, lambda key: fetchers[key[0]](key[1]))
+        if errors:
+            logger.warning(f"批量获取板块成份股失败{len(errors)}个: {', '.join(board for _, board in errors)}")
+        return frames, errors
+
+    async def get_board_constituents_batch(
+        self,
+        concept_boards: List[str],
+        industry_boards: List[str]
+    ) -> BoardConstituentsBatch:
+        """
+        批量获取概念板块和行业板块的成份股
+        
+        Args:
+            concept_boards: 概念板块名称或代码列表
+            industry_boards: 行业板块名称或代码列表
+            
+        Returns:
+            BoardConstituentsBatch: 板块到成份股列表的映射，以及获取失败的板块和错误信息
+        """
+        frames, errors = await self.get_board_constituents_frames(concept_boards, industry_boards)
+        
+        models = {"concept": ConceptBoardConstituent, "industry": IndustryBoardConstituent}
+        result = BoardConstituentsBatch(
+            errors=[
+                BatchItemError(key=f"{board_type}:{board}", error=error)
+                for (board_type, board), error in errors.items()
+            ]
+        )
+        for (board_type, board), frame in frames.items():
+            model = models[board_type]
+            getattr(result, board_type)[board] = [model(**record) for record in frame_to_records(frame)]
+        return result
+
+    @staticmethod
+    def constituents_long_table(frames: Dict[Tuple[str, str], pd.DataFrame]) -> pd.DataFrame:
+        """
+        将多个板块的成份股合并为长表
+        
+        Args:
+            frames: 以(板块类型, 板块)为键的成份股数据
+            
+        Returns:
+            pd.DataFrame: 在成份股字段前增加board_type和board列的长表
+        """
+        parts = []
+        for (board_type, board), frame in frames.items():
+            if frame.empty:
+                continue
+            part = frame.copy()
+            part.insert(0, "board", board)
+            part.insert(0, "board_type", board_type)
+            parts.append(part)
+        if not parts:
+            return pd.DataFrame(columns=["board_type", "board"] + list(CONSTITUENT_COLUMNS.values()) + ["update_time"])
+        return pd.concat(parts, ignore_index=True)
+
+    @cache_result(expire=settings.BOARD_CACHE_EXPIRATION)
     @handle_akshare_exception
     async def get_industry_boards(self) -> List[IndustryBoard]:
         """
@@ -258,8 +382,8 @@ class SectorService:
         """
         logger.info("获取行业板块列表")
         
-        # 调用AKShare接口获取行业板块数据
-        df = ak.stock_board_industry_name_em()
+        # 调用AKShare接口获取行业板块数据，在线程池中执行以免阻塞推送连接
+        df = await run_sync(ak.stock_board_industry_name_em)
         
         if df.empty:
             logger.warning("未获取到行业板块数据")
@@ -398,41 +522,36 @@ class SectorService:
         Returns:
             List[IndustryBoardConstituent]: 行业板块成份股列表
         """
+        df = await self.get_industry_board_constituents_frame(symbol)
+        
+        # 将DataFrame转换为IndustryBoardConstituent对象列表
+        return [IndustryBoardConstituent(**record) for record in frame_to_records(df)]
+
+    @cache_result()
+    @handle_akshare_exception
+    async def get_industry_board_constituents_frame(self, symbol: str) -> pd.DataFrame:
+        """
+        获取行业板块成份股(DataFrame)
+        
+        列名与IndustryBoardConstituent字段一致，供列式、Arrow和Parquet格式输出直接使用。
+        
+        Args:
+            symbol: 板块名称或代码，如"小金属"或"BK1027"
+            
+        Returns:
+            pd.DataFrame: 行业板块成份股数据
+        """
         logger.info(f"获取行业板块成份股: {symbol}")
         
         try:
-            # 调用AKShare接口获取行业板块成份股
-            df = ak.stock_board_industry_cons_em(symbol=symbol)
+            # 调用AKShare接口获取行业板块成份股，在线程池中执行以便多个板块并发获取
+            df = await run_sync(ak.stock_board_industry_cons_em, symbol=symbol)
             
             if df.empty:
                 logger.warning(f"未获取到板块 {symbol} 的成份股数据")
-                return []
-            
-            # 将DataFrame转换为IndustryBoardConstituent对象列表
-            result = []
-            for _, row in df.iterrows():
-                # 使用safe_float函数处理所有浮点值
-                constituent = IndustryBoardConstituent(
-                    rank=int(row["序号"]),
-                    code=row["代码"],
-                    name=row["名称"],
-                    price=safe_float(row["最新价"], 0),
-                    change_percent=safe_float(row["涨跌幅"], 0),
-                    change=safe_float(row["涨跌额"], 0),
-                    volume=safe_float(row["成交量"], 0),
-                    amount=safe_float(row["成交额"], 0),
-                    amplitude=safe_float(row["振幅"], 0),
-                    high=safe_float(row["最高"], 0),
-                    low=safe_float(row["最低"], 0),
-                    open=safe_float(row["今开"], 0),
-                    pre_close=safe_float(row["昨收"], 0),
-                    turnover_rate=safe_float(row["换手率"], 0),
-                    pe_ratio=safe_float(row["市盈率-动态"]),
-                    pb_ratio=safe_float(row["市净率"]),
-                    update_time=datetime.now()
-                )
-                result.append(constituent)
+                return pd.DataFrame(columns=list(CONSTITUENT_COLUMNS.values()) + ["update_time"])
             
-            return result
+            return self._constituents_frame(df)
         except Exception as e:
-            logger.error(f"获取行业板块成份股失败: {str(e)}")
\ No newline at end of file
+            logger.error(f"获取行业板块成份股失败: {str(e)}")
+            raise ValueError(f"获取行业板块成份股失败: {str(e)}")
@@ -1,14 +1,51 @@
+import asyncio
 import akshare as ak
 import pandas as pd
 from datetime import datetime, date
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.models.sentiment_models import MarginDetail, StockHotRank, StockHotUpRank, StockHotKeyword
 from app.utils.akshare_wrapper import handle_akshare_exception
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.cache import cache_result
+from app.utils.cache import cache_result, get_cache_entry
+from app.utils.columnar import rename_columns, frame_to_records
+from app.utils.concurrency import gather_limited, run_sync
+from app.utils.symbols import normalize_stock_code, with_market_prefix
 
 logger = get_logger(__name__)
 
+# 融资融券明细字段顺序，与MarginDetail一致
+MARGIN_FIELDS = [
+    "trade_date", "stock_code", "stock_name", "market",
+    "financing_buy", "financing_balance", "financing_repay",
+    "securities_sell", "securities_balance", "securities_repay",
+    "securities_balance_amount", "margin_balance", "update_time",
+]
+
+# 上海市场融资融券明细列名映射(上海数据没有融券余额和融资融券余额)
+SH_MARGIN_COLUMNS = {
+    "标的证券代码": "stock_code",
+    "标的证券简称": "stock_name",
+    "融资买入额": "financing_buy",
+    "融资余额": "financing_balance",
+    "融资偿还额": "financing_repay",
+    "融券卖出量": "securities_sell",
+    "融券余量": "securities_balance",
+    "融券偿还量": "securities_repay",
+}
+
+# 深圳市场融资融券明细列名映射(深圳数据没有融资偿还额和融券偿还量)
+SZ_MARGIN_COLUMNS = {
+    "证券代码": "stock_code",
+    "证券简称": "stock_name",
+    "融资买入额": "financing_buy",
+    "融资余额": "financing_balance",
+    "融券卖出量": "securities_sell",
+    "融券余量": "securities_balance",
+    "融券余额": "securities_balance_amount",
+    "融资融券余额": "margin_balance",
+}
+
 class SentimentService:
     """市场情绪服务"""
     
@@ -24,73 +61,190 @@ class SentimentService:
         Returns:
             List[MarginDetail]: 融资融券明细数据列表
         """
+        df = await self.get_margin_details_frame(trade_date)
+        
+        # 将DataFrame转换为MarginDetail对象列表
+        return [MarginDetail(**record) for record in frame_to_records(df)]
+    
+    @cache_result()
+    @handle_akshare_exception
+    async def get_margin_details_frame(self, trade_date: str) -> pd.DataFrame:
+        """
+        获取融资融券明细数据（上海和深圳市场合并，DataFrame）
+        
+        列名与MarginDetail字段一致，供列式、Arrow和Parquet格式输出直接使用。
+        
+        Args:
+            trade_date: 交易日期，格式为"YYYYMMDD"，如"20230922"
+            
+        Returns:
+            pd.DataFrame: 融资融券明细数据
+        """
         logger.info(f"获取融资融券明细数据: {trade_date}")
+        return await self._load_margin_details(trade_date)
+    
+    @cache_result(expire=settings.HISTORY_CACHE_EXPIRATION)
+    @handle_akshare_exception
+    async def get_closed_margin_details_frame(self, trade_date: str) -> pd.DataFrame:
+        """
+        获取已收盘交易日的融资融券明细数据（DataFrame）
         
-        result = []
+        已收盘交易日的数据不再变化，按HISTORY_CACHE_EXPIRATION长期缓存。
+        数据为空(如交易所尚未发布)时抛出异常而不缓存，以便之后重新获取。
         
-        # 获取上海市场数据
-        try:
-            sh_df = ak.stock_margin_detail_sse(date=trade_date)
-            if not sh_df.empty:
-                # 转换日期格式
-                date_obj = datetime.strptime(trade_date, "%Y%m%d").date()
-                
-                # 处理上海市场数据
-                for _, row in sh_df.iterrows():
-                    detail = MarginDetail(
-                        trade_date=date_obj,
-                        stock_code=row["标的证券代码"],
-                        stock_name=row["标的证券简称"],
-                        market="上海",
-                        financing_buy=int(row["融资买入额"]),
-                        financing_balance=int(row["融资余额"]),
-                        financing_repay=int(row["融资偿还额"]),
-                        securities_sell=int(row["融券卖出量"]),
-                        securities_balance=int(row["融券余量"]),
-                        securities_repay=int(row["融券偿还量"]),
-                        securities_balance_amount=None,  # 上海数据没有融券余额
-                        margin_balance=None,  # 上海数据没有融资融券余额
-                        update_time=datetime.now()
-                    )
-                    result.append(detail)
-                logger.info(f"获取到上海市场融资融券明细数据: {len(result)}条")
-            else:
-                logger.warning(f"未获取到上海市场 {trade_date} 的融资融券明细数据")
-        except Exception as e:
-            logger.error(f"获取上海市场融资融券明细数据失败: {str(e)}")
+        Args:
+            trade_date: 交易日期，格式为"YYYYMMDD"，应早于当天
+            
+        Returns:
+            pd.DataFrame: 融资融券明细数据，列名与MarginDetail字段一致
+            
+        Raises:
+            ValueError: 当数据为空时抛出
+        """
+        logger.info(f"获取已收盘交易日融资融券明细数据: {trade_date}")
+        frame = await self._load_margin_details(trade_date)
+        if frame.empty:
+            raise ValueError(f"未找到 {trade_date} 的融资融券明细数据")
+        return frame
+    
+    async def _load_margin_details(self, trade_date: str) -> pd.DataFrame:
+        """
+        并发获取上海和深圳市场的融资融券明细数据并合并
+        
+        单个市场获取失败时记录日志并忽略，两个市场均无数据时返回空DataFrame。
+        
+        Args:
+            trade_date: 交易日期，格式为"YYYYMMDD"
+            
+        Returns:
+            pd.DataFrame: 融资融券明细数据，列名与MarginDetail字段一致
+        """
+        # 转换日期格式
+        date_obj = datetime.strptime(trade_date, "%Y%m%d").date()
+        
+        async def fetch_market(fetch, columns: dict, market: str) -> Optional[pd.DataFrame]:
+            try:
+                df = await run_sync(fetch, date=trade_date)
+            except Exception as e:
+                logger.error(f"获取{market}市场融资融券明细数据失败: {str(e)}")
+                return None
+            if df.empty:
+                logger.warning(f"未获取到{market}市场 {trade_date} 的融资融券明细数据")
+                return None
+            logger.info(f"获取到{market}市场融资融券明细数据: {len(df)}条")
+            return self._margin_frame(df, columns, market, date_obj)
+        
+        # 同时获取上海和深圳市场数据
+        frames = await asyncio.gather(
+            fetch_market(ak.stock_margin_detail_sse, SH_MARGIN_COLUMNS, "上海"),
+            fetch_market(ak.stock_margin_detail_szse, SZ_MARGIN_COLUMNS, "深圳"),
+        )
+        frames = [frame for frame in frames if frame is not None]
+        
+        if not frames:
+            return pd.DataFrame(columns=MARGIN_FIELDS)
+        return pd.concat(frames, ignore_index=True)[MARGIN_FIELDS]
+    
+    @cache_result()
+    @handle_akshare_exception
+    async def get_trade_dates(self) -> List[str]:
+        """
+        获取A股交易日历
         
-        # 获取深圳市场数据
+        Returns:
+            List[str]: 全部交易日期，格式为"YYYYMMDD"，按日期升序排列
+        """
+        logger.info("获取A股交易日历")
+        df = await run_sync(ak.tool_trade_date_hist_sina)
+        return pd.to_datetime(df["trade_date"]).dt.strftime("%Y%m%d").tolist()
+    
+    async def get_margin_details_range_frame(
+        self,
+        start_date: str,
+        end_date: str
+    ) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        获取日期区间内的融资融券明细数据（DataFrame）
+        
+        按交易日历枚举区间内的交易日，以BATCH_CONCURRENCY为上限并发获取各交易日数据，
+        每个交易日的上海和深圳市场数据同时获取。已收盘交易日的数据长期缓存，
+        当天的数据按普通缓存时间缓存。交易日历获取失败时按工作日枚举。
+        
+        Args:
+            start_date: 开始日期，格式为"YYYYMMDD"
+            end_date: 结束日期，格式为"YYYYMMDD"
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, str]]: 按交易日期排列的融资融券明细长表，
+            以及获取失败的交易日期和错误信息
+        """
         try:
-            sz_df = ak.stock_margin_detail_szse(date=trade_date)
-            if not sz_df.empty:
-                # 转换日期格式
-                date_obj = datetime.strptime(trade_date, "%Y%m%d").date()
-                
-                # 处理深圳市场数据
-                for _, row in sz_df.iterrows():
-                    detail = MarginDetail(
-                        trade_date=date_obj,
-                        stock_code=row["证券代码"],
-                        stock_name=row["证券简称"],
-                        market="深圳",
-                        financing_buy=int(row["融资买入额"]),
-                        financing_balance=int(row["融资余额"]),
-                        financing_repay=None,  # 深圳数据没有融资偿还额
-                        securities_sell=int(row["融券卖出量"]),
-                        securities_balance=int(row["融券余量"]),
-                        securities_repay=None,  # 深圳数据没有融券偿还量
-                        securities_balance_amount=int(row["融券余额"]),
-                        margin_balance=int(row["融资融券余额"]),
-                        update_time=datetime.now()
-                    )
-                    result.append(detail)
-                logger.info(f"获取到深圳市场融资融券明细数据: {len(result) - len(sh_df)}条")
-            else:
-                logger.warning(f"未获取到深圳市场 {trade_date} 的融资融券明细数据")
+            calendar = await self.get_trade_dates()
+            trade_dates = [day for day in calendar if start_date <= day <= end_date]
         except Exception as e:
-            logger.error(f"获取深圳市场融资融券明细数据失败: {str(e)}")
+            logger.warning(f"获取交易日历失败，按工作日枚举: {str(e)}")
+            trade_dates = pd.bdate_range(start_date, end_date).strftime("%Y%m%d").tolist()
+        logger.info(f"获取融资融券明细区间数据: {start_date}-{end_date}, 交易日{len(trade_dates)}个")
         
-        return result
+        today = datetime.now().strftime("%Y%m%d")
+        
+        async def fetch_day(trade_date: str) -> pd.DataFrame:
+            if trade_date < today:
+                return await self.get_closed_margin_details_frame(trade_date)
+            return await self.get_margin_details_frame(trade_date)
+        
+        frames, errors = await gather_limited(trade_dates, fetch_day)
+        if errors:
+            logger.warning(f"获取融资融券明细数据失败{len(errors)}天: {', '.join(errors)}")
+        
+        frames = [frame for frame in frames.values() if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=MARGIN_FIELDS), errors
+        return pd.concat(frames, ignore_index=True), errors
+    
+    @staticmethod
+    def margin_series(df: pd.DataFrame) -> Dict[str, List[Dict]]:
+        """
+        将融资融券明细长表按股票拆分为时间序列
+        
+        Args:
+            df: 按交易日期排列的融资融券明细长表，须包含stock_code列
+            
+        Returns:
+            Dict[str, List[Dict]]: 股票代码到记录列表的映射，记录保持长表中的顺序，不含stock_code
+        """
+        if df.empty:
+            return {}
+        return {
+            code: frame_to_records(group.drop(columns=["stock_code"]))
+            for code, group in df.groupby("stock_code", sort=False)
+        }
+    
+    @staticmethod
+    def _margin_frame(df: pd.DataFrame, columns: dict, market: str, trade_date: date) -> pd.DataFrame:
+        """
+        将单个市场的融资融券明细转换为与MarginDetail字段一致的DataFrame
+        
+        Args:
+            df: AKShare返回的原始数据
+            columns: 原列名到MarginDetail字段的映射
+            market: 市场名称，"上海"或"深圳"
+            trade_date: 交易日期
+            
+        Returns:
+            pd.DataFrame: 转换后的数据，缺失字段为None
+        """
+        frame = rename_columns(df, columns)
+        frame["trade_date"] = trade_date
+        frame["market"] = market
+        frame["update_time"] = datetime.now()
+        # 金额和数量字段使用可空整数类型，便于两个市场的数据合并
+        for field in MARGIN_FIELDS:
+            if field not in frame.columns:
+                frame[field] = pd.Series(pd.NA, index=frame.index, dtype="Int64")
+            elif field in columns.values() and field not in ("stock_code", "stock_name"):
+                frame[field] = frame[field].astype("Int64")
+        return frame[MARGIN_FIELDS]
     
     @cache_result()
     @handle_akshare_exception
@@ -179,21 +333,18 @@ class SentimentService:
         获取股票热门关键词数据
         
         Args:
-            symbol: 股票代码，如"SZ000665"
+            symbol: 股票代码，如"SZ000665"，不带市场前缀时按代码号段补全
             
         Returns:
             List[StockHotKeyword]: 股票热门关键词数据列表
         """
         logger.info(f"获取股票热门关键词数据: {symbol}")
         
-        # 标准化股票代码（确保大写）
-        if symbol.startswith(("sh", "sz", "bj")):
-            market = symbol[:2].upper()
-            code = symbol[2:]
-            symbol = f"{market}{code}"
+        # 标准化股票代码（确保带大写的市场前缀）
+        symbol = with_market_prefix(symbol)
         
-        # 调用AKShare接口获取股票热门关键词数据
-        df = ak.stock_hot_keyword_em(symbol=symbol)
+        # 调用AKShare接口获取股票热门关键词数据，在线程池中执行以便与其他请求并发
+        df = await run_sync(ak.stock_hot_keyword_em, symbol=symbol)
         
         if df.empty:
             logger.warning(f"未获取到股票 {symbol} 的热门关键词数据")
@@ -220,4 +371,36 @@ class SentimentService:
             )
             result.append(keyword)
         
-        return result
\ No newline at end of file
+        return result
+    
+    async def get_stock_hot_keywords_frame(self, symbols: List[str]) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        批量获取多只股票的热门关键词数据
+        
+        已缓存的股票直接复用缓存项及其DataFrame，其余股票以BATCH_CONCURRENCY为上限并发获取。
+        
+        Args:
+            symbols: 股票代码列表，可带市场前缀
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, str]]: 各股票热门关键词合并后的DataFrame(按请求顺序排列)，
+            以及获取失败或无数据的股票代码和错误信息
+        """
+        codes = [normalize_stock_code(symbol) for symbol in symbols]
+        logger.info(f"批量获取股票热门关键词数据: {len(set(codes))}只")
+        entries, errors = await gather_limited(
+            codes, lambda code: get_cache_entry(self.get_stock_hot_keywords, code)
+        )
+        
+        frames = []
+        for code, entry in entries.items():
+            if entry.value:
+                frames.append(entry.as_frame())
+            else:
+                errors[code] = "未找到热门关键词数据"
+        if errors:
+            logger.warning(f"批量获取股票热门关键词数据失败{len(errors)}只: {', '.join(errors)}")
+        
+        if not frames:
+            return pd.DataFrame(columns=list(StockHotKeyword.model_fields)), errors
+        return pd.concat(frames, ignore_index=True), errors
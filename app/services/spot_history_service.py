@@ -0,0 +1,289 @@
+import asyncio
+import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.services.stock_service import SPOT_COLUMNS, StockService
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry
+from app.utils.stream import follow_cache_entry
+from app.utils.symbols import normalize_stock_code
+
+logger = get_logger(__name__)
+
+# 记录历史的行情字段，均为数值字段，不含代码、名称和快照时间
+SPOT_HISTORY_FIELDS = [field for field in SPOT_COLUMNS.values() if field not in ("code", "name")]
+
+
+@dataclass
+class SnapshotDelta:
+    """一次快照相对上一次快照变化的单元格，按行、列顺序排列"""
+    time: pd.Timestamp
+    rows: np.ndarray
+    cols: np.ndarray
+    values: np.ndarray
+
+
+class SpotHistory:
+    """
+    全市场行情快照的增量历史
+
+    保存一份基准快照和之后每次快照相对上一次变化的单元格(行号、列号、新值)，
+    每次快照通常只有少数股票的少数字段变化，内存远小于保存完整快照。
+    增量最多保留capacity次，超出后最早的增量合并进基准快照，基准时间随之前移。
+    股票以在快照中首次出现的顺序编号，不在某次快照中的股票其字段值为NaN。
+    """
+
+    def __init__(self, fields: List[str], capacity: int):
+        """
+        Args:
+            fields: 记录的数值字段
+            capacity: 最多保留的增量数
+        """
+        self.fields = fields
+        self.capacity = capacity
+        self.codes = pd.Index([], dtype=object)
+        self.names: Dict[str, str] = {}
+        self.base: Optional[np.ndarray] = None
+        self.base_time: Optional[pd.Timestamp] = None
+        self.current: Optional[np.ndarray] = None
+        self.deltas: List[SnapshotDelta] = []
+        self._times: List[pd.Timestamp] = []
+
+    @property
+    def times(self) -> List[pd.Timestamp]:
+        """窗口内所有快照的时间，从基准快照开始"""
+        if self.base_time is None:
+            return []
+        return [self.base_time] + self._times
+
+    @property
+    def nbytes(self) -> int:
+        """基准快照、最新快照和增量占用的字节数"""
+        if self.base is None:
+            return 0
+        return self.base.nbytes + self.current.nbytes + sum(
+            delta.rows.nbytes + delta.cols.nbytes + delta.values.nbytes for delta in self.deltas
+        )
+
+    def record(self, spot: pd.DataFrame) -> int:
+        """
+        记录一份快照
+
+        Args:
+            spot: 全市场行情快照，列名与StockQuote字段一致
+
+        Returns:
+            int: 与上一份快照相比变化的单元格数，第一份快照返回0
+        """
+        time = spot["update_time"].iloc[0]
+        frame = spot.set_index("code")
+        self.names.update(zip(frame.index, frame["name"]))
+
+        new_codes = frame.index.difference(self.codes, sort=False)
+        if len(new_codes):
+            self.codes = self.codes.append(new_codes)
+            if self.base is not None:
+                padding = np.full((len(new_codes), len(self.fields)), np.nan)
+                self.base = np.vstack([self.base, padding])
+                self.current = np.vstack([self.current, padding])
+
+        matrix = frame.reindex(self.codes)[self.fields].to_numpy(dtype=np.float64)
+        if self.base is None:
+            self.base, self.base_time, self.current = matrix.copy(), time, matrix
+            return 0
+
+        changed = ~((matrix == self.current) | (np.isnan(matrix) & np.isnan(self.current)))
+        rows, cols = np.nonzero(changed)
+        self.deltas.append(SnapshotDelta(
+            time=time,
+            rows=rows.astype(np.int32),
+            cols=cols.astype(np.uint8),
+            values=matrix[rows, cols]
+        ))
+        self._times.append(time)
+        self.current = matrix
+
+        if len(self.deltas) > self.capacity:
+            oldest = self.deltas.pop(0)
+            self._times.pop(0)
+            self.base[oldest.rows, oldest.cols] = oldest.values
+            self.base_time = oldest.time
+        return len(rows)
+
+    def as_of(self, time: datetime) -> Optional[Tuple[pd.Timestamp, np.ndarray]]:
+        """
+        重建指定时间的快照
+
+        Args:
+            time: 时间点，取该时间点及之前最近的一份快照
+
+        Returns:
+            Optional[Tuple[pd.Timestamp, np.ndarray]]: 快照时间和以codes为行、fields为列的数值矩阵，
+            时间早于窗口内最早的快照时返回None
+        """
+        if self.base_time is None or time < self.base_time:
+            return None
+        count = bisect.bisect_right(self._times, time)
+        if count == len(self.deltas):
+            return self._times[-1] if count else self.base_time, self.current.copy()
+        matrix = self.base.copy()
+        for delta in self.deltas[:count]:
+            matrix[delta.rows, delta.cols] = delta.values
+        return self._times[count - 1] if count else self.base_time, matrix
+
+    def series(self, code: str) -> Optional[np.ndarray]:
+        """
+        股票在窗口内每份快照中的字段值
+
+        每份增量的行号有序，通过二分查找定位该股票的变化，不需要重建完整快照。
+
+        Args:
+            code: 股票代码
+
+        Returns:
+            Optional[np.ndarray]: 以快照为行(与times一致)、fields为列的数值矩阵，股票未出现过时返回None
+        """
+        if self.base is None or code not in self.codes:
+            return None
+        row = self.codes.get_loc(code)
+        values = np.empty((len(self.deltas) + 1, len(self.fields)))
+        values[0] = self.base[row]
+        for i, delta in enumerate(self.deltas, start=1):
+            values[i] = values[i - 1]
+            start, end = np.searchsorted(delta.rows, [row, row + 1])
+            values[i, delta.cols[start:end]] = delta.values[start:end]
+        return values
+
+
+class SpotHistoryService:
+    """
+    全市场行情历史服务
+
+    后台任务跟随全市场行情快照缓存的刷新，把每份快照记录进SpotHistory，在第一次使用时启动并持续运行，
+    与行情查询和推送接口共用同一份快照缓存，不额外访问上游。窗口长度约为
+    SPOT_HISTORY_SIZE * SPOT_CACHE_EXPIRATION秒。
+    """
+
+    def __init__(self):
+        """初始化SpotHistoryService，创建服务实例"""
+        self.stock_service = StockService()
+        self.history = SpotHistory(SPOT_HISTORY_FIELDS, settings.SPOT_HISTORY_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    def _record(self, entry: CacheEntry) -> None:
+        """记录刷新后的快照"""
+        changed = self.history.record(entry.value)
+        self._ready.set()
+        logger.debug(
+            f"行情历史记录快照: 变化{changed}个单元格, "
+            f"共{len(self.history.times)}份, 占用{self.history.nbytes // 1024}KB"
+        )
+
+    async def _ensure_started(self) -> None:
+        """确保记录任务在当前事件循环中运行，并等待第一份快照记录完成"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(follow_cache_entry(
+                self.stock_service.get_spot_frame,
+                self._record,
+                lambda: True,
+                settings.SPOT_CACHE_EXPIRATION
+            ))
+            logger.info("行情历史记录任务启动")
+        try:
+            await asyncio.wait_for(self._ready.wait(), settings.BATCH_ITEM_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("行情历史首次记录超时")
+
+    def _window_error(self) -> str:
+        """窗口范围的说明，用于时间超出窗口时的错误信息"""
+        times = self.history.times
+        if not times:
+            return "尚未记录行情快照"
+        return f"行情历史只保留{times[0]:%Y-%m-%d %H:%M:%S}至{times[-1]:%Y-%m-%d %H:%M:%S}的快照"
+
+    async def get_spot_as_of(
+        self,
+        at: Optional[datetime] = None,
+        ago: Optional[float] = None,
+        stock_codes: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        获取指定时间的全市场行情快照
+
+        Args:
+            at: 时间点，取该时间点及之前最近的一份快照
+            ago: 距现在的秒数，与at二选一，在记录任务启动后才换算为时间点
+            stock_codes: 股票代码列表，可带市场前缀，为None时返回全市场
+
+        Returns:
+            pd.DataFrame: 列名与StockQuote字段一致的快照，update_time为快照时间，不含当时不在快照中的股票
+
+        Raises:
+            ValueError: 未指定或同时指定at和ago，或时间早于窗口内最早的快照时抛出
+        """
+        if (at is None) == (ago is None):
+            raise ValueError("请指定at或ago其中之一")
+        await self._ensure_started()
+        time = at if at is not None else datetime.now() - timedelta(seconds=ago)
+        history = self.history
+        result = history.as_of(time)
+        if result is None:
+            raise ValueError(f"没有{time:%Y-%m-%d %H:%M:%S}的行情快照，{self._window_error()}")
+        snapshot_time, matrix = result
+
+        codes = history.codes
+        if stock_codes is not None:
+            positions = codes.get_indexer(list(dict.fromkeys(normalize_stock_code(code) for code in stock_codes)))
+            positions = positions[positions >= 0]
+            codes, matrix = codes[positions], matrix[positions]
+
+        frame = pd.DataFrame(matrix, columns=history.fields)
+        frame.insert(0, "code", codes.to_numpy())
+        frame.insert(1, "name", frame["code"].map(history.names))
+        frame = frame[~np.isnan(matrix).all(axis=1)].reset_index(drop=True)
+        frame["volume"] = frame["volume"].astype("int64")
+        frame["update_time"] = snapshot_time
+        return frame
+
+    async def get_stock_spot_series(
+        self,
+        stock_code: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        获取个股在行情历史窗口内的快照序列
+
+        Args:
+            stock_code: 股票代码，可带市场前缀
+            start: 开始时间，为None时从窗口内最早的快照开始
+            end: 结束时间，为None时到最新的快照为止
+
+        Returns:
+            pd.DataFrame: 每份快照一行，列为update_time和行情字段
+
+        Raises:
+            ValueError: 股票从未出现在记录的快照中时抛出
+        """
+        await self._ensure_started()
+        code = normalize_stock_code(stock_code)
+        values = self.history.series(code)
+        if values is None:
+            raise ValueError(f"行情历史中没有股票代码 {code} 的数据")
+
+        frame = pd.DataFrame(values, columns=self.history.fields)
+        frame.insert(0, "update_time", pd.DatetimeIndex(self.history.times))
+        frame = frame[~np.isnan(values).all(axis=1)]
+        if start is not None:
+            frame = frame[frame["update_time"] >= start]
+        if end is not None:
+            frame = frame[frame["update_time"] <= end]
+        frame["volume"] = frame["volume"].astype("int64")
+        return frame.reset_index(drop=True)
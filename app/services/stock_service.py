@@ -1,23 +1,77 @@
 import akshare as ak
+import numpy as np
 import pandas as pd  # 添加pandas导入
+import time
 from datetime import datetime, timedelta  # 添加timedelta导入
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 # 更新导入语句
-from app.models.stock_models import StockInfo, StockQuote, StockFinancial, StockFundFlow, StockHistory
+from app.models.common_models import BatchItemError
+from app.models.stock_models import StockInfo, StockInfoBatch, StockQuote, StockQuoteBatch, StockFinancial, StockFundFlow, StockHistory
+from app.services.sentiment_service import SentimentService
 from app.utils.akshare_wrapper import handle_akshare_exception
+from app.utils.bars import adjust_bars, ex_dividend_dates, history_fetch_start, parse_period, resample_bars
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.cache import cache_result
+from app.utils.cache import cache_result, invalidate_cache
+from app.utils.columnar import rename_columns, numeric_column, date_column, frame_to_records
+from app.utils.concurrency import gather_limited, iter_limited, run_sync
+from app.utils.symbols import normalize_stock_code, with_market_prefix
 
 logger = get_logger(__name__)
 
+# 历史行情DataFrame列名到StockHistory字段的映射
+HISTORY_COLUMNS = {
+    "日期": "trade_date",
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+    "振幅": "amplitude",
+    "涨跌幅": "change_percent",
+    "涨跌额": "change_amount",
+    "换手率": "turnover",
+}
+
+# 全市场实时行情DataFrame列名到StockQuote字段的映射
+SPOT_COLUMNS = {
+    "代码": "code",
+    "名称": "name",
+    "最新价": "price",
+    "涨跌额": "change",
+    "涨跌幅": "change_percent",
+    "今开": "open",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+    "换手率": "turnover_rate",
+    "量比": "volume_ratio",
+    "市盈率-动态": "pe_ratio",
+    "市净率": "pb_ratio",
+    "总市值": "market_cap",
+}
+
+# 因新的除权除息日重新获取复权因子后因子源仍未更新的股票，及对应日期和可再次获取的时间，避免反复获取
+_factor_retry: Dict[str, Tuple[str, float]] = {}
+
+# StockQuote中的可选数值字段，缺失时保留为None，其余数值字段缺失时(如停牌)置0
+NULLABLE_SPOT_FIELDS = ("volume_ratio", "pe_ratio", "pb_ratio", "market_cap")
+
+
 class StockService:
+    def __init__(self):
+        """初始化StockService，创建服务实例"""
+        self.sentiment_service = SentimentService()
+    
     @cache_result()
     @handle_akshare_exception
     async def get_stock_info(self, stock_code: str) -> StockInfo:
         """获取个股基本信息"""
         logger.info(f"获取个股基本信息: {stock_code}")
-        # 调用AKShare接口获取个股基本信息
-        stock_info = ak.stock_individual_info_em(symbol=stock_code)
+        # 调用AKShare接口获取个股基本信息，在线程池中执行以便批量请求并发获取
+        stock_info = await run_sync(ak.stock_individual_info_em, symbol=stock_code)
         
         # 处理数据并返回
         if stock_info.empty:
@@ -48,40 +102,105 @@ class StockService:
             circulating_share=float(info_dict.get("流通股", 0)) if info_dict.get("流通股") else None
         )
     
+    async def get_stock_infos(self, stock_codes: List[str]) -> StockInfoBatch:
+        """
+        批量获取个股基本信息
+        
+        已缓存的股票直接从缓存返回，其余股票以BATCH_CONCURRENCY为上限并发获取，
+        每只股票单独超时，单只股票失败不影响其他股票。
+        
+        Args:
+            stock_codes: 股票代码列表，可带市场前缀，重复的代码只返回一次
+            
+        Returns:
+            StockInfoBatch: 获取成功的个股基本信息(顺序与请求一致)和获取失败的股票代码及错误信息
+        """
+        codes = [normalize_stock_code(code) for code in stock_codes]
+        logger.info(f"批量获取个股基本信息: {len(set(codes))}只")
+        
+        results, errors = await gather_limited(codes, self.get_stock_info)
+        if errors:
+            logger.warning(f"批量获取个股基本信息失败{len(errors)}只: {', '.join(errors)}")
+        
+        return StockInfoBatch(
+            items=list(results.values()),
+            errors=[BatchItemError(key=code, error=error) for code, error in errors.items()]
+        )
+    
+    @cache_result(expire=settings.SPOT_CACHE_EXPIRATION)
+    @handle_akshare_exception
+    async def get_spot_frame(self) -> pd.DataFrame:
+        """
+        获取全市场实时行情快照(DataFrame)
+        
+        列名与StockQuote字段一致，update_time为快照时间。快照按SPOT_CACHE_EXPIRATION短时缓存，
+        缓存期内的单只和批量行情查询共用同一份快照，不再逐次下载全市场行情表。
+        
+        Returns:
+            pd.DataFrame: 全市场实时行情快照
+            
+        Raises:
+            ValueError: 当获取数据失败时抛出
+        """
+        logger.info("获取全市场实时行情快照")
+        
+        # 调用AKShare接口获取全市场实时行情
+        df = await run_sync(ak.stock_zh_a_spot_em)
+        
+        frame = rename_columns(df, SPOT_COLUMNS)
+        frame["code"] = frame["code"].astype(str)
+        for column in list(SPOT_COLUMNS.values())[2:]:
+            default = None if column in NULLABLE_SPOT_FIELDS else 0.0
+            frame[column] = numeric_column(frame[column], default)
+        frame["volume"] = frame["volume"].astype("int64")
+        frame["update_time"] = pd.Timestamp(datetime.now())
+        return frame.drop_duplicates("code").reset_index(drop=True)
+    
     @handle_akshare_exception
     async def get_stock_quote(self, stock_code: str) -> StockQuote:
         """获取个股实时行情"""
         logger.info(f"获取个股实时行情: {stock_code}")
         
-        # 调用AKShare接口获取个股实时行情
-        stock_quote = ak.stock_zh_a_spot_em()
-        
-        # 筛选指定股票并处理数据
-        stock_data = stock_quote[stock_quote['代码'] == stock_code]
+        # 从全市场行情快照中筛选指定股票
+        spot = await self.get_spot_frame()
+        stock_data = spot[spot["code"] == normalize_stock_code(stock_code)]
         if stock_data.empty:
             logger.warning(f"未找到股票代码 {stock_code} 的行情数据")
             raise ValueError(f"未找到股票代码 {stock_code} 的行情数据")
         
-        # 获取第一行数据
-        row = stock_data.iloc[0]
+        return StockQuote(**frame_to_records(stock_data)[0])
+    
+    @handle_akshare_exception
+    async def get_stock_quotes(self, stock_codes: List[str]) -> StockQuoteBatch:
+        """
+        批量获取个股实时行情
+        
+        所有行情取自同一份全市场快照，保证数据时点一致。
         
-        # 创建并返回StockQuote对象，确保包含所有必需字段
-        return StockQuote(
-            code=stock_code,
-            name=row['名称'],
-            price=float(row['最新价']),
-            change=float(row['涨跌额']),
-            change_percent=float(row['涨跌幅']),
-            open=float(row['今开']),
-            high=float(row['最高']),
-            low=float(row['最低']),
-            volume=int(row['成交量']),
-            amount=float(row['成交额']),
-            turnover_rate=float(row['换手率']),
-            pe_ratio=float(row['市盈率-动态']) if '市盈率-动态' in row and not pd.isna(row['市盈率-动态']) else None,
-            pb_ratio=float(row['市净率']) if '市净率' in row and not pd.isna(row['市净率']) else None,
-            market_cap=float(row['总市值']) if '总市值' in row and not pd.isna(row['总市值']) else None,
-            update_time=datetime.now()
+        Args:
+            stock_codes: 股票代码列表，可带市场前缀，重复的代码只返回一次
+            
+        Returns:
+            StockQuoteBatch: 行情列表(顺序与请求一致)和快照中不存在的股票代码
+            
+        Raises:
+            ValueError: 当获取数据失败时抛出
+        """
+        codes = list(dict.fromkeys(normalize_stock_code(code) for code in stock_codes))
+        logger.info(f"批量获取个股实时行情: {len(codes)}只")
+        
+        spot = await self.get_spot_frame()
+        positions = pd.Index(spot["code"]).get_indexer(codes)
+        found = positions >= 0
+        quotes = frame_to_records(spot.iloc[positions[found]])
+        not_found = [code for code, matched in zip(codes, found) if not matched]
+        if not_found:
+            logger.warning(f"未找到股票代码 {', '.join(not_found)} 的行情数据")
+        
+        return StockQuoteBatch(
+            quotes=[StockQuote(**record) for record in quotes],
+            not_found=not_found,
+            update_time=spot["update_time"].iloc[0] if not spot.empty else datetime.now()
         )
     
     @handle_akshare_exception
@@ -105,23 +224,26 @@ class StockService:
         # 处理数据并返回
         pass
     
-    @cache_result()
     @handle_akshare_exception
     async def get_stock_history(
         self, 
         stock_code: str, 
         period: str = "daily", 
         start_date: Optional[str] = None, 
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
     ) -> List[StockHistory]:
         """
         获取个股历史行情数据
         
+        复权时缓存键包含最新复权因子的日期，复权因子因新的除权除息日更新后不再命中之前缓存的复权价格。
+        
         Args:
             stock_code: 股票代码，如"000001"
-            period: 周期，可选 daily(日线), weekly(周线), monthly(月线)
+            period: 周期，可选 daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)
             start_date: 开始日期，格式YYYYMMDD，如"20210101"
             end_date: 结束日期，格式YYYYMMDD，如"20210630"
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)，默认前复权
             
         Returns:
             List[StockHistory]: 历史行情数据列表
@@ -129,11 +251,73 @@ class StockService:
         Raises:
             ValueError: 当获取数据失败或参数错误时抛出
         """
-        logger.info(f"获取个股历史行情: {stock_code}, 周期: {period}, 开始日期: {start_date}, 结束日期: {end_date}")
+        factor_date = ""
+        if adjust in ("qfq", "hfq"):
+            factors = await self.get_adjust_factors(normalize_stock_code(stock_code))
+            factor_date = factors["date"].iloc[-1]
+        return await self.get_adjusted_history(stock_code, period, start_date, end_date, adjust, factor_date)
+    
+    @cache_result()
+    @handle_akshare_exception
+    async def get_adjusted_history(
+        self,
+        stock_code: str,
+        period: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        adjust: str,
+        factor_date: str
+    ) -> List[StockHistory]:
+        """
+        获取个股历史行情数据，参数同get_stock_history
         
-        # 标准化股票代码（去掉市场前缀）
-        if stock_code.startswith(("sh", "sz", "bj")):
-            stock_code = stock_code[2:]
+        Args:
+            factor_date: 最新复权因子的日期(YYYY-MM-DD)，不复权时为空字符串，只用于区分缓存
+            
+        Returns:
+            List[StockHistory]: 历史行情数据列表
+        """
+        df = await self.get_stock_history_frame(stock_code, period, start_date, end_date, adjust)
+        
+        # 将DataFrame转换为StockHistory对象列表
+        return [StockHistory(**record) for record in frame_to_records(df)]
+    
+    @handle_akshare_exception
+    async def get_stock_history_frame(
+        self, 
+        stock_code: str, 
+        period: str = "daily", 
+        start_date: Optional[str] = None, 
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """
+        获取个股历史行情数据(DataFrame)
+        
+        列名与StockHistory字段一致，供列式、Arrow和Parquet格式输出直接使用。
+        只从上游获取并缓存不复权的日K线和复权因子，前复权、后复权在本地按因子计算，
+        周线、月线、季线和N日线由复权后的日K线在本地合成，
+        开始日期所在的周期会补齐该周期内开始日期之前的交易日，与上游的周期划分一致。
+        日K线从history_fetch_start对齐的季度第一天开始获取后再截取，不同周期的同一请求区间共享一份缓存；
+        N日线按交易日历划分，需要获取交易日历。
+        
+        Args:
+            stock_code: 股票代码，如"000001"
+            period: 周期，可选 daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)
+            start_date: 开始日期，格式YYYYMMDD，如"20210101"
+            end_date: 结束日期，格式YYYYMMDD，如"20210630"
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)，默认前复权
+            
+        Returns:
+            pd.DataFrame: 历史行情数据
+            
+        Raises:
+            ValueError: 当获取数据失败或参数错误时抛出
+        """
+        days = parse_period(period)
+        if adjust not in ("", "qfq", "hfq"):
+            raise ValueError(f"不支持的复权方式: {adjust}")
+        stock_code = normalize_stock_code(stock_code)
         
         # 设置默认日期范围（如果未提供）
         if not start_date:
@@ -143,42 +327,236 @@ class StockService:
         if not end_date:
             end_date = datetime.now().strftime("%Y%m%d")
         
-        # 调用AKShare接口获取历史行情数据，使用前复权(qfq)
-        df = ak.stock_zh_a_hist(
+        # 日K线包含开始日期所在周期的第一天，合成后去掉结束于开始日期之前的K线
+        start = pd.Timestamp(start_date)
+        calendar = await self.get_trade_calendar() if days is not None and days > 1 else None
+        daily = await self.get_daily_history_frame(
+            stock_code, history_fetch_start(start, period, calendar).strftime("%Y%m%d"), end_date
+        )
+        bars = resample_bars(await self.adjust_history_frame(stock_code, daily, adjust), period, calendar)
+        bars = bars[bars["trade_date"].to_numpy() >= start.strftime("%Y-%m-%d")].reset_index(drop=True)
+        if bars.empty:
+            raise ValueError(f"未找到股票代码 {stock_code} 的历史行情数据")
+        return bars
+    
+    async def get_trade_calendar(self) -> np.ndarray:
+        """
+        获取A股交易日历，用于N日线的划分
+        
+        Returns:
+            np.ndarray: 按日期升序排列的交易日(datetime64)
+        """
+        trade_dates = await self.sentiment_service.get_trade_dates()
+        return pd.to_datetime(pd.Series(trade_dates), format="%Y%m%d").to_numpy()
+    
+    @cache_result()
+    @handle_akshare_exception
+    async def get_daily_history_frame(
+        self, 
+        stock_code: str, 
+        start_date: str, 
+        end_date: str
+    ) -> pd.DataFrame:
+        """
+        获取个股不复权日K线(DataFrame)，复权和其他周期的K线均由其在本地计算
+        
+        Args:
+            stock_code: 股票代码，如"000001"
+            start_date: 开始日期，格式YYYYMMDD，如"20210101"
+            end_date: 结束日期，格式YYYYMMDD，如"20210630"
+            
+        Returns:
+            pd.DataFrame: 按日期升序排列的日K线，列名与StockHistory字段一致
+            
+        Raises:
+            ValueError: 当获取数据失败时抛出
+        """
+        logger.info(f"获取个股不复权日K线: {stock_code}, 开始日期: {start_date}, 结束日期: {end_date}")
+        
+        # 标准化股票代码（去掉市场前缀）
+        if stock_code.startswith(("sh", "sz", "bj")):
+            stock_code = stock_code[2:]
+        
+        # 调用AKShare接口获取历史行情数据，在线程池中执行以便多只股票并发获取
+        df = await run_sync(
+            ak.stock_zh_a_hist,
             symbol=stock_code, 
-            period=period, 
+            period="daily", 
             start_date=start_date, 
             end_date=end_date,
-            adjust="qfq"  # 使用前复权数据
+            adjust=""
         )
         
         if df.empty:
             logger.warning(f"未找到股票代码 {stock_code} 的历史行情数据")
             raise ValueError(f"未找到股票代码 {stock_code} 的历史行情数据")
         
-        # 将DataFrame转换为StockHistory对象列表
-        result = []
-        for _, row in df.iterrows():
-            # 确保日期是字符串类型
-            if isinstance(row["日期"], (datetime, pd.Timestamp, pd.DatetimeIndex)):
-                trade_date_str = row["日期"].strftime("%Y-%m-%d")
+        # 按列转换为与StockHistory字段一致的DataFrame
+        frame = rename_columns(df, HISTORY_COLUMNS)
+        frame["trade_date"] = date_column(frame["trade_date"])  # 确保日期是字符串类型
+        frame.insert(0, "stock_code", stock_code)
+        return frame.astype({
+            "open": "float64", "close": "float64", "high": "float64", "low": "float64",
+            "volume": "int64", "amount": "float64", "amplitude": "float64",
+            "change_percent": "float64", "change_amount": "float64", "turnover": "float64",
+        })
+    
+    @cache_result(expire=settings.ADJUST_FACTOR_CACHE_EXPIRATION)
+    @handle_akshare_exception
+    async def get_adjust_factors(self, stock_code: str) -> pd.DataFrame:
+        """
+        获取个股后复权因子(DataFrame)
+        
+        因子只在除权除息日变化，每行为一个除权除息日及当日起生效的后复权因子。
+        后复权价格为不复权价格乘以当日因子，前复权价格再除以最新因子。
+        
+        Args:
+            stock_code: 股票代码，如"000001"
+            
+        Returns:
+            pd.DataFrame: 按日期升序排列的date(YYYY-MM-DD)和hfq_factor
+            
+        Raises:
+            ValueError: 当获取数据失败时抛出
+        """
+        logger.info(f"获取个股复权因子: {stock_code}")
+        
+        # 调用AKShare接口(新浪)获取后复权因子，需要小写的市场前缀
+        df = await run_sync(ak.stock_zh_a_daily, symbol=with_market_prefix(stock_code).lower(), adjust="hfq-factor")
+        
+        frame = pd.DataFrame({
+            "date": date_column(df["date"]),
+            "hfq_factor": numeric_column(df["hfq_factor"]),
+        }).dropna()
+        if frame.empty:
+            raise ValueError(f"未找到股票代码 {stock_code} 的复权因子")
+        return frame.sort_values("date").drop_duplicates("date", keep="last").reset_index(drop=True)
+    
+    async def adjust_history_frame(self, stock_code: str, daily: pd.DataFrame, adjust: str) -> pd.DataFrame:
+        """
+        按复权因子计算复权后的日K线
+        
+        不复权日K线中出现晚于缓存因子中最后一个除权除息日的除权除息日时，说明缓存的因子已过期，
+        重新获取复权因子，使前复权价格随新的除权除息自动更新。
+        因子源尚未包含该除权除息日时，间隔CACHE_EXPIRATION后再重新获取。
+        
+        Args:
+            stock_code: 股票代码，不带市场前缀
+            daily: 不复权日K线
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            
+        Returns:
+            pd.DataFrame: 复权后的日K线，不复权时为原DataFrame
+        """
+        if not adjust:
+            return daily
+        factors = await self.get_adjust_factors(stock_code)
+        
+        ex_dates = ex_dividend_dates(daily)
+        retry = _factor_retry.get(stock_code)
+        if (
+            len(ex_dates) and ex_dates[-1] > factors["date"].iloc[-1]
+            and (retry is None or retry[0] != ex_dates[-1] or time.monotonic() >= retry[1])
+        ):
+            # 先记录再获取，获取失败时同样间隔一段时间再重试
+            _factor_retry[stock_code] = (ex_dates[-1], time.monotonic() + settings.CACHE_EXPIRATION)
+            logger.info(f"股票 {stock_code} 出现新的除权除息日 {ex_dates[-1]}，重新获取复权因子")
+            invalidate_cache(self.get_adjust_factors, stock_code)
+            factors = await self.get_adjust_factors(stock_code)
+            if factors["date"].iloc[-1] >= ex_dates[-1]:
+                _factor_retry.pop(stock_code, None)
+            else:
+                logger.warning(f"股票 {stock_code} 的复权因子尚未包含除权除息日 {ex_dates[-1]}，稍后重新获取")
+        
+        return adjust_bars(daily, factors["date"].to_numpy(), factors["hfq_factor"].to_numpy(), adjust)
+    
+    async def get_stock_history_frames(
+        self,
+        stock_codes: List[str],
+        period: str = "daily",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        批量获取多只股票的历史行情数据(DataFrame)
+        
+        已缓存的股票直接从缓存返回，其余股票以BATCH_CONCURRENCY为上限并发获取。
+        
+        Args:
+            stock_codes: 股票代码列表，可带市场前缀
+            period: 周期，可选 daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)
+            start_date: 开始日期，格式YYYYMMDD
+            end_date: 结束日期，格式YYYYMMDD
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+            
+        Returns:
+            Tuple[Dict[str, pd.DataFrame], Dict[str, str]]: 按请求顺序排列的各股票历史行情，
+            以及获取失败的股票代码和错误信息
+        """
+        codes = [normalize_stock_code(code) for code in stock_codes]
+        logger.info(f"批量获取个股历史行情: {len(set(codes))}只, 周期: {period}, 开始日期: {start_date}, 结束日期: {end_date}")
+        frames, errors = await gather_limited(
+            codes, lambda code: self.get_stock_history_frame(code, period, start_date, end_date, adjust)
+        )
+        if errors:
+            logger.warning(f"批量获取个股历史行情失败{len(errors)}只: {', '.join(errors)}")
+        return frames, errors
+    
+    def iter_stock_history_frames(
+        self,
+        stock_codes: List[str],
+        period: str = "daily",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> AsyncIterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+        """
+        批量获取多只股票的历史行情数据，按获取完成的顺序逐只产出
+        
+        参数含义同get_stock_history_frames，用于流式输出。
+        
+        Returns:
+            AsyncIterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]: 股票代码、历史行情和错误信息
+        """
+        codes = [normalize_stock_code(code) for code in stock_codes]
+        logger.info(f"流式批量获取个股历史行情: {len(set(codes))}只, 周期: {period}, 开始日期: {start_date}, 结束日期: {end_date}")
+        return iter_limited(
+            codes, lambda code: self.get_stock_history_frame(code, period, start_date, end_date, adjust)
+        )
+    
+    @staticmethod
+    def history_panel(frames: Dict[str, pd.DataFrame], field: str = "close") -> pd.DataFrame:
+        """
+        将多只股票的历史行情转换为宽表
+        
+        Args:
+            frames: 股票代码到历史行情DataFrame的映射
+            field: 宽表中的取值字段，如close、volume
+            
+        Returns:
+            pd.DataFrame: 第一列为trade_date，其余每列为一只股票，按交易日期升序排列，
+            某只股票在某日无数据时为NaN
+            
+        Raises:
+            ValueError: 字段不存在时抛出
+        """
+        if field not in HISTORY_COLUMNS.values() or field == "trade_date":
+            raise ValueError(f"不支持的宽表字段: {field}")
+        if not frames:
+            return pd.DataFrame(columns=["trade_date"])
+        # 所有股票的交易日期一次编码为并集中的位置，再逐列按位置填值，避免逐只股票对齐索引
+        positions, dates = pd.factorize(pd.concat([frame["trade_date"] for frame in frames.values()]), sort=True)
+        panel = {"trade_date": dates}
+        start = 0
+        for code, frame in frames.items():
+            column = frame[field]
+            if pd.api.types.is_integer_dtype(column.dtype) and len(column) == len(dates):
+                # 覆盖全部交易日的整数列(如成交量)保留整数类型
+                values = np.zeros(len(dates), dtype=np.int64)
             else:
-                trade_date_str = str(row["日期"])
-            
-            history = StockHistory(
-                stock_code=stock_code,
-                trade_date=trade_date_str,  # 使用字符串格式的日期
-                open=float(row["开盘"]),
-                close=float(row["收盘"]),
-                high=float(row["最高"]),
-                low=float(row["最低"]),
-                volume=int(row["成交量"]),
-                amount=float(row["成交额"]),
-                amplitude=float(row["振幅"]),
-                change_percent=float(row["涨跌幅"]),
-                change_amount=float(row["涨跌额"]),
-                turnover=float(row["换手率"])
-            )
-            result.append(history)
-        
-        return result
\ No newline at end of file
+                values = np.full(len(dates), np.nan)
+            values[positions[start:start + len(column)]] = column.to_numpy()
+            panel[code] = values
+            start += len(column)
+        return pd.DataFrame(panel)
@@ -1,71 +1,211 @@
-import akshare as ak
 import pandas as pd
-from datetime import datetime, date
-from typing import List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from app.models.technical_models import ChipDistribution
-from app.utils.akshare_wrapper import handle_akshare_exception
+from app.services.stock_service import StockService
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.utils.cache import cache_result
+from app.utils.cache import cache_result, get_cache_entry
+from app.utils.concurrency import gather_limited
+from app.utils.chips import CHIP_OUTPUT_DAYS, CHIP_WINDOW, ChipState, compute_chips
+from app.utils.indicators import IndicatorParams, IndicatorState, compute_indicators
+from app.utils.symbols import normalize_stock_code
 
 logger = get_logger(__name__)
 
+# 技术指标结果中K线的比较字段，用于判断已计算的K线是否仍与最新行情一致(如复权因子变化)
+INDICATOR_BAR_FIELDS = ["trade_date", "high", "low", "close"]
+
+
+@dataclass
+class IndicatorSeries:
+    """已计算的技术指标，不含最后一根可能仍在变化的K线"""
+    bars: pd.DataFrame
+    indicators: pd.DataFrame
+    state: IndicatorState
+
+
+# 技术指标的增量计算状态，键为股票代码、周期、开始日期、复权方式和指标参数，按LRU顺序保存
+_indicator_series: "OrderedDict[tuple, IndicatorSeries]" = OrderedDict()
+
+# 筹码分布计算使用的K线字段，也用于判断已计算的K线是否仍与最新行情一致
+CHIP_BAR_FIELDS = ["trade_date", "open", "close", "high", "low", "turnover"]
+
+
+@dataclass
+class ChipSeries:
+    """已计算的筹码分布，不含最后一根可能仍在变化的K线"""
+    bars: pd.DataFrame
+    chips: pd.DataFrame
+    state: ChipState
+
+
+# 筹码分布的增量计算状态，键为股票代码和复权方式，按LRU顺序保存
+_chip_series: "OrderedDict[tuple, ChipSeries]" = OrderedDict()
+
 class TechnicalService:
     """技术指标服务"""
     
-    # ... 保留现有的方法 ...
+    def __init__(self):
+        """初始化TechnicalService，创建服务实例"""
+        self.stock_service = StockService()
+    
+    async def get_indicators(
+        self,
+        symbol: str,
+        params: IndicatorParams = IndicatorParams(),
+        period: str = "daily",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """
+        计算个股的技术指标
+        
+        K线取自get_stock_history_frame的缓存。每个股票、周期、开始日期、复权方式和参数组合保留
+        计算到倒数第二根K线后的状态，有新K线或最后一根K线变化时只计算之后的K线；
+        已计算的K线与最新行情不一致(如除权后前复权价格变化)时从头计算。
+        
+        Args:
+            symbol: 股票代码，可带市场前缀
+            params: 技术指标参数
+            period: 周期，可选 daily(日线), weekly(周线), monthly(月线), quarterly(季线), Nd(每N个交易日，如5d)
+            start_date: 开始日期，格式YYYYMMDD，默认为上一年的1月1日，递推类指标从该日开始计算
+            end_date: 结束日期，格式YYYYMMDD，默认为当天
+            adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)，默认前复权
+            
+        Returns:
+            pd.DataFrame: 每根K线一行，列为trade_date、stock_code、close和各指标
+            
+        Raises:
+            ValueError: 获取K线失败时抛出
+        """
+        code = normalize_stock_code(symbol)
+        start_date = start_date or f"{datetime.now().year - 1}0101"
+        bars = await self.stock_service.get_stock_history_frame(code, period, start_date, end_date, adjust)
+        
+        key = (code, period, start_date, adjust, params)
+        series = _indicator_series.get(key)
+        done = len(series.bars) if series is not None else 0
+        if done == 0 or len(bars) <= done or not bars[INDICATOR_BAR_FIELDS].iloc[done - 1].equals(series.bars.iloc[-1]):
+            series, done = None, 0
+        logger.info(f"计算技术指标: {code}, 周期: {period}, K线{len(bars)}根, 新计算{len(bars) - done}根")
+        
+        # 最后一根K线可能是仍在变化的当日K线，其之前的K线计算后保存状态
+        rest = bars.iloc[done:]
+        settled, state = compute_indicators(
+            rest["high"].to_numpy()[:-1], rest["low"].to_numpy()[:-1], rest["close"].to_numpy()[:-1],
+            params, series.state if series is not None else None
+        )
+        latest, _ = compute_indicators(
+            rest["high"].to_numpy()[-1:], rest["low"].to_numpy()[-1:], rest["close"].to_numpy()[-1:], params, state
+        )
+        settled = pd.DataFrame(settled)
+        if series is not None:
+            settled = pd.concat([series.indicators, settled], ignore_index=True)
+        _indicator_series[key] = IndicatorSeries(
+            bars=bars[INDICATOR_BAR_FIELDS].iloc[:-1].reset_index(drop=True),
+            indicators=settled,
+            state=state
+        )
+        _indicator_series.move_to_end(key)
+        while len(_indicator_series) > settings.INDICATOR_CACHE_MAX_ENTRIES:
+            _indicator_series.popitem(last=False)
+        
+        indicators = pd.concat([settled, pd.DataFrame(latest)], ignore_index=True)
+        result = bars[["trade_date", "stock_code", "close"]].reset_index(drop=True)
+        return pd.concat([result, indicators], axis=1)
     
     @cache_result()
-    @handle_akshare_exception
     async def get_chip_distribution(self, symbol: str, adjust: str = "") -> List[ChipDistribution]:
         """
         获取股票筹码分布数据
         
+        由最近CHIP_WINDOW根日K线在本地计算，算法与东方财富(AKShare stock_cyq_em)一致，返回最近CHIP_OUTPUT_DAYS个交易日。
+        K线取自get_stock_history_frame的缓存。每个股票和复权方式保留计算到倒数第二根K线后的状态，
+        窗口的起始K线不变且已计算的K线与最新行情一致时(如盘中当日K线更新)只计算之后的K线，否则从头计算。
+        
         Args:
             symbol: 股票代码，如"000001"
             adjust: 复权类型，可选值为"qfq"(前复权)、"hfq"(后复权)、""(不复权)，默认为不复权
             
         Returns:
             List[ChipDistribution]: 筹码分布数据列表
+            
+        Raises:
+            ValueError: 获取K线失败时抛出
         """
-        logger.info(f"获取股票筹码分布数据: {symbol}, 复权类型: {adjust}")
+        code = normalize_stock_code(symbol)
+        end = datetime.now()
+        # 按自然日多取一些，保证包含CHIP_WINDOW个交易日
+        bars = await self.stock_service.get_stock_history_frame(
+            code, "daily", (end - timedelta(days=CHIP_WINDOW * 2)).strftime("%Y%m%d"), end.strftime("%Y%m%d"), adjust
+        )
+        bars = bars.iloc[-CHIP_WINDOW:].reset_index(drop=True)
         
-        # 标准化股票代码（去掉市场前缀）
-        if symbol.startswith(("sh", "sz", "bj")):
-            symbol = symbol[2:]
+        key = (code, adjust)
+        series = _chip_series.get(key)
+        done = len(series.bars) if series is not None else 0
+        if done == 0 or len(bars) <= done or not bars[CHIP_BAR_FIELDS].iloc[:done].equals(series.bars):
+            series, done = None, 0
+        logger.info(f"计算股票筹码分布: {code}, 复权类型: {adjust}, K线{len(bars)}根, 新计算{len(bars) - done}根")
         
-        try:
-            # 调用AKShare接口获取筹码分布数据
-            df = ak.stock_cyq_em(symbol=symbol, adjust=adjust)
-            
-            if df.empty:
-                logger.warning(f"未获取到股票 {symbol} 的筹码分布数据")
-                return []
-            
-            # 将DataFrame转换为ChipDistribution对象列表
-            result = []
-            for _, row in df.iterrows():
-                # 确保日期是字符串类型
-                if isinstance(row["日期"], (datetime, pd.Timestamp, pd.DatetimeIndex, date)):
-                    trade_date_str = row["日期"].strftime("%Y-%m-%d")
-                else:
-                    trade_date_str = str(row["日期"])
-                
-                chip = ChipDistribution(
-                    trade_date=trade_date_str,  # 使用转换后的字符串
-                    stock_code=symbol,
-                    profit_ratio=float(row["获利比例"]),
-                    avg_cost=float(row["平均成本"]),
-                    cost_90_low=float(row["90成本-低"]),
-                    cost_90_high=float(row["90成本-高"]),
-                    concentration_90=float(row["90集中度"]),
-                    cost_70_low=float(row["70成本-低"]),
-                    cost_70_high=float(row["70成本-高"]),
-                    concentration_70=float(row["70集中度"]),
-                    update_time=datetime.now()
-                )
-                result.append(chip)
+        # 最后一根K线可能是仍在变化的当日K线，其之前的K线计算后保存状态
+        rest = bars.iloc[done:]
+        columns = [rest[field].to_numpy() for field in CHIP_BAR_FIELDS[1:]]
+        settled, state = compute_chips(*[values[:-1] for values in columns], series.state if series is not None else None)
+        latest, _ = compute_chips(*[values[-1:] for values in columns], state)
+        settled = pd.DataFrame(settled)
+        if series is not None:
+            settled = pd.concat([series.chips, settled], ignore_index=True)
+        _chip_series[key] = ChipSeries(
+            bars=bars[CHIP_BAR_FIELDS].iloc[:-1].reset_index(drop=True),
+            chips=settled,
+            state=state
+        )
+        _chip_series.move_to_end(key)
+        while len(_chip_series) > settings.CHIP_CACHE_MAX_ENTRIES:
+            _chip_series.popitem(last=False)
+        
+        chips = pd.concat([settled, pd.DataFrame(latest)], ignore_index=True).iloc[-CHIP_OUTPUT_DAYS:]
+        trade_dates = bars["trade_date"].iloc[-CHIP_OUTPUT_DAYS:]
+        update_time = datetime.now()
+        return [
+            ChipDistribution(trade_date=trade_date, stock_code=code, update_time=update_time, **row)
+            for trade_date, row in zip(trade_dates, chips.to_dict(orient="records"))
+        ]
+    
+    async def get_chip_distribution_frame(self, symbols: List[str], adjust: str = "") -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        批量获取多只股票的筹码分布数据
+        
+        已缓存的股票直接复用缓存项及其DataFrame，其余股票以BATCH_CONCURRENCY为上限并发获取。
+        
+        Args:
+            symbols: 股票代码列表，可带市场前缀
+            adjust: 复权类型，可选值为"qfq"(前复权)、"hfq"(后复权)、""(不复权)，默认为不复权
             
-            return result
-        except Exception as e:
-            logger.error(f"获取股票筹码分布数据失败: {str(e)}")
-            raise ValueError(f"获取股票筹码分布数据失败: {str(e)}")
\ No newline at end of file
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, str]]: 各股票筹码分布合并后的DataFrame(按请求顺序排列)，
+            以及获取失败或无数据的股票代码和错误信息
+        """
+        codes = [normalize_stock_code(symbol) for symbol in symbols]
+        logger.info(f"批量获取股票筹码分布数据: {len(set(codes))}只, 复权类型: {adjust}")
+        entries, errors = await gather_limited(
+            codes, lambda code: get_cache_entry(self.get_chip_distribution, code, adjust)
+        )
+        
+        frames = []
+        for code, entry in entries.items():
+            if entry.value:
+                frames.append(entry.as_frame())
+            else:
+                errors[code] = "未找到筹码分布数据"
+        if errors:
+            logger.warning(f"批量获取股票筹码分布数据失败{len(errors)}只: {', '.join(errors)}")
+        
+        if not frames:
+            return pd.DataFrame(columns=list(ChipDistribution.model_fields)), errors
+        return pd.concat(frames, ignore_index=True), errors
\ No newline at end of file
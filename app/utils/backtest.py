@@ -0,0 +1,247 @@
+"""
+回测计算模块
+
+在日K线上按简单的信号规则向量化模拟多头持仓：
+1. 规则：形如"左 运算符 右"，左右为K线字段(open、high、low、close)、技术指标列名(如ma5、ema12、dif、dea、
+   macd、rsi6、boll_upper、k、d、j、atr14)或数值，运算符支持 >、>=、<、<=、cross_above(上穿)、cross_below(下穿)，
+   如 "ma5 cross_above ma20"、"rsi6 < 30"、"close > boll_upper"
+2. 入场条件全部满足时买入，离场条件任一满足时卖出，同一天同时满足时卖出；未指定离场条件时入场条件不再满足即卖出
+3. 信号在当日收盘产生并按收盘价成交，次日起计入持仓收益，买卖时按单边费率扣除成本
+
+技术指标的参数由规则中用到的列名确定，如ma5、ma20对应 ma=5,20，
+MACD、BOLL、KDJ使用默认参数。单只股票的模拟是模块级函数，可在进程池中执行。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.indicators import IndicatorParams, compute_indicators
+
+# 年化使用的交易日数
+TRADING_DAYS_PER_YEAR = 252
+
+# 规则中可用的K线字段
+BAR_FIELDS = ("open", "high", "low", "close")
+
+# 规则表达式
+_RULE_PATTERN = re.compile(
+    r"^\s*([A-Za-z_][A-Za-z0-9_.]*|-?\d+(?:\.\d+)?)\s+(>=|<=|>|<|cross_above|cross_below)\s+([A-Za-z_][A-Za-z0-9_.]*|-?\d+(?:\.\d+)?)\s*$"
+)
+
+# 带周期的指标列名
+_PERIOD_COLUMN = re.compile(r"^(ma|ema|rsi|atr)(\d+)$")
+
+# 使用默认参数的指标列名
+_FIXED_COLUMNS = {
+    "dif": "macd", "dea": "macd", "macd": "macd",
+    "boll_mid": "boll", "boll_upper": "boll", "boll_lower": "boll",
+    "k": "kdj", "d": "kdj", "j": "kdj",
+}
+
+
+@dataclass(frozen=True)
+class SignalRule:
+    """信号规则"""
+    left: str
+    op: str
+    right: str
+    raw: str
+
+    def operands(self) -> Tuple[str, ...]:
+        """规则中的列名(不含数值)"""
+        return tuple(operand for operand in (self.left, self.right) if not _is_number(operand))
+
+    def evaluate(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        在各列上计算规则每日是否满足，任一侧为NaN的日期不满足
+
+        Args:
+            columns: 列名到与K线等长的数组的映射
+
+        Returns:
+            np.ndarray: 布尔数组
+        """
+        length = len(columns["close"])
+        left, right = (
+            np.full(length, float(operand)) if _is_number(operand) else columns[operand]
+            for operand in (self.left, self.right)
+        )
+        with np.errstate(invalid="ignore"):
+            if self.op in ("cross_above", "cross_below"):
+                spread = left - right
+                previous = np.concatenate([[np.nan], spread[:-1]])
+                if self.op == "cross_above":
+                    return (previous <= 0) & (spread > 0)
+                return (previous >= 0) & (spread < 0)
+            return {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}[self.op](left, right)
+
+
+@dataclass
+class SymbolBacktest:
+    """单只股票的模拟结果，数组与K线等长"""
+    code: str
+    trade_dates: np.ndarray
+    returns: np.ndarray
+    position: np.ndarray
+    trade_returns: np.ndarray
+
+
+def _is_number(operand: str) -> bool:
+    """操作数是否为数值"""
+    try:
+        float(operand)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_rule(expression: str) -> SignalRule:
+    """
+    解析信号规则
+
+    Args:
+        expression: 规则表达式，如"ma5 cross_above ma20"
+
+    Returns:
+        SignalRule: 信号规则
+
+    Raises:
+        ValueError: 表达式格式错误或列名不支持时抛出
+    """
+    match = _RULE_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"无效的信号规则: {expression}，格式为\"左 运算符 右\"，如\"ma5 cross_above ma20\"")
+    rule = SignalRule(left=match.group(1), op=match.group(2), right=match.group(3), raw=expression)
+    if not rule.operands():
+        raise ValueError(f"信号规则至少需要一个K线字段或技术指标: {expression}")
+    for operand in rule.operands():
+        if operand not in BAR_FIELDS and operand not in _FIXED_COLUMNS and not _PERIOD_COLUMN.match(operand):
+            raise ValueError(f"信号规则中不支持的字段: {operand}")
+    return rule
+
+
+def rule_indicator_params(rules: Sequence[SignalRule]) -> IndicatorParams:
+    """
+    规则中用到的技术指标及其参数
+
+    Raises:
+        ValueError: 指标周期超出范围时抛出
+    """
+    periods: Dict[str, List[int]] = {"ma": [], "ema": [], "rsi": [], "atr": []}
+    indicators = set()
+    for rule in rules:
+        for operand in rule.operands():
+            match = _PERIOD_COLUMN.match(operand)
+            if match:
+                name, period = match.group(1), int(match.group(2))
+                if period < 1 or period > 250:
+                    raise ValueError(f"信号规则中的指标周期需在1到250之间: {operand}")
+                periods[name].append(period)
+                indicators.add(name)
+            elif operand in _FIXED_COLUMNS:
+                indicators.add(_FIXED_COLUMNS[operand])
+    if len(set(periods["atr"])) > 1:
+        raise ValueError(f"信号规则中只能使用一个ATR周期: {', '.join(f'atr{period}' for period in sorted(set(periods['atr'])))}")
+    defaults = IndicatorParams()
+    return IndicatorParams(
+        indicators=tuple(name for name in defaults.indicators if name in indicators),
+        ma=tuple(sorted(set(periods["ma"]))) or defaults.ma,
+        ema=tuple(sorted(set(periods["ema"]))) or defaults.ema,
+        rsi=tuple(sorted(set(periods["rsi"]))) or defaults.rsi,
+        atr=periods["atr"][0] if periods["atr"] else defaults.atr,
+    )
+
+
+def simulate_symbol(
+    code: str,
+    bars: Dict[str, np.ndarray],
+    entry: Sequence[SignalRule],
+    exit: Sequence[SignalRule],
+    params: IndicatorParams,
+    fee_rate: float
+) -> SymbolBacktest:
+    """
+    模拟单只股票的持仓
+
+    Args:
+        code: 股票代码
+        bars: trade_date、open、high、low、close到数组的映射
+        entry: 入场规则，全部满足时买入
+        exit: 离场规则，任一满足时卖出，为空时入场规则不再满足即卖出
+        params: 技术指标参数
+        fee_rate: 单边交易费率
+
+    Returns:
+        SymbolBacktest: 每日的策略收益率、收盘后的持仓和每笔交易的收益率
+    """
+    close = bars["close"]
+    indicators, _ = compute_indicators(bars["high"], bars["low"], close, params)
+    columns = {**{field: bars[field] for field in BAR_FIELDS}, **indicators}
+
+    enter = np.logical_and.reduce([rule.evaluate(columns) for rule in entry])
+    leave = np.logical_or.reduce([rule.evaluate(columns) for rule in exit]) if exit else ~enter
+    # 入场信号置1、离场信号置0，其余日期沿用前一日的持仓
+    position = pd.Series(np.where(leave, 0.0, np.where(enter, 1.0, np.nan))).ffill().fillna(0.0).to_numpy()
+
+    held = np.concatenate([[0.0], position[:-1]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change = np.concatenate([[0.0], close[1:] / close[:-1] - 1])
+    trades = np.abs(np.diff(position, prepend=0.0))
+    returns = np.nan_to_num(held * change) - trades * fee_rate
+
+    # 每笔交易的收益率，最后仍持有的按最后收盘价计算
+    buys = np.flatnonzero(np.diff(position, prepend=0.0) > 0)
+    sells = np.flatnonzero(np.diff(position, prepend=0.0) < 0)
+    sells = np.append(sells, len(close) - 1) if len(sells) < len(buys) else sells
+    trade_returns = close[sells] / close[buys] * (1 - fee_rate) ** 2 - 1
+    return SymbolBacktest(
+        code=code, trade_dates=bars["trade_date"], returns=returns, position=position, trade_returns=trade_returns
+    )
+
+
+def simulate_symbols(
+    items: List[Tuple[str, Dict[str, np.ndarray]]],
+    entry: Sequence[SignalRule],
+    exit: Sequence[SignalRule],
+    params: IndicatorParams,
+    fee_rate: float
+) -> List[SymbolBacktest]:
+    """依次模拟多只股票，供进程池按批执行"""
+    return [simulate_symbol(code, bars, entry, exit, params, fee_rate) for code, bars in items]
+
+
+def backtest_statistics(
+    returns: np.ndarray,
+    exposure: float,
+    trade_returns: np.ndarray
+) -> Dict[str, Optional[float]]:
+    """
+    由每日收益率计算回测统计
+
+    Args:
+        returns: 每日收益率
+        exposure: 平均持仓比例
+        trade_returns: 每笔交易的收益率
+
+    Returns:
+        Dict[str, Optional[float]]: 字段与BacktestStatistics一致，无法计算时为None
+    """
+    days = len(returns)
+    equity = np.cumprod(1 + returns)
+    total = float(equity[-1] - 1) if days else 0.0
+    volatility = float(returns.std(ddof=1)) if days > 1 else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if days else np.zeros(1)
+    return {
+        "total_return": round(total, 6),
+        "annual_return": round((1 + total) ** (TRADING_DAYS_PER_YEAR / days) - 1, 6) if days and total > -1 else None,
+        "annual_volatility": round(volatility * np.sqrt(TRADING_DAYS_PER_YEAR), 6),
+        "sharpe_ratio": round(float(returns.mean()) / volatility * np.sqrt(TRADING_DAYS_PER_YEAR), 4) if volatility > 0 else None,
+        "max_drawdown": round(float(drawdown.min()), 6),
+        "exposure": round(exposure, 4),
+        "trade_count": int(len(trade_returns)),
+        "win_rate": round(float((trade_returns > 0).mean()), 4) if len(trade_returns) else None,
+    }
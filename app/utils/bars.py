@@ -0,0 +1,220 @@
+"""
+K线复权和周期转换模块
+
+由不复权日K线和复权因子在本地计算前复权、后复权K线，
+由日K线在本地合成更长周期的K线，周线、月线等不再单独访问上游和单独缓存原始数据：
+1. weekly：周线，按自然周(周一至周日)分组，节假日所在的周只包含实际交易日
+2. monthly：月线
+3. quarterly：季线
+4. Nd：按交易日历从固定起点(日历的第一个交易日)起每N个交易日合成一根K线，如5d、20d，
+   同一交易日所在的N日K线与请求的开始日期无关，停牌日在日历中占位，所在K线只包含实际交易日
+
+合成规则：开盘价取第一个交易日，收盘价取最后一个交易日，最高价、最低价取极值，成交量、成交额和换手率求和，
+日期取最后一个交易日；涨跌额、涨跌幅和振幅以上一根K线的收盘价为基准重新计算，
+第一根K线的基准由第一个交易日的收盘价和涨跌额推算。
+
+复权按后复权因子等比计算：后复权价格为不复权价格乘以当日因子，前复权价格再除以最新因子，
+涨跌幅和振幅为比例不受复权影响，成交量、成交额和换手率保持不复权的值。
+"""
+
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# 支持的固定周期
+HISTORY_PERIODS = ("daily", "weekly", "monthly", "quarterly")
+
+# N个交易日周期，如5d
+_DAYS_PATTERN = re.compile(r"^([1-9][0-9]{0,2})d$")
+
+# N个交易日周期的上限
+MAX_PERIOD_DAYS = 250
+
+
+# 复权时按因子调整的价格字段
+ADJUSTED_FIELDS = ("open", "close", "high", "low", "change_amount")
+
+# 判断除权除息日时允许的昨收价差，不复权价格保留两位小数
+_EX_DIVIDEND_TOLERANCE = 0.015
+
+
+def ex_dividend_dates(daily: pd.DataFrame) -> np.ndarray:
+    """
+    不复权日K线中的除权除息日
+
+    除权除息日的涨跌额以除权参考价为昨收计算，与上一交易日的收盘价不一致。
+
+    Args:
+        daily: 按日期升序排列的不复权日K线
+
+    Returns:
+        np.ndarray: 除权除息日(与trade_date格式一致)，按日期升序排列
+    """
+    close = daily["close"].to_numpy()
+    reference = close - daily["change_amount"].to_numpy()
+    gaps = np.abs(reference[1:] - close[:-1]) > _EX_DIVIDEND_TOLERANCE
+    return daily["trade_date"].to_numpy()[1:][gaps]
+
+
+def adjust_bars(daily: pd.DataFrame, factor_dates: np.ndarray, factors: np.ndarray, adjust: str) -> pd.DataFrame:
+    """
+    按后复权因子计算复权K线
+
+    Args:
+        daily: 不复权日K线
+        factor_dates: 因子生效日期(YYYY-MM-DD)，升序排列
+        factors: 对应的后复权因子
+        adjust: 复权方式，可选 qfq(前复权), hfq(后复权), 空字符串(不复权)
+
+    Returns:
+        pd.DataFrame: 复权后的日K线，不复权时为原DataFrame
+    """
+    if not adjust or daily.empty:
+        return daily
+    # 每个交易日取当日及之前最近一次生效的因子，早于第一个因子日期的交易日取第一个因子
+    positions = np.searchsorted(factor_dates.astype(str), daily["trade_date"].to_numpy().astype(str), side="right") - 1
+    ratio = factors[np.clip(positions, 0, None)].astype(np.float64)
+    if adjust == "qfq":
+        ratio = ratio / factors[-1]
+
+    adjusted = daily.copy()
+    for field in ADJUSTED_FIELDS:
+        adjusted[field] = daily[field].to_numpy() * ratio
+    return adjusted
+
+
+def parse_period(period: str) -> Optional[int]:
+    """
+    校验K线周期
+
+    Args:
+        period: 周期，可选daily、weekly、monthly、quarterly或Nd(如5d)
+
+    Returns:
+        Optional[int]: Nd周期的交易日数，固定周期返回None
+
+    Raises:
+        ValueError: 周期不支持时抛出
+    """
+    if period in HISTORY_PERIODS:
+        return None
+    match = _DAYS_PATTERN.match(period)
+    if match is None or int(match.group(1)) > MAX_PERIOD_DAYS:
+        raise ValueError(
+            f"不支持的周期: {period}，可选{', '.join(HISTORY_PERIODS)}或1d至{MAX_PERIOD_DAYS}d"
+        )
+    return int(match.group(1))
+
+
+def period_start(date: pd.Timestamp, period: str, calendar: Optional[np.ndarray] = None) -> pd.Timestamp:
+    """
+    日期所在周期的第一天，用于补齐开始日期所在周期的日K线
+
+    Args:
+        date: 日期
+        period: 周期
+        calendar: 升序排列的交易日历(datetime64)，Nd周期需要
+
+    Returns:
+        pd.Timestamp: 周线为所在周的周一，月线为所在月的1日，季线为所在季度的第一天，
+        Nd为所在N日K线的第一个交易日，其余周期为日期本身
+    """
+    date = pd.Timestamp(date).normalize()
+    if period == "weekly":
+        return date - pd.Timedelta(days=date.weekday())
+    if period == "monthly":
+        return date.replace(day=1)
+    if period == "quarterly":
+        return date.replace(month=(date.quarter - 1) * 3 + 1, day=1)
+    days = parse_period(period)
+    if days is not None and calendar is not None and len(calendar):
+        position = np.searchsorted(calendar, date.to_datetime64())
+        return min(date, pd.Timestamp(calendar[min(position // days * days, len(calendar) - 1)]))
+    return date
+
+
+def history_fetch_start(date: pd.Timestamp, period: str, calendar: Optional[np.ndarray] = None) -> pd.Timestamp:
+    """
+    获取日K线时使用的开始日期
+
+    取开始日期前6天与所在周期第一天中较早者所在季度的第一天，日线、周线、月线和季线的开始日期相同时
+    获取的日K线相同，共享同一份缓存，结果再按开始日期截取。
+
+    Args:
+        date: 请求的开始日期
+        period: 周期
+        calendar: 升序排列的交易日历(datetime64)，Nd周期需要
+
+    Returns:
+        pd.Timestamp: 季度的第一天
+    """
+    date = pd.Timestamp(date).normalize()
+    return period_start(min(date - pd.Timedelta(days=6), period_start(date, period, calendar)), "quarterly")
+
+
+def resample_bars(daily: pd.DataFrame, period: str, calendar: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    由日K线合成指定周期的K线
+
+    Args:
+        daily: 按日期升序排列的日K线，列名与StockHistory字段一致
+        period: 周期，可选daily、weekly、monthly、quarterly或Nd
+        calendar: 升序排列的交易日历(datetime64)，Nd周期按交易日在日历中的位置划分，
+                  为None时从第一根K线起划分
+
+    Returns:
+        pd.DataFrame: 列与日K线一致的K线，每个周期一行
+
+    Raises:
+        ValueError: 周期不支持时抛出
+    """
+    days = parse_period(period)
+    if period == "daily" or days == 1 or daily.empty:
+        return daily
+
+    dates = pd.to_datetime(daily["trade_date"])
+    if period == "weekly":
+        keys = (dates - pd.to_timedelta(dates.dt.weekday, unit="D")).to_numpy()
+    elif period == "monthly":
+        keys = (dates.dt.year * 12 + dates.dt.month).to_numpy()
+    elif period == "quarterly":
+        keys = (dates.dt.year * 4 + dates.dt.quarter).to_numpy()
+    elif calendar is not None:
+        keys = np.searchsorted(calendar, dates.to_numpy()) // days
+    else:
+        keys = np.arange(len(daily)) // days
+
+    # 每个周期第一个和最后一个交易日的位置
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    ends = np.concatenate([starts[1:], [len(daily)]]) - 1
+
+    def column(name: str) -> np.ndarray:
+        return daily[name].to_numpy()
+
+    close = column("close")[ends]
+    high = np.maximum.reduceat(column("high"), starts)
+    low = np.minimum.reduceat(column("low"), starts)
+    first_close = column("close")[0] - column("change_amount")[0]
+    previous_close = np.concatenate([[first_close], close[:-1]])
+    change_amount = close - previous_close
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change_percent = change_amount / previous_close * 100
+        amplitude = (high - low) / previous_close * 100
+
+    bars = pd.DataFrame({
+        "stock_code": column("stock_code")[ends],
+        "trade_date": column("trade_date")[ends],
+        "open": column("open")[starts],
+        "close": close,
+        "high": high,
+        "low": low,
+        "volume": np.add.reduceat(column("volume"), starts),
+        "amount": np.add.reduceat(column("amount"), starts),
+        "amplitude": amplitude.round(2),
+        "change_percent": change_percent.round(2),
+        "change_amount": change_amount.round(4),
+        "turnover": np.add.reduceat(column("turnover"), starts).round(2),
+    })
+    return bars[list(daily.columns)].astype(daily.dtypes.to_dict())
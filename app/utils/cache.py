@@ -1,12 +1,24 @@
 import functools
-import json
+import hashlib
+import inspect
+import re
+import time
 import redis
-from typing import Any, Callable, Optional
+import pandas as pd
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, get_type_hints
+from pydantic import TypeAdapter
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.utils.columnar import to_frame
+from app.utils.serialization import dumps, loads
 
 logger = get_logger(__name__)
 
+# 计算ETag时去掉的刷新时间字段，orjson的输出紧凑，键名后直接是字符串、null或列式数组
+_UPDATE_TIME_PATTERN = re.compile(rb'"update_time":(?:"[^"]*"|null|\[[^\]]*\])')
+
 # 创建Redis连接
 redis_client = None
 if settings.REDIS_ENABLED:
@@ -25,83 +37,292 @@ if settings.REDIS_ENABLED:
         logger.warning(f"Redis连接失败，将禁用缓存: {str(e)}")
         redis_client = None
 
+
+def content_etag(payload: bytes) -> str:
+    """
+    计算JSON编码字节的弱ETag，不含update_time字段
+
+    Args:
+        payload: dumps编码的JSON字节
+
+    Returns:
+        str: 形如W/"..."的ETag
+    """
+    if b'"update_time"' in payload:
+        payload = _UPDATE_TIME_PATTERN.sub(b"", payload)
+    return f'W/"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+@dataclass
+class CacheEntry:
+    """
+    缓存项
+
+    同时保存函数返回值及其JSON编码字节，热点接口可直接将payload写出，
+    无需再次经过response_model校验和JSON编码。
+    etag为去掉update_time字段后payload的内容哈希(弱ETag)，服务在每次获取时以当前时间
+    填写update_time，收盘后等数据未变化时刷新缓存后etag保持不变，用于HTTP条件请求。
+    """
+    value: Any
+    payload: bytes
+    expire_at: float = 0.0
+    frame: Optional[pd.DataFrame] = field(default=None, repr=False, compare=False)
+    etag: str = ""
+
+    def __post_init__(self):
+        if not self.etag:
+            self.etag = content_etag(self.payload)
+
+    def max_age(self) -> int:
+        """缓存项剩余的有效时间(秒)"""
+        return max(0, int(self.expire_at - time.time()))
+
+    def as_frame(self) -> pd.DataFrame:
+        """以DataFrame形式返回缓存值，首次调用时转换并随缓存项保存，调用方不应原地修改"""
+        if self.frame is None:
+            self.frame = to_frame(self.value)
+        return self.frame
+
+
+# 进程内缓存，按LRU顺序保存
+_local_cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+
+def _local_get(cache_key: str) -> Optional[CacheEntry]:
+    """从进程内缓存获取未过期的缓存项"""
+    entry = _local_cache.get(cache_key)
+    if entry is None:
+        return None
+    if entry.expire_at <= time.time():
+        _local_cache.pop(cache_key, None)
+        return None
+    _local_cache.move_to_end(cache_key)
+    return entry
+
+
+def _local_set(cache_key: str, entry: CacheEntry) -> None:
+    """写入进程内缓存，超出容量时淘汰最久未使用的缓存项"""
+    _local_cache[cache_key] = entry
+    _local_cache.move_to_end(cache_key)
+    while len(_local_cache) > settings.CACHE_MAX_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _return_decoder(func: Callable) -> Callable[[bytes], Any]:
+    """
+    根据函数的返回值注解创建解码函数，用于将缓存数据还原为原始类型
+
+    返回值为Pydantic模型(或其列表)时使用TypeAdapter校验还原，
+    返回值为DataFrame时由列式字典重建，其余情况直接解码JSON。
+    """
+    try:
+        return_type = get_type_hints(func).get("return")
+    except Exception:
+        return_type = None
+    if return_type is None or return_type is Any:
+        return loads
+    if return_type is pd.DataFrame:
+        return lambda raw: pd.DataFrame(loads(raw))
+    try:
+        return TypeAdapter(return_type).validate_json
+    except Exception:
+        return loads
+
+
 def cache_result(expire: int = None):
     """
     缓存函数结果的装饰器
-    
+
+    缓存分为两级：进程内缓存(受CACHE_ENABLED控制)和Redis缓存(受REDIS_ENABLED控制)。
+    两级缓存中保存的都是结果的JSON编码字节，从Redis读取时会根据函数的返回值注解
+    将数据还原为Pydantic模型或DataFrame，保证命中缓存与未命中时返回类型一致。
+    返回DataFrame的函数结果可能被多个调用方共享，调用方不应原地修改。
+
+    被装饰的函数额外提供cache_entry属性，返回包含编码字节的CacheEntry，
+    配合get_cache_entry可让路由直接输出预序列化的响应体。
+
     Args:
-        expire: 缓存过期时间(秒)，默认使用配置中的REDIS_CACHE_EXPIRATION
+        expire: 缓存过期时间(秒)，进程内缓存默认使用CACHE_EXPIRATION，
+                Redis缓存默认使用REDIS_CACHE_EXPIRATION
     """
     def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        async def wrapper(*args, **kwargs) -> Any:
-            # 如果Redis未启用或连接失败，直接执行函数
-            if not settings.REDIS_ENABLED or redis_client is None:
-                return await func(*args, **kwargs)
-            
+        async def cache_entry(*args, **kwargs) -> CacheEntry:
+            local_enabled = settings.CACHE_ENABLED
+            redis_enabled = settings.REDIS_ENABLED and redis_client is not None
+
+            # 如果缓存均未启用，直接执行函数
+            if not local_enabled and not redis_enabled:
+                result = await func(*args, **kwargs)
+                return CacheEntry(value=result, payload=dumps(result))
+
             # 生成缓存键
-            cache_key = _generate_cache_key(func.__name__, args, kwargs)
-            
-            # 尝试从缓存获取
-            try:
-                cached_data = redis_client.get(cache_key)
-                if cached_data:
-                    logger.debug(f"从缓存获取数据: {cache_key}")
-                    return json.loads(cached_data)
-            except Exception as e:
-                logger.warning(f"从缓存获取数据失败: {str(e)}")
-            
+            cache_key = _generate_cache_key(func, args, kwargs)
+            local_expire = expire or settings.CACHE_EXPIRATION
+
+            # 尝试从进程内缓存获取
+            if local_enabled:
+                entry = _local_get(cache_key)
+                if entry is not None:
+                    return entry
+
+            # 尝试从Redis缓存获取
+            if redis_enabled:
+                try:
+                    cached_data = redis_client.get(cache_key)
+                    if cached_data:
+                        logger.debug(f"从缓存获取数据: {cache_key}")
+                        entry = CacheEntry(
+                            value=_return_decoder(func)(cached_data),
+                            payload=bytes(cached_data),
+                            expire_at=time.time() + local_expire
+                        )
+                        if local_enabled:
+                            _local_set(cache_key, entry)
+                        return entry
+                except Exception as e:
+                    logger.warning(f"从缓存获取数据失败: {str(e)}")
+
             # 执行原函数
             result = await func(*args, **kwargs)
-            
-            # 存入缓存
-            try:
-                expiration = expire or settings.REDIS_CACHE_EXPIRATION
-                redis_client.setex(
-                    cache_key,
-                    expiration,
-                    json.dumps(result, ensure_ascii=False)
-                )
-                logger.debug(f"数据已存入缓存: {cache_key}, 过期时间: {expiration}秒")
-            except Exception as e:
-                logger.warning(f"存入缓存失败: {str(e)}")
-            
-            return result
+            entry = CacheEntry(
+                value=result,
+                payload=dumps(result),
+                expire_at=time.time() + local_expire
+            )
+            if local_enabled:
+                _local_set(cache_key, entry)
+
+            # 存入Redis缓存
+            if redis_enabled:
+                try:
+                    expiration = expire or settings.REDIS_CACHE_EXPIRATION
+                    redis_client.setex(cache_key, expiration, entry.payload)
+                    logger.debug(f"数据已存入缓存: {cache_key}, 过期时间: {expiration}秒")
+                except Exception as e:
+                    logger.warning(f"存入缓存失败: {str(e)}")
+
+            return entry
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            entry = await cache_entry(*args, **kwargs)
+            return entry.value
+
+        wrapper.cache_entry = cache_entry
         return wrapper
     return decorator
 
-def _generate_cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
+
+async def get_cache_entry(method: Callable, *args, **kwargs) -> CacheEntry:
+    """
+    获取服务方法结果对应的缓存项
+
+    Args:
+        method: 服务方法，可以是绑定方法，通常由cache_result装饰
+        *args: 调用参数
+        **kwargs: 调用关键字参数
+
+    Returns:
+        CacheEntry: 包含结果和JSON编码字节的缓存项
+    """
+    func = getattr(method, "__func__", method)
+    instance = getattr(method, "__self__", None)
+    if instance is not None:
+        args = (instance, *args)
+
+    cache_entry = getattr(func, "cache_entry", None)
+    if cache_entry is None:
+        # 未使用cache_result装饰的函数，直接调用并编码
+        result = await func(*args, **kwargs)
+        return CacheEntry(value=result, payload=dumps(result))
+    return await cache_entry(*args, **kwargs)
+
+
+def invalidate_cache(method: Callable, *args, **kwargs) -> None:
+    """
+    删除服务方法指定参数对应的缓存项，下次调用时重新获取
+
+    Args:
+        method: 由cache_result装饰的服务方法，可以是绑定方法
+        *args: 调用参数
+        **kwargs: 调用关键字参数
+    """
+    func = getattr(method, "__func__", method)
+    instance = getattr(method, "__self__", None)
+    if instance is not None:
+        args = (instance, *args)
+    cache_key = _generate_cache_key(getattr(func, "__wrapped__", func), args, kwargs)
+
+    _local_cache.pop(cache_key, None)
+    if settings.REDIS_ENABLED and redis_client is not None:
+        try:
+            redis_client.delete(cache_key)
+        except Exception as e:
+            logger.warning(f"删除缓存失败: {str(e)}")
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(func: Callable) -> Optional[inspect.Signature]:
+    """获取函数签名，无法获取时返回None"""
+    try:
+        return inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+
+
+def _generate_cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
     """生成缓存键"""
+    # 按函数签名绑定参数并补全默认值，位置参数、关键字参数和省略默认值的调用共享同一缓存键
+    signature = _signature(func)
+    if signature is not None:
+        try:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            args, kwargs = tuple(bound.arguments.values()), {}
+        except TypeError:
+            pass
+
+    # 方法的第一个参数是服务实例，不同实例应共享缓存，因此不参与缓存键
+    if "." in func.__qualname__ and args and hasattr(args[0], func.__name__):
+        args = args[1:]
+
     # 将参数转换为字符串
     args_str = '_'.join([str(arg) for arg in args])
     kwargs_str = '_'.join([f"{k}:{v}" for k, v in sorted(kwargs.items())])
-    
+
     # 组合缓存键
-    key_parts = [settings.REDIS_PREFIX, func_name]
+    key_parts = [settings.REDIS_PREFIX, func.__qualname__]
     if args_str:
         key_parts.append(args_str)
     if kwargs_str:
         key_parts.append(kwargs_str)
-    
+
     return ':'.join(key_parts)
 
 def clear_cache(pattern: str = None):
     """
     清除缓存
-    
+
     Args:
         pattern: 缓存键模式，如果为None则清除所有以REDIS_PREFIX开头的缓存
     """
+    if pattern is None:
+        pattern = f"{settings.REDIS_PREFIX}*"
+
+    # 清除进程内缓存
+    prefix = pattern.rstrip("*")
+    local_keys = [key for key in _local_cache if key.startswith(prefix)]
+    for key in local_keys:
+        _local_cache.pop(key, None)
+
     if not settings.REDIS_ENABLED or redis_client is None:
         return
-    
+
     try:
-        if pattern is None:
-            pattern = f"{settings.REDIS_PREFIX}*"
-        
         keys = redis_client.keys(pattern)
         if keys:
             redis_client.delete(*keys)
             logger.info(f"已清除{len(keys)}个缓存项: {pattern}")
     except Exception as e:
-        logger.error(f"清除缓存失败: {str(e)}")
\ No newline at end of file
+        logger.error(f"清除缓存失败: {str(e)}")
@@ -0,0 +1,192 @@
+"""
+筹码分布计算模块
+
+在日K线上向量化计算筹码分布(CYQ)，算法与东方财富行情中心(AKShare stock_cyq_em)的CYQCalculator一致：
+1. 价位：从第一根K线到当日的最低价到最高价等分为CHIP_PRICE_LEVELS个价位，间距不小于0.01
+2. 衰减：每根K线先将已有筹码乘以(1-换手率)，再按换手率加入当日筹码
+3. 当日筹码：在最低价和最高价之间按以(开+收+高+低)/4为顶点的三角形分布，一字板时集中在均价所在价位
+4. 指标：获利比例、平均成本(50%筹码处的价位)、90%和70%筹码的价格区间及集中度
+
+第一根K线到当日的价格区间不变时，当日筹码由前一日的筹码衰减后加入当日筹码得到；
+价格区间变化时，用衰减权重矩阵与各K线的三角形分布做一次矩阵乘法重新得到筹码。
+计算时返回ChipState，有新K线时由状态继续计算，结果与从头计算一致。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# 价位数
+CHIP_PRICE_LEVELS = 150
+
+# 参与计算的K线数，与上游一致
+CHIP_WINDOW = 210
+
+# 输出最近的交易日数，与上游一致
+CHIP_OUTPUT_DAYS = 90
+
+# 筹码量在汇总前保留的有效数字位数，与上游一致
+CHIP_PRECISION = 12
+
+
+@dataclass
+class ChipState:
+    """计算到最后一根K线后的状态，用于由新K线继续计算"""
+    open: np.ndarray
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    turnover: np.ndarray
+    # 最后一根K线的筹码分布
+    chips: np.ndarray
+
+
+def _accuracy(lowest: np.ndarray, highest: np.ndarray) -> np.ndarray:
+    """价位间距，不小于0.01"""
+    return np.maximum(0.01, (highest - lowest) / (CHIP_PRICE_LEVELS - 1))
+
+
+def _round_significant(values: np.ndarray, digits: int = CHIP_PRECISION) -> np.ndarray:
+    """保留digits位有效数字"""
+    with np.errstate(divide="ignore"):
+        exponent = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** np.where(np.isfinite(exponent), digits - 1 - exponent, 0)
+    return np.round(values * scale) / scale
+
+
+def _chip_shapes(
+    open: np.ndarray,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    min_price: float,
+    accuracy: float
+) -> np.ndarray:
+    """
+    各K线在一组价位上的三角形筹码分布(未乘换手率)
+
+    Returns:
+        np.ndarray: 每根K线一行、每个价位一列
+    """
+    levels = np.arange(CHIP_PRICE_LEVELS)
+    prices = min_price + accuracy * levels
+    avg = ((open + close + high + low) / 4)[:, None]
+    high, low = high[:, None], low[:, None]
+    top = np.floor((high - min_price) / accuracy)
+    bottom = np.ceil((low - min_price) / accuracy)
+    flat = high == low
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        peak = 2 / (high - low)
+        rising = np.where(np.abs(avg - low) < 1e-8, peak, (prices - low) / (avg - low) * peak)
+        falling = np.where(np.abs(high - avg) < 1e-8, peak, (high - prices) / (high - avg) * peak)
+    shapes = np.where((levels >= bottom) & (levels <= top) & ~flat, np.where(prices <= avg, rising, falling), 0.0)
+
+    # 一字板时矩形面积是三角形的2倍
+    rows = np.flatnonzero(flat[:, 0])
+    if len(rows):
+        shapes[rows, np.floor((avg[rows, 0] - min_price) / accuracy).astype(np.intp)] += (CHIP_PRICE_LEVELS - 1) / 2
+    return shapes
+
+
+def _chip_metrics(
+    chips: np.ndarray,
+    close: np.ndarray,
+    min_price: np.ndarray,
+    accuracy: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """由每日的筹码分布计算获利比例、平均成本和筹码集中度"""
+    chips = _round_significant(chips)
+    prices = min_price[:, None] + np.arange(CHIP_PRICE_LEVELS) * accuracy[:, None]
+    stacked = np.cumsum(chips, axis=1)
+    total = stacked[:, -1]
+    rows = np.arange(len(chips))
+
+    def cost(share: float) -> np.ndarray:
+        # 累计筹码第一次超过share的价位
+        reached = stacked > (total * share)[:, None]
+        return np.where(reached.any(axis=1), prices[rows, reached.argmax(axis=1)], 0.0)
+
+    below = (close[:, None] >= prices).sum(axis=1)
+    benefit = np.where(below > 0, stacked[rows, np.maximum(below - 1, 0)], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = {
+            "profit_ratio": np.where(total == 0, 0.0, benefit / total),
+            "avg_cost": np.round(cost(0.5), 2),
+        }
+        for percent in (90, 70):
+            low, high = cost((1 - percent / 100) / 2), cost((1 + percent / 100) / 2)
+            result[f"cost_{percent}_low"] = np.round(low, 2)
+            result[f"cost_{percent}_high"] = np.round(high, 2)
+            result[f"concentration_{percent}"] = np.where(low + high == 0, 0.0, (high - low) / (low + high))
+    return result
+
+
+def compute_chips(
+    open: np.ndarray,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    turnover: np.ndarray,
+    state: Optional[ChipState] = None
+) -> Tuple[Dict[str, np.ndarray], ChipState]:
+    """
+    计算筹码分布指标
+
+    Args:
+        open: 开盘价
+        close: 收盘价
+        high: 最高价
+        low: 最低价
+        turnover: 换手率(%)
+        state: 之前K线计算后的状态，为None时从头计算
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], ChipState]: 指标名(与ChipDistribution字段一致)到与输入K线等长的数组的映射，
+        以及计算到最后一根K线后的状态
+    """
+    bars = [np.asarray(values, dtype=np.float64) for values in (open, close, high, low, turnover)]
+    tail = len(state.close) if state is not None else 0
+    if state is not None:
+        bars = [np.concatenate([previous, values]) for previous, values in zip(
+            (state.open, state.close, state.high, state.low, state.turnover), bars
+        )]
+    open, close, high, low, turnover = bars
+    count = len(close) - tail
+    if count == 0:
+        # 没有新K线时状态不变
+        return _chip_metrics(np.empty((0, CHIP_PRICE_LEVELS)), close[:0], close[:0], close[:0]), state
+
+    # 每根K线之前的筹码保留比例，decay[r, c]为第c根K线的筹码到第r根K线时的剩余比例
+    rate = np.minimum(1.0, np.nan_to_num(turnover / 100))
+    keep = 1 - rate
+    n = len(close)
+    later = np.arange(n)[:, None] > np.arange(n)
+    decay = np.cumprod(np.where(later, keep[:, None], 1.0), axis=0)
+    decay[~(later | np.eye(n, dtype=bool))] = 0.0
+
+    highest = np.maximum.accumulate(high)
+    lowest = np.minimum.accumulate(low)
+    accuracy = _accuracy(lowest, highest)
+    changed = np.flatnonzero((np.diff(highest) != 0) | (np.diff(lowest) != 0)) + 1
+    starts = np.unique(np.concatenate([[tail], changed[changed > tail]]))
+    ends = np.append(starts[1:], n)
+
+    chips = np.empty((count, CHIP_PRICE_LEVELS))
+    previous = state.chips if state is not None else None
+    for start, end in zip(starts, ends):
+        min_price, step = lowest[start], accuracy[start]
+        if previous is not None and start > 0 and start not in changed:
+            # 价格区间与前一根K线相同，前一根K线的筹码衰减后加入之后的K线
+            first = start
+            base = decay[start:end, start - 1, None] * previous
+        else:
+            first = 0
+            base = 0.0
+        shapes = _chip_shapes(open[first:end], close[first:end], high[first:end], low[first:end], min_price, step)
+        chips[start - tail:end - tail] = base + (decay[start:end, first:end] * rate[first:end]) @ shapes
+        previous = chips[end - tail - 1]
+
+    result = _chip_metrics(chips, close[tail:], lowest[tail:], accuracy[tail:])
+    return result, ChipState(open=open, close=close, high=high, low=low, turnover=turnover, chips=chips[-1])
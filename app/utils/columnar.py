@@ -0,0 +1,120 @@
+"""
+列式数据工具模块
+
+本模块提供基于pandas DataFrame的列式数据处理工具，用于：
+1. 将AKShare返回的中文列DataFrame规范化为与数据模型字段一致的英文列
+2. 在不逐行迭代的情况下完成数值清洗(NaN/Infinity处理)
+3. 将规范化后的DataFrame转换为记录列表或列式字典，便于构造模型和序列化
+
+注意：服务层缓存的DataFrame可能被多个请求共享，本模块中的函数均不会原地修改入参。
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+
+def rename_columns(df: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """
+    选取并重命名DataFrame的列
+
+    Args:
+        df: 原始DataFrame
+        columns: 原列名到新列名的映射，结果中的列顺序与映射顺序一致
+
+    Returns:
+        pd.DataFrame: 只包含映射中列的新DataFrame，原DataFrame中缺失的列以None填充
+    """
+    result = pd.DataFrame(index=df.index)
+    for source, target in columns.items():
+        result[target] = df[source] if source in df.columns else None
+    return result.reset_index(drop=True)
+
+
+def numeric_column(series: pd.Series, default: Optional[float] = None) -> pd.Series:
+    """
+    将列转换为浮点数，NaN和Infinity替换为默认值
+
+    与sector_service中的safe_float语义一致，但按列向量化执行。
+
+    Args:
+        series: 待转换的列
+        default: NaN、Infinity或无法转换时使用的默认值，为None时保留NaN
+
+    Returns:
+        pd.Series: 浮点数列
+    """
+    values = pd.to_numeric(series, errors="coerce").astype("float64")
+    values = values.replace([np.inf, -np.inf], np.nan)
+    if default is not None:
+        values = values.fillna(default)
+    return values
+
+
+def date_column(series: pd.Series, fmt: str = "%Y-%m-%d") -> pd.Series:
+    """
+    将日期列统一转换为指定格式的字符串
+
+    Args:
+        series: 日期列，元素可以是date、datetime、Timestamp或字符串
+        fmt: 输出格式，默认为YYYY-MM-DD
+
+    Returns:
+        pd.Series: 字符串日期列
+    """
+    return pd.to_datetime(series).dt.strftime(fmt)
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    将DataFrame转换为记录列表，NaN转换为None
+
+    Args:
+        df: 规范化后的DataFrame
+
+    Returns:
+        List[Dict[str, Any]]: 记录列表，可直接用于构造Pydantic模型
+    """
+    if df.empty:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def frame_to_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """
+    将DataFrame转换为列式字典
+
+    Args:
+        df: 规范化后的DataFrame
+
+    Returns:
+        Dict[str, List[Any]]: 列名到列值列表的映射，NaN转换为None
+    """
+    return {
+        str(column): df[column].astype(object).where(df[column].notna(), None).tolist()
+        for column in df.columns
+    }
+
+
+def to_frame(value: Any) -> pd.DataFrame:
+    """
+    将服务层返回值转换为DataFrame
+
+    Args:
+        value: DataFrame、Pydantic模型、模型列表或字典列表
+
+    Returns:
+        pd.DataFrame: 列名与模型字段一致的DataFrame
+    """
+    if isinstance(value, pd.DataFrame):
+        return value
+    if value is None:
+        return pd.DataFrame()
+    if isinstance(value, (BaseModel, dict)):
+        value = [value]
+    return pd.DataFrame([
+        item.model_dump() if isinstance(item, BaseModel) else item
+        for item in value
+    ])
@@ -0,0 +1,154 @@
+"""
+并发工具模块
+
+AKShare接口均为同步阻塞调用，在async服务方法中直接调用会阻塞事件循环，
+多个调用之间无法并发。本模块提供：
+1. run_sync：在专用线程池中执行同步函数，不阻塞事件循环，
+   线程池大小即全局同时进行的AKShare调用数上限(UPSTREAM_CONCURRENCY)
+2. iter_limited：以有限的并发数批量执行协程，每一项单独超时，按完成顺序逐项产出结果
+3. gather_limited：同iter_limited，但等待全部完成后返回成功项的结果和失败项的错误信息
+单项失败不影响其他项。
+4. run_in_process：在进程池中执行CPU密集的同步函数(如回测模拟)，不受GIL限制，也不阻塞事件循环
+"""
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+# AKShare调用专用线程池，所有请求共享
+_executor = ThreadPoolExecutor(max_workers=settings.UPSTREAM_CONCURRENCY, thread_name_prefix="akshare")
+
+
+async def run_sync(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在AKShare专用线程池中执行同步函数
+
+    线程池已满时调用会排队等待，从而限制全局同时进行的AKShare调用数。
+
+    Args:
+        func: 同步函数，通常为AKShare接口
+        *args: 调用参数
+        **kwargs: 调用关键字参数
+
+    Returns:
+        函数的返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+# CPU密集计算专用进程池，第一次使用时创建
+_process_executor: Optional[ProcessPoolExecutor] = None
+
+
+async def run_in_process(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在CPU密集计算专用进程池中执行同步函数
+
+    进程池大小为PROCESS_POOL_WORKERS，以spawn方式启动工作进程，不继承服务进程的线程和事件循环。
+    函数及其参数和返回值需可pickle，函数应定义在模块顶层。
+
+    Args:
+        func: 模块顶层的同步函数
+        *args: 调用参数
+        **kwargs: 调用关键字参数
+
+    Returns:
+        函数的返回值
+    """
+    global _process_executor
+    if _process_executor is None:
+        _process_executor = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_process_executor, functools.partial(func, *args, **kwargs))
+
+
+async def iter_limited(
+    keys: Iterable[K],
+    fetch: Callable[[K], Awaitable[T]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> AsyncIterator[Tuple[K, Optional[T], Optional[str]]]:
+    """
+    以有限的并发数对每个键执行fetch，按完成顺序逐项产出
+
+    超时只中止对结果的等待，fetch本身会继续执行完毕，其结果会正常写入缓存，
+    下次请求可直接命中；执行完毕前该项仍计入并发数，同时执行的fetch不超过concurrency。
+    调用方提前停止迭代时，尚未开始的项会被取消。
+
+    Args:
+        keys: 待获取的键，如股票代码列表，重复的键只执行一次
+        fetch: 获取单个键数据的协程函数，通常为带缓存的服务方法
+        concurrency: 最大并发数，默认使用BATCH_CONCURRENCY
+        timeout: 单项超时时间(秒)，不含排队等待的时间，默认使用BATCH_ITEM_TIMEOUT
+
+    Yields:
+        Tuple[K, Optional[T], Optional[str]]: 键、结果和错误信息，成功时错误信息为None
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CONCURRENCY)
+    timeout = timeout or settings.BATCH_ITEM_TIMEOUT
+
+    async def run(key: K) -> Tuple[K, Any, Optional[str]]:
+        await semaphore.acquire()
+        try:
+            task = asyncio.ensure_future(fetch(key))
+        except BaseException:
+            semaphore.release()
+            raise
+        # 许可在fetch结束时才释放，超时后仍在执行的fetch继续占用并发数
+        task.add_done_callback(lambda _: semaphore.release())
+        try:
+            return key, await asyncio.wait_for(asyncio.shield(task), timeout), None
+        except asyncio.TimeoutError:
+            # 超时后任务继续执行，取走其异常以免产生未处理异常的警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return key, None, f"获取超时({timeout}秒)"
+        except Exception as e:
+            return key, None, str(e)
+
+    tasks = [asyncio.ensure_future(run(key)) for key in dict.fromkeys(keys)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def gather_limited(
+    keys: Iterable[K],
+    fetch: Callable[[K], Awaitable[T]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> Tuple[Dict[K, T], Dict[K, str]]:
+    """
+    以有限的并发数对每个键执行fetch，等待全部完成后返回
+
+    参数含义同iter_limited。
+
+    Returns:
+        Tuple[Dict[K, T], Dict[K, str]]: 成功项的结果和失败项的错误信息，均按键的输入顺序排列
+    """
+    keys = list(dict.fromkeys(keys))
+    outcomes = {}
+    async for key, result, error in iter_limited(keys, fetch, concurrency, timeout):
+        outcomes[key] = (result, error)
+
+    results: Dict[K, T] = {}
+    errors: Dict[K, str] = {}
+    for key in keys:
+        result, error = outcomes[key]
+        if error is None:
+            results[key] = result
+        else:
+            errors[key] = error
+    return results, errors
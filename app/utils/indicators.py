@@ -0,0 +1,298 @@
+"""
+技术指标计算模块
+
+在K线的最高价、最低价和收盘价数组上按列向量化计算常用技术指标：
+1. ma：简单移动平均，如 ma=5,10,20,60
+2. ema：指数移动平均，如 ema=12,26
+3. macd：快线、慢线和信号线周期，如 macd=12,26,9，输出dif、dea和macd(2*(dif-dea))
+4. rsi：相对强弱指标，如 rsi=6,12,24，平滑方式与通达信SMA(X,N,1)一致
+5. boll：布林带周期和标准差倍数，如 boll=20,2，标准差为总体标准差
+6. kdj：RSV周期和K、D的平滑周期，如 kdj=9,3,3，K、D初始值为50
+7. atr：平均真实波幅周期，如 atr=14，为真实波幅的简单移动平均
+
+递推类指标(EMA、MACD、RSI、KDJ)的计算结果依赖起始K线，计算时返回IndicatorState，
+有新K线时由状态继续计算，结果与从头计算一致。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Query
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 支持的指标
+INDICATORS = ("ma", "ema", "macd", "rsi", "boll", "kdj", "atr")
+
+# 周期参数的上限
+MAX_INDICATOR_PERIOD = 250
+
+
+@dataclass(frozen=True)
+class IndicatorParams:
+    """技术指标参数，可作为缓存键"""
+    indicators: Tuple[str, ...] = INDICATORS
+    ma: Tuple[int, ...] = (5, 10, 20, 60)
+    ema: Tuple[int, ...] = (12, 26)
+    macd: Tuple[int, int, int] = (12, 26, 9)
+    rsi: Tuple[int, ...] = (6, 12, 24)
+    boll: Tuple[int, float] = (20, 2.0)
+    kdj: Tuple[int, int, int] = (9, 3, 3)
+    atr: int = 14
+
+    @property
+    def window(self) -> int:
+        """滚动窗口类指标需要保留的K线数"""
+        windows = [1]
+        if "ma" in self.indicators:
+            windows.extend(self.ma)
+        if "boll" in self.indicators:
+            windows.append(self.boll[0])
+        if "kdj" in self.indicators:
+            windows.append(self.kdj[0])
+        if "atr" in self.indicators:
+            windows.append(self.atr)
+        return max(windows)
+
+
+@dataclass
+class IndicatorState:
+    """计算到最后一根K线后的状态，用于由新K线继续计算"""
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    true_range: np.ndarray
+    # 递推类指标最后一根K线的值，键为指标名和周期
+    last: Dict[Tuple[str, int], float] = field(default_factory=dict)
+
+
+def _periods(value: str, name: str, count: Optional[int] = None) -> Tuple[int, ...]:
+    """解析逗号分隔的周期参数"""
+    try:
+        periods = tuple(int(part) for part in value.split(",") if part.strip())
+    except ValueError:
+        raise ValueError(f"无效的{name}参数: {value}")
+    if not periods or (count is not None and len(periods) != count):
+        raise ValueError(f"{name}参数需要{count or '至少1'}个周期: {value}")
+    if any(period < 1 or period > MAX_INDICATOR_PERIOD for period in periods):
+        raise ValueError(f"{name}参数的周期需在1到{MAX_INDICATOR_PERIOD}之间: {value}")
+    return periods
+
+
+def parse_indicator_params(
+    indicators: Optional[str] = None,
+    ma: Optional[str] = None,
+    ema: Optional[str] = None,
+    macd: Optional[str] = None,
+    rsi: Optional[str] = None,
+    boll: Optional[str] = None,
+    kdj: Optional[str] = None,
+    atr: Optional[int] = None
+) -> IndicatorParams:
+    """
+    解析技术指标参数，未指定的参数使用默认值
+
+    Raises:
+        ValueError: 指标不支持或参数无效时抛出
+    """
+    params: dict = {}
+    if indicators:
+        names = tuple(dict.fromkeys(name.strip() for name in indicators.split(",") if name.strip()))
+        unknown = [name for name in names if name not in INDICATORS]
+        if unknown:
+            raise ValueError(f"不支持的技术指标: {', '.join(unknown)}")
+        params["indicators"] = names
+    if ma:
+        params["ma"] = _periods(ma, "ma")
+    if ema:
+        params["ema"] = _periods(ema, "ema")
+    if macd:
+        params["macd"] = _periods(macd, "macd", 3)
+    if rsi:
+        params["rsi"] = _periods(rsi, "rsi")
+    if boll:
+        parts = [part.strip() for part in boll.split(",")]
+        if len(parts) != 2:
+            raise ValueError(f"boll参数需要周期和标准差倍数: {boll}")
+        try:
+            params["boll"] = (_periods(parts[0], "boll")[0], float(parts[1]))
+        except ValueError as e:
+            raise ValueError(f"无效的boll参数: {boll}") from e
+    if kdj:
+        params["kdj"] = _periods(kdj, "kdj", 3)
+    if atr is not None:
+        params["atr"] = _periods(str(atr), "atr", 1)[0]
+    return IndicatorParams(**params)
+
+
+def indicator_params(
+    indicators: Optional[str] = Query(None, description=f"逗号分隔的技术指标，默认为全部: {','.join(INDICATORS)}"),
+    ma: Optional[str] = Query(None, description="移动平均周期，如'5,10,20,60'"),
+    ema: Optional[str] = Query(None, description="指数移动平均周期，如'12,26'"),
+    macd: Optional[str] = Query(None, description="MACD快线、慢线和信号线周期，如'12,26,9'"),
+    rsi: Optional[str] = Query(None, description="RSI周期，如'6,12,24'"),
+    boll: Optional[str] = Query(None, description="布林带周期和标准差倍数，如'20,2'"),
+    kdj: Optional[str] = Query(None, description="KDJ的RSV周期和K、D平滑周期，如'9,3,3'"),
+    atr: Optional[int] = Query(None, description="ATR周期，如14")
+) -> IndicatorParams:
+    """技术指标参数依赖，参数无效时返回400"""
+    try:
+        return parse_indicator_params(indicators, ma, ema, macd, rsi, boll, kdj, atr)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """简单移动平均，不足period根时为NaN"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        cumsum = np.cumsum(np.concatenate([[0.0], values]))
+        result[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return result
+
+
+def _rolling_std(values: np.ndarray, period: int) -> np.ndarray:
+    """滚动总体标准差，不足period根时为NaN"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        result[period - 1:] = sliding_window_view(values, period).std(axis=1)
+    return result
+
+
+def _rolling_extreme(values: np.ndarray, period: int, highest: bool) -> np.ndarray:
+    """滚动最高值或最低值，不足period根时取已有K线"""
+    if len(values) == 0:
+        return np.empty(0)
+    fill = -np.inf if highest else np.inf
+    padded = np.concatenate([np.full(period - 1, fill), values])
+    windows = sliding_window_view(padded, period)
+    return windows.max(axis=1) if highest else windows.min(axis=1)
+
+
+def _ewm(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """
+    指数平滑 y[t] = alpha * x[t] + (1 - alpha) * y[t-1]
+
+    initial为上一根K线的平滑值，为None时以第一个值作为初始值。
+    """
+    if initial is None or np.isnan(initial):
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    series = pd.Series(np.concatenate([[initial], values]))
+    return series.ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _last(values: np.ndarray) -> float:
+    """数组的最后一个值，数组为空时为NaN"""
+    return float(values[-1]) if len(values) else np.nan
+
+
+def compute_indicators(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    params: IndicatorParams,
+    state: Optional[IndicatorState] = None
+) -> Tuple[Dict[str, np.ndarray], IndicatorState]:
+    """
+    计算技术指标
+
+    Args:
+        high: 最高价
+        low: 最低价
+        close: 收盘价
+        params: 技术指标参数
+        state: 之前K线计算后的状态，为None时从头计算
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], IndicatorState]: 指标列名到与输入K线等长的数组的映射，
+        以及计算到最后一根K线后的状态
+    """
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    count = len(close)
+    last = dict(state.last) if state is not None else {}
+    tail = len(state.close) if state is not None else 0
+    if state is not None:
+        # 滚动窗口类指标在之前的K线之后接着计算
+        high = np.concatenate([state.high, high])
+        low = np.concatenate([state.low, low])
+        close = np.concatenate([state.close, close])
+    new_close = close[tail:]
+
+    # 真实波幅，第一根K线没有昨收时为最高价减最低价
+    previous_close = np.concatenate([[np.nan], close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    true_range = np.concatenate([state.true_range, true_range[tail:]]) if state is not None else true_range
+
+    result: Dict[str, np.ndarray] = {}
+    indicators = params.indicators
+
+    if "ma" in indicators:
+        for period in params.ma:
+            result[f"ma{period}"] = _rolling_mean(close, period)[tail:]
+
+    if "ema" in indicators:
+        for period in params.ema:
+            ema = _ewm(new_close, 2 / (period + 1), last.get(("ema", period)))
+            last[("ema", period)] = _last(ema)
+            result[f"ema{period}"] = ema
+
+    if "macd" in indicators:
+        fast, slow, signal = params.macd
+        fast_ema = _ewm(new_close, 2 / (fast + 1), last.get(("macd_fast", fast)))
+        slow_ema = _ewm(new_close, 2 / (slow + 1), last.get(("macd_slow", slow)))
+        dif = fast_ema - slow_ema
+        dea = _ewm(dif, 2 / (signal + 1), last.get(("macd_dea", signal)))
+        last.update({
+            ("macd_fast", fast): _last(fast_ema),
+            ("macd_slow", slow): _last(slow_ema),
+            ("macd_dea", signal): _last(dea),
+        })
+        result.update({"dif": dif, "dea": dea, "macd": 2 * (dif - dea)})
+
+    if "rsi" in indicators:
+        # 第一根K线没有涨跌，从第二根K线开始平滑；状态中没有K线时新K线的第一根即为第一根K线
+        change = (close - previous_close)[tail:]
+        start = 1 if tail == 0 else 0
+        for period in params.rsi:
+            rsi = np.full(count, np.nan)
+            if count > start:
+                gain = _ewm(np.maximum(change[start:], 0), 1 / period, last.get(("rsi_gain", period)))
+                move = _ewm(np.abs(change[start:]), 1 / period, last.get(("rsi_move", period)))
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    rsi[start:] = np.where(move > 0, gain / move * 100, 50.0)
+                last.update({("rsi_gain", period): _last(gain), ("rsi_move", period): _last(move)})
+            result[f"rsi{period}"] = rsi
+
+    if "boll" in indicators:
+        period, width = params.boll
+        mid = _rolling_mean(close, period)[tail:]
+        std = _rolling_std(close, period)[tail:]
+        result.update({"boll_mid": mid, "boll_upper": mid + width * std, "boll_lower": mid - width * std})
+
+    if "kdj" in indicators:
+        period, k_period, d_period = params.kdj
+        highest = _rolling_extreme(high, period, True)[tail:]
+        lowest = _rolling_extreme(low, period, False)[tail:]
+        spread = highest - lowest
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsv = np.where(spread > 0, (new_close - lowest) / spread * 100, 50.0)
+        k = _ewm(rsv, 1 / k_period, last.get(("kdj_k", k_period), 50.0))
+        d = _ewm(k, 1 / d_period, last.get(("kdj_d", d_period), 50.0))
+        last.update({("kdj_k", k_period): _last(k), ("kdj_d", d_period): _last(d)})
+        result.update({"k": k, "d": d, "j": 3 * k - 2 * d})
+
+    if "atr" in indicators:
+        result[f"atr{params.atr}"] = _rolling_mean(true_range, params.atr)[tail:]
+
+    if count == 0:
+        # 没有新K线时状态不变
+        return result, state or IndicatorState(high, low, close, true_range)
+    window = params.window
+    return result, IndicatorState(
+        high=high[-window:],
+        low=low[-window:],
+        close=close[-window:],
+        true_range=true_range[-window:],
+        last=last
+    )
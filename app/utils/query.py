@@ -0,0 +1,318 @@
+"""
+列表查询参数工具模块
+
+为列表接口提供统一的字段投影、过滤、排序和截取参数：
+1. fields：只返回指定字段，如 fields=code,price,change_percent
+2. where：简单条件过滤，多个条件以逗号分隔且同时满足，如 where=change_percent>5,pe_ratio<30
+   支持 >、>=、<、<=、=(==)、!=，数值比较；=和!=也可用于字符串字段，如 where=market=上海
+3. sort：排序字段，多个字段以逗号分隔，前缀"-"表示降序，如 sort=-change_percent
+4. limit：返回的最大行数
+5. page_size/cursor：游标分页，响应头X-Next-Cursor给出下一页的游标，最后一页不返回。
+   游标绑定生成时的数据快照，快照刷新后再使用旧游标返回410，需从第一页重新获取，避免翻页时行位置变化导致遗漏或重复
+
+所有操作均在DataFrame上按列向量化执行，在序列化之前完成。
+"""
+
+import base64
+import hashlib
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Query
+
+from app.utils.serialization import dumps
+
+# 只指定游标未指定page_size时的默认分页大小
+DEFAULT_PAGE_SIZE = 500
+
+# 条件表达式，运算符按长度优先匹配
+_PREDICATE_PATTERN = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(>=|<=|!=|==|=|>|<)\s*(.+?)\s*$")
+
+_OPERATORS: dict = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+@dataclass
+class Predicate:
+    """过滤条件"""
+    column: str
+    op: str
+    value: Optional[float]  # 比较值不是数值时为None
+    raw: str
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """计算条件对应的布尔掩码"""
+        series = df[self.column]
+        if pd.api.types.is_numeric_dtype(series):
+            return self.compare(pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan))
+        return self.compare(series.astype(str).to_numpy(dtype=object))
+
+    def compare(self, values: np.ndarray) -> np.ndarray:
+        """
+        在一列值上计算条件对应的布尔掩码
+
+        Args:
+            values: 数值列为float64数组，字符串列为对象数组
+
+        Returns:
+            np.ndarray: 布尔掩码
+        """
+        compare: Callable = _OPERATORS[self.op]
+        is_numeric = values.dtype.kind == "f"
+        if self.value is None or (not is_numeric and self.op in ("=", "==", "!=")):
+            # 字符串字段的相等比较，如股票代码、市场
+            return compare(values.astype(str), self.raw)
+        if not is_numeric:
+            values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        # NaN参与比较的结果均为False，!=除外
+        with np.errstate(invalid="ignore"):
+            return compare(values, self.value)
+
+
+@dataclass
+class ListQuery:
+    """列表查询参数"""
+    fields: Optional[List[str]] = None
+    where: List[Predicate] = field(default_factory=list)
+    sort: List[Tuple[str, bool]] = field(default_factory=list)  # (字段, 是否升序)
+    limit: Optional[int] = None
+    page_size: Optional[int] = None
+    offset: int = 0  # 由游标解码得到的起始行
+    snapshot: Optional[str] = None  # 由游标解码得到的数据快照标识
+
+    def is_empty(self) -> bool:
+        """是否未指定任何查询参数"""
+        return (
+            not self.fields and not self.where and not self.sort
+            and self.limit is None and self.page_size is None
+        )
+
+
+def encode_cursor(offset: int, snapshot: str) -> str:
+    """将起始行和数据快照标识编码为不透明的游标"""
+    return base64.urlsafe_b64encode(f"o:{offset}:{snapshot}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    解码游标
+
+    Args:
+        cursor: encode_cursor生成的游标
+
+    Returns:
+        Tuple[int, str]: 起始行和数据快照标识
+
+    Raises:
+        ValueError: 游标无效时抛出
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, offset, snapshot = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        if prefix != "o" or int(offset) < 0 or not snapshot:
+            raise ValueError
+        return int(offset), snapshot
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"无效的游标: {cursor}")
+
+
+def frame_snapshot(df: pd.DataFrame) -> str:
+    """
+    DataFrame内容的快照标识
+
+    不含update_time列，刷新后数据未变化时标识不变。
+
+    Args:
+        df: DataFrame
+
+    Returns:
+        str: 内容哈希
+    """
+    columns = [name for name in df.columns if name != "update_time"]
+    try:
+        hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes()
+    except TypeError:
+        # 包含列表等不可哈希的值时按编码后的内容计算
+        hashed = dumps(df[columns])
+    return hashlib.blake2b(hashed + ",".join(map(str, columns)).encode(), digest_size=8).hexdigest()
+
+
+def parse_predicate(expression: str) -> Predicate:
+    """
+    解析单个过滤条件
+
+    Args:
+        expression: 条件表达式，如"change_percent>5"
+
+    Returns:
+        Predicate: 过滤条件
+
+    Raises:
+        ValueError: 表达式格式错误时抛出
+    """
+    match = _PREDICATE_PATTERN.match(expression)
+    if match is None:
+        raise ValueError(f"无法解析过滤条件: {expression}")
+    column, op, raw_value = match.groups()
+    try:
+        value: Optional[float] = float(raw_value)
+    except ValueError:
+        if op not in ("=", "==", "!="):
+            raise ValueError(f"过滤条件 {expression} 的比较值必须是数值")
+        value = None
+    return Predicate(column=column, op=op, value=value, raw=raw_value)
+
+
+def parse_list_query(
+    fields: Optional[str] = None,
+    where: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> ListQuery:
+    """
+    解析列表查询参数
+
+    Args:
+        fields: 逗号分隔的字段列表
+        where: 逗号分隔的过滤条件
+        sort: 逗号分隔的排序字段，前缀"-"表示降序
+        limit: 返回的最大行数
+        page_size: 每页行数
+        cursor: 上一页响应返回的游标
+
+    Returns:
+        ListQuery: 列表查询参数
+
+    Raises:
+        ValueError: 参数格式错误时抛出
+    """
+    query = ListQuery(limit=limit, page_size=page_size)
+    if cursor:
+        query.offset, query.snapshot = decode_cursor(cursor)
+        if query.page_size is None:
+            query.page_size = DEFAULT_PAGE_SIZE
+    if fields:
+        query.fields = [name.strip() for name in fields.split(",") if name.strip()]
+    if where:
+        query.where = [parse_predicate(part) for part in where.split(",") if part.strip()]
+    if sort:
+        for name in sort.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            if name.startswith("-"):
+                query.sort.append((name[1:], False))
+            else:
+                query.sort.append((name.lstrip("+"), True))
+    return query
+
+
+def list_query(
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔，如code,price,change_percent"),
+    where: Optional[str] = Query(None, description="过滤条件，逗号分隔且同时满足，如change_percent>5,pe_ratio<30"),
+    sort: Optional[str] = Query(None, description="排序字段，逗号分隔，前缀-表示降序，如-change_percent"),
+    limit: Optional[int] = Query(None, ge=1, description="返回的最大行数"),
+    page_size: Optional[int] = Query(None, ge=1, description="分页大小，指定后按游标分页返回"),
+    cursor: Optional[str] = Query(None, description="分页游标，取自上一页响应头X-Next-Cursor，数据刷新后旧游标返回410")
+) -> ListQuery:
+    """列表查询参数依赖，供路由通过Depends使用"""
+    try:
+        return parse_list_query(fields, where, sort, limit, page_size, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def apply_list_query(df: pd.DataFrame, query: ListQuery) -> pd.DataFrame:
+    """
+    在DataFrame上应用列表查询参数
+
+    依次执行过滤、排序、截取和字段投影。只指定一个排序字段并且指定了limit时，
+    使用nlargest/nsmallest进行部分排序，避免对全部数据排序。
+
+    Args:
+        df: 列名与数据模型字段一致的DataFrame，不会被原地修改
+        query: 列表查询参数
+
+    Returns:
+        pd.DataFrame: 处理后的DataFrame
+
+    Raises:
+        HTTPException: 引用了不存在的字段时返回400
+    """
+    if query.is_empty():
+        return df
+
+    referenced = list(query.fields or []) + [p.column for p in query.where] + [name for name, _ in query.sort]
+    unknown = [name for name in referenced if name not in df.columns]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"未知字段: {', '.join(dict.fromkeys(unknown))}，可用字段: {', '.join(map(str, df.columns))}"
+        )
+
+    if query.where:
+        mask = np.ones(len(df), dtype=bool)
+        for predicate in query.where:
+            mask &= predicate.mask(df)
+        df = df[mask]
+
+    if query.sort:
+        if query.limit is not None and len(query.sort) == 1 and pd.api.types.is_numeric_dtype(df[query.sort[0][0]]):
+            name, ascending = query.sort[0]
+            select = df.nsmallest if ascending else df.nlargest
+            df = select(query.limit, name)
+        else:
+            names = [name for name, _ in query.sort]
+            ascending = [asc for _, asc in query.sort]
+            df = df.sort_values(names, ascending=ascending, kind="stable")
+
+    if query.limit is not None:
+        df = df.head(query.limit)
+
+    if query.fields:
+        df = df[query.fields]
+
+    return df.reset_index(drop=True)
+
+
+def paginate(
+    df: pd.DataFrame,
+    query: ListQuery,
+    snapshot: Optional[str] = None
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    按游标截取一页数据
+
+    Args:
+        df: 已应用过滤、排序和投影的DataFrame
+        query: 列表查询参数
+        snapshot: 数据快照标识，如缓存项的etag，为None时由df的内容计算
+
+    Returns:
+        Tuple[pd.DataFrame, Optional[str]]: 当前页数据和下一页游标，没有下一页时游标为None
+
+    Raises:
+        HTTPException: 游标对应的数据快照已刷新时返回410
+    """
+    if query.page_size is None:
+        return df, None
+    snapshot = hashlib.blake2b(snapshot.encode(), digest_size=8).hexdigest() if snapshot else frame_snapshot(df)
+    if query.snapshot is not None and query.snapshot != snapshot:
+        raise HTTPException(status_code=410, detail="分页游标对应的数据已更新，请去掉cursor参数从第一页重新获取")
+    end = query.offset + query.page_size
+    page = df.iloc[query.offset:end].reset_index(drop=True)
+    next_cursor = encode_cursor(end, snapshot) if end < len(df) else None
+    return page, next_cursor
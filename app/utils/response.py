@@ -0,0 +1,315 @@
+"""
+响应渲染工具模块
+
+本模块提供基于orjson的响应类及批量数据的多格式输出：
+1. ORJSONResponse：全局默认响应类，使用orjson渲染响应体
+2. PayloadResponse：直接写出预序列化的JSON字节，用于热点缓存接口
+3. 内容协商：根据format参数或Accept请求头，将DataFrame输出为
+   列式JSON、NDJSON流、Arrow IPC流或Parquet格式
+4. 条件请求：根据缓存项的内容哈希设置ETag和Cache-Control，
+   If-None-Match命中时返回304且不做任何序列化
+"""
+
+import hashlib
+import io
+from enum import Enum
+from typing import Any, Callable, Iterator, Optional
+
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from fastapi.responses import Response, StreamingResponse
+
+from app.utils.cache import CacheEntry
+from app.utils.columnar import frame_to_records
+from app.utils.query import ListQuery, apply_list_query, paginate
+from app.utils.serialization import dumps
+
+# pyarrow为可选依赖，未安装时不支持Arrow和Parquet格式
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """使用orjson渲染的JSON响应，额外支持Pydantic模型和pandas类型"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class PayloadResponse(Response):
+    """
+    预序列化JSON响应
+
+    直接将缓存中的JSON字节写出，跳过response_model校验和二次编码。
+    """
+    media_type = "application/json"
+
+    @classmethod
+    def from_entry(cls, entry: CacheEntry, **kwargs) -> "PayloadResponse":
+        """
+        根据缓存项构造响应
+
+        Args:
+            entry: 包含JSON编码字节的缓存项
+            **kwargs: 传递给Response的其他参数，如status_code、headers
+
+        Returns:
+            PayloadResponse: 预序列化JSON响应
+        """
+        return cls(content=entry.payload, **kwargs)
+
+
+class ResponseFormat(str, Enum):
+    """批量数据响应格式枚举"""
+    JSON = "json"          # 记录数组JSON(默认)
+    COLUMNS = "columns"    # 列式JSON，形如{"列名": [值, ...]}
+    NDJSON = "ndjson"      # 换行分隔的JSON记录流
+    ARROW = "arrow"        # Arrow IPC流
+    PARQUET = "parquet"    # Parquet文件
+
+
+MEDIA_TYPES = {
+    ResponseFormat.JSON: "application/json",
+    ResponseFormat.COLUMNS: "application/vnd.columns+json",
+    ResponseFormat.NDJSON: "application/x-ndjson",
+    ResponseFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ResponseFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def negotiate_format(request: Request, format: Optional[ResponseFormat] = None) -> ResponseFormat:
+    """
+    确定响应格式
+
+    优先使用format参数，其次按q值顺序匹配Accept请求头，均未命中时返回JSON。
+
+    Args:
+        request: 当前请求
+        format: format查询参数
+
+    Returns:
+        ResponseFormat: 响应格式
+    """
+    if format is not None:
+        return format
+
+    accept = request.headers.get("accept", "")
+    candidates = []
+    for index, part in enumerate(accept.split(",")):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, index, media_type.strip().lower()))
+
+    for _, _, media_type in sorted(candidates):
+        for response_format, format_media_type in MEDIA_TYPES.items():
+            if media_type == format_media_type:
+                return response_format
+    return ResponseFormat.JSON
+
+
+def variant_etag(entry: CacheEntry, variant: str) -> str:
+    """
+    计算缓存项某一表示形式(查询参数、响应格式)的ETag
+
+    Args:
+        entry: 缓存项
+        variant: 表示形式的描述，相同的缓存内容和描述得到相同的ETag
+
+    Returns:
+        str: 形如W/"..."的弱ETag
+    """
+    digest = hashlib.blake2b(f"{entry.etag}|{variant}".encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断If-None-Match请求头是否与ETag匹配(弱比较)
+
+    Args:
+        if_none_match: If-None-Match请求头
+        etag: 当前表示形式的ETag
+
+    Returns:
+        bool: 匹配时返回True
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+
+def cache_headers(entry: CacheEntry, etag: str) -> dict:
+    """
+    构造缓存相关的响应头
+
+    Args:
+        entry: 缓存项
+        etag: 当前表示形式的ETag
+
+    Returns:
+        dict: ETag、Cache-Control和Vary响应头，max-age为缓存项剩余的有效时间
+    """
+    max_age = entry.max_age()
+    return {
+        "ETag": etag,
+        "Cache-Control": f"max-age={max_age}" if max_age > 0 else "no-cache",
+        "Vary": "Accept",
+    }
+
+
+def iter_ndjson(df: pd.DataFrame, chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    逐块生成NDJSON字节，每块包含chunk_size条记录
+
+    Args:
+        df: 与数据模型字段一致的DataFrame
+        chunk_size: 每块的记录数
+
+    Yields:
+        bytes: 以换行结尾的JSON记录
+    """
+    for start in range(0, len(df), chunk_size):
+        records = frame_to_records(df.iloc[start:start + chunk_size])
+        yield b"".join(dumps(record) + b"\n" for record in records)
+
+
+def frame_response(df: pd.DataFrame, format: ResponseFormat, headers: Optional[dict] = None) -> Response:
+    """
+    将DataFrame按指定格式输出为响应
+
+    Args:
+        df: 与数据模型字段一致的DataFrame
+        format: 响应格式
+        headers: 额外的响应头
+
+    Returns:
+        Response: 对应格式的响应，NDJSON格式为分块传输的流式响应
+
+    Raises:
+        HTTPException: 请求Arrow或Parquet格式但未安装pyarrow时返回406
+    """
+    media_type = MEDIA_TYPES[format]
+    if format in (ResponseFormat.JSON, ResponseFormat.COLUMNS):
+        content = df if format == ResponseFormat.COLUMNS else frame_to_records(df)
+        return Response(content=dumps(content), media_type=media_type, headers=headers)
+
+    if format == ResponseFormat.NDJSON:
+        return StreamingResponse(iter_ndjson(df), media_type=media_type, headers=headers)
+
+    if pa is None:
+        raise HTTPException(status_code=406, detail=f"服务端未安装pyarrow，不支持{format.value}格式")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    if format == ResponseFormat.ARROW:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+    return Response(content=sink.getvalue(), media_type=media_type, headers=headers)
+
+
+def query_response(
+    request: Request,
+    df: pd.DataFrame,
+    query: ListQuery,
+    format: ResponseFormat,
+    headers: Optional[dict] = None,
+    snapshot: Optional[str] = None
+) -> Response:
+    """
+    在DataFrame上应用列表查询参数和游标分页后按指定格式输出
+
+    存在下一页时，通过X-Next-Cursor和Link响应头返回下一页的游标和地址。
+
+    Args:
+        request: 当前请求
+        df: 与数据模型字段一致的DataFrame
+        query: 列表查询参数
+        format: 响应格式
+        headers: 额外的响应头
+        snapshot: 数据快照标识，如缓存项的etag，游标绑定该快照，为None时由查询结果的内容计算
+
+    Returns:
+        Response: 对应格式的响应
+    """
+    page, next_cursor = paginate(apply_list_query(df, query), query, snapshot)
+    headers = dict(headers or {})
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers.update({"X-Next-Cursor": next_cursor, "Link": f'<{next_url}>; rel="next"'})
+    return frame_response(page, format, headers)
+
+
+def list_response(
+    request: Request,
+    entry: CacheEntry,
+    query: ListQuery,
+    format: Optional[ResponseFormat] = None
+) -> Response:
+    """
+    输出列表接口的缓存结果
+
+    未指定查询参数且请求默认JSON格式时，直接写出缓存中的预序列化字节；
+    否则在缓存项的DataFrame上完成投影、过滤、排序和分页后按请求的格式输出。
+    响应携带由缓存内容、查询参数和响应格式决定的ETag，
+    客户端通过If-None-Match带回的ETag未变化时直接返回304。
+
+    Args:
+        request: 当前请求
+        entry: 列表接口对应的缓存项
+        query: 列表查询参数
+        format: format查询参数
+
+    Returns:
+        Response: 响应
+    """
+    response_format = negotiate_format(request, format)
+    use_payload = (
+        query.is_empty() and response_format == ResponseFormat.JSON
+        and not isinstance(entry.value, pd.DataFrame)
+    )
+    etag = entry.etag if use_payload else variant_etag(entry, f"{request.url.query}|{response_format.value}")
+    headers = cache_headers(entry, etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if use_payload:
+        return PayloadResponse.from_entry(entry, headers=headers)
+    return query_response(request, entry.as_frame(), query, response_format, headers, entry.etag)
+
+
+def variant_response(request: Request, entry: CacheEntry, variant: str, render: Callable[[], bytes]) -> Response:
+    """
+    输出由缓存项派生的预序列化JSON，如按快照预先计算的排行
+
+    Args:
+        request: 当前请求
+        entry: 派生数据所基于的缓存项
+        variant: 派生数据的描述，用于计算ETag
+        render: 返回JSON字节的函数，If-None-Match命中时不调用
+
+    Returns:
+        Response: 响应
+    """
+    etag = variant_etag(entry, variant)
+    headers = cache_headers(entry, etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return PayloadResponse(content=render(), headers=headers)
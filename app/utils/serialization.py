@@ -0,0 +1,61 @@
+"""
+JSON序列化工具模块
+
+基于orjson提供统一的JSON编码与解码，供响应渲染和缓存共用。
+相比标准库json，orjson直接输出UTF-8字节，原生支持datetime、date、
+numpy数组及标量，且会将NaN/Infinity编码为null，避免生成非法JSON。
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+import pandas as pd
+from pydantic import BaseModel
+
+from app.utils.columnar import frame_to_columns
+
+# 允许非字符串字典键，并直接序列化numpy类型
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """处理orjson无法原生序列化的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, pd.DataFrame):
+        return frame_to_columns(obj)
+    if isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"无法序列化类型: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    将对象编码为JSON字节
+
+    Args:
+        obj: 待编码对象，支持Pydantic模型及其列表、字典、numpy和pandas类型，
+             DataFrame编码为列名到列值列表的映射
+
+    Returns:
+        bytes: UTF-8编码的JSON
+    """
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+def loads(data: Any) -> Any:
+    """
+    将JSON字节或字符串解码为Python对象
+
+    Args:
+        data: JSON字节或字符串
+
+    Returns:
+        Any: 解码后的对象
+    """
+    return orjson.loads(data)
@@ -0,0 +1,167 @@
+"""
+推送工具模块
+
+提供一对多的消息分发和SSE(Server-Sent Events)编码，供行情等推送接口共用：
+1. Broadcaster：后台任务发布一次消息，所有订阅者共享同一消息对象，
+   每个订阅者拥有有界的待发送队列，消费过慢、队列积压的订阅者会被断开，
+   不会拖慢发布方和其他订阅者
+2. follow_cache_entry：跟随带缓存服务方法的刷新，缓存过期后立即重新获取，内容变化时回调
+3. sse_event：将数据编码为一条SSE事件
+"""
+
+import asyncio
+import time
+from typing import Callable, Generic, Optional, Set, TypeVar
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import CacheEntry, get_cache_entry
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# SSE心跳，注释行不会触发客户端事件，仅用于保持连接
+SSE_HEARTBEAT = b": ping\n\n"
+
+# 订阅因积压被关闭时放入队列的标记
+_CLOSED = object()
+
+
+def sse_event(data: bytes, event: Optional[str] = None, id: Optional[str] = None) -> bytes:
+    """
+    编码一条SSE事件
+
+    Args:
+        data: 事件数据，应为不含换行的单行JSON
+        event: 事件类型，为None时客户端按message事件处理
+        id: 事件ID，客户端重连时通过Last-Event-ID请求头带回
+
+    Returns:
+        bytes: 以空行结尾的SSE事件
+    """
+    lines = []
+    if event is not None:
+        lines.append(f"event: {event}\n".encode())
+    if id is not None:
+        lines.append(f"id: {id}\n".encode())
+    lines.append(b"data: " + data + b"\n\n")
+    return b"".join(lines)
+
+
+async def follow_cache_entry(
+    method: Callable,
+    on_refresh: Callable[[CacheEntry], None],
+    active: Callable[[], bool],
+    interval: float,
+    args: tuple = ()
+) -> None:
+    """
+    跟随带缓存服务方法的刷新，供推送接口的后台任务使用
+
+    在缓存项过期时立即重新获取，使推送与查询接口共用同一份缓存数据，每次过期只访问一次上游。
+    缓存内容变化(etag不同)时调用on_refresh，获取失败时记录日志并在interval秒后重试。
+
+    Args:
+        method: 服务方法，通常由cache_result装饰
+        on_refresh: 缓存内容变化时的回调，参数为新的缓存项
+        active: 每轮获取前调用，返回False时停止
+        interval: 缓存项没有过期时间(如缓存未启用)或获取失败时的轮询间隔(秒)
+        args: 服务方法的调用参数
+    """
+    last_etag = None
+    while active():
+        delay = 0.0
+        try:
+            entry = await get_cache_entry(method, *args)
+            if entry.etag != last_etag:
+                last_etag = entry.etag
+                on_refresh(entry)
+            delay = entry.expire_at - time.time()
+        except Exception as e:
+            logger.warning(f"推送任务获取{getattr(method, '__name__', method)}数据失败: {str(e)}")
+        await asyncio.sleep(delay if delay > 0 else interval)
+
+
+class Subscription(Generic[T]):
+    """单个订阅者的消息队列"""
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def offer(self, message: T) -> bool:
+        """放入一条消息，队列已满时关闭订阅并返回False"""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            # 丢弃积压的消息，只保留关闭标记，消费方取到后即可结束
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(_CLOSED)
+            self.closed = True
+            return False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        """
+        等待下一条消息
+
+        Args:
+            timeout: 等待超时时间(秒)，为None时一直等待
+
+        Returns:
+            Optional[T]: 消息，超时或订阅已关闭时返回None，可通过closed属性区分
+        """
+        try:
+            message = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return None if message is _CLOSED else message
+
+
+class Broadcaster(Generic[T]):
+    """
+    一对多消息分发
+
+    publish不会等待订阅者，订阅者的队列已满时该订阅者被关闭并移除，
+    客户端重连后重新订阅即可获得最新的完整数据。
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        """
+        Args:
+            queue_size: 每个订阅者的队列长度，默认使用STREAM_QUEUE_SIZE
+        """
+        self.queue_size = queue_size or settings.STREAM_QUEUE_SIZE
+        self._subscribers: Set[Subscription[T]] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription[T]:
+        """新增订阅者"""
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription[T]) -> None:
+        """移除订阅者"""
+        self._subscribers.discard(subscription)
+
+    def publish(self, message: T) -> int:
+        """
+        向所有订阅者发布消息
+
+        Args:
+            message: 消息，所有订阅者共享同一对象，订阅者不应修改
+
+        Returns:
+            int: 因队列积压被断开的订阅者数量
+        """
+        dropped = [subscription for subscription in self._subscribers if not subscription.offer(message)]
+        for subscription in dropped:
+            self._subscribers.discard(subscription)
+        return len(dropped)
@@ -0,0 +1,45 @@
+"""
+股票代码工具模块
+
+不同AKShare接口对股票代码的格式要求不同，如个股行情使用"000001"，
+热门关键词使用"SZ000001"。本模块提供代码格式之间的转换。
+"""
+
+# 市场前缀
+MARKET_PREFIXES = ("sh", "sz", "bj")
+
+
+def normalize_stock_code(stock_code: str) -> str:
+    """去掉股票代码的市场前缀，如sh600000转换为600000"""
+    stock_code = stock_code.strip()
+    if stock_code.lower().startswith(MARKET_PREFIXES):
+        stock_code = stock_code[2:]
+    return stock_code
+
+
+def stock_market(stock_code: str) -> str:
+    """
+    根据代码号段判断股票所属市场
+
+    4、8、92开头为北交所，6、9开头为上海，其余为深圳，与涨跌停幅度的号段划分一致。
+
+    Args:
+        stock_code: 股票代码，可带市场前缀
+
+    Returns:
+        str: 市场前缀，"SH"(上海)、"SZ"(深圳)或"BJ"(北京)
+    """
+    stock_code = stock_code.strip()
+    if stock_code.lower().startswith(MARKET_PREFIXES):
+        return stock_code[:2].upper()
+    # 北交所新代码为92开头，需在上海B股(900开头)之前判断
+    if stock_code.startswith(("4", "8", "92")):
+        return "BJ"
+    if stock_code.startswith(("6", "9")):
+        return "SH"
+    return "SZ"
+
+
+def with_market_prefix(stock_code: str) -> str:
+    """为股票代码加上大写的市场前缀，如000001转换为SZ000001"""
+    return f"{stock_market(stock_code)}{normalize_stock_code(stock_code)}"
@@ -14,6 +14,19 @@ def test_get_index_quotes():
     assert "name" in data[0]
     assert "price" in data[0]
 
+def test_get_index_movers():
+    """测试指数类别内的行情排行接口"""
+    response = client.get("/api/v1/index/movers/amount?symbol=沪深重要指数&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert 0 < len(data) <= 5
+    amounts = [quote["amount"] for quote in data]
+    assert amounts == sorted(amounts, reverse=True)
+    
+    # 测试指数行情不支持的排行
+    response = client.get("/api/v1/index/movers/turnover?symbol=沪深重要指数")
+    assert response.status_code == 400
+
 def test_get_index_quote():
     """测试获取单个指数实时行情接口"""
     index_code = "000001"  # 上证指数
@@ -45,4 +45,23 @@ def test_get_cls_telegraph():
     
     # 测试重点类型
     response = client.get("/api/v1/news/cls-telegraph?symbol=重点")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+
+def test_get_cls_telegraph_feed():
+    """测试增量获取财联社电报接口"""
+    response = client.get("/api/v1/news/cls-telegraph/feed?limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert 0 < len(data["items"]) <= 5
+    assert "title" in data["items"][0]
+    assert data["cursor"] == data["items"][-1]["cursor"]
+
+    # 以游标请求只返回之后的新资讯
+    response = client.get(f"/api/v1/news/cls-telegraph/feed?since={data['cursor']}")
+    assert response.status_code == 200
+    assert all(item["cursor"] != data["cursor"] for item in response.json()["items"])
+
+    # 无效的游标
+    response = client.get("/api/v1/news/cls-telegraph/feed?since=invalid")
+    assert response.status_code == 400
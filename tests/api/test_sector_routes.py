@@ -1,8 +1,14 @@
 import pytest
+import asyncio
 import json
 import math
+import pandas as pd
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 from app.main import app
+from app.core.config import settings
+from app.services.board_analytics_service import BoardAnalyticsService, BoardMembership
+from app.utils.query import encode_cursor
 
 client = TestClient(app)
 
@@ -35,6 +41,32 @@ def test_get_concept_boards():
     assert "name" in data[0]
     assert "price" in data[0]
 
+def test_get_concept_boards_conditional():
+    """测试概念板块列表的ETag条件请求"""
+    response = client.get("/api/v1/sector/concept")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = client.get("/api/v1/sector/concept", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+def test_get_concept_boards_with_query():
+    """测试概念板块列表的字段投影、过滤、排序和截取"""
+    response = client.get("/api/v1/sector/concept?fields=code,price,change_percent&where=change_percent>-100&sort=-change_percent&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert 0 < len(data) <= 5
+    assert set(data[0].keys()) == {"code", "price", "change_percent"}
+    changes = [item["change_percent"] for item in data]
+    assert changes == sorted(changes, reverse=True)
+    
+    # 测试未知字段
+    response = client.get("/api/v1/sector/concept?fields=unknown_field")
+    assert response.status_code == 400
+
 def test_get_concept_board():
     """测试获取单个概念板块接口"""
     # 先获取一个有效的板块代码
@@ -113,6 +145,19 @@ def test_get_concept_board_constituents_by_code():
     assert "name" in data[0]
     assert "price" in data[0]
 
+def test_get_concept_board_movers():
+    """测试概念板块成份股的行情排行接口"""
+    response = client.get("/api/v1/sector/concept")
+    assert response.status_code == 200
+    board_code = response.json()[0]["code"]
+    
+    response = client.get(f"/api/v1/sector/concept/{board_code}/movers/turnover?limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert 0 < len(data) <= 5
+    rates = [item["turnover_rate"] for item in data]
+    assert rates == sorted(rates, reverse=True)
+
 def test_get_concept_board_info():
     """测试获取概念板块基本信息接口"""
     # 使用一个常见的概念板块名称
@@ -207,4 +252,107 @@ def test_get_industry_board_constituents_by_code():
     assert len(data) > 0
     assert "code" in data[0]
     assert "name" in data[0]
-    assert "price" in data[0]
\ No newline at end of file
+    assert "price" in data[0]
+
+def test_get_board_analytics():
+    """测试板块统计接口"""
+    response = client.get("/api/v1/sector/analytics?board_type=industry&sort=-weighted_change_percent&limit=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert 0 < len(data) <= 10
+    assert all(item["board_type"] == "industry" for item in data)
+    assert all(item["up_count"] + item["down_count"] <= item["traded_count"] <= item["constituent_count"] for item in data)
+    assert all(item["limit_up_count"] <= item["up_count"] for item in data)
+    assert all(item["close_at_high_count"] <= item["up_count"] for item in data)
+    
+    # 测试未知板块类型
+    response = client.get("/api/v1/sector/analytics?board_type=unknown")
+    assert response.status_code == 422
+    
+    # 测试未知字段和快照变化后的游标
+    response = client.get("/api/v1/sector/analytics?fields=bogus")
+    assert response.status_code == 400
+    response = client.get(f"/api/v1/sector/analytics?page_size=10&cursor={encode_cursor(10, 'stale')}")
+    assert response.status_code == 410
+
+def test_board_analytics_idle_timeout(monkeypatch):
+    """测试板块统计在空闲超时后停止后台任务，之后的查询重新启动"""
+    monkeypatch.setattr(settings, "BOARD_ANALYTICS_IDLE_TIMEOUT", 0.2)
+    monkeypatch.setattr(settings, "SPOT_CACHE_EXPIRATION", 0.02)
+    monkeypatch.setattr(settings, "BATCH_ITEM_TIMEOUT", 0.1)
+    loads = []
+    
+    async def spot() -> pd.DataFrame:
+        return pd.DataFrame({
+            "code": ["000001", "000002"], "name": ["a", "b"], "price": [10.0, 20.0], "change": [0.5, -0.2],
+            "change_percent": [5.26, -0.99], "high": [10.0, 20.5], "amount": [1e6, 2e6],
+            "update_time": pd.Timestamp("2024-01-02 10:00:00"),
+        })
+    
+    async def load_membership():
+        loads.append(len(loads))
+        boards = pd.DataFrame({"board_type": ["industry"], "code": ["BK0001"], "name": ["x"]})
+        service.membership = BoardMembership.from_frames(boards, {("industry", "BK0001"): pd.DataFrame({"code": ["000001", "000002"]})})
+        service._compute()
+    
+    service = BoardAnalyticsService()
+    service.stock_service.get_spot_frame = spot
+    service._load_membership = load_membership
+    
+    async def run():
+        analytics = await service.get_board_analytics()
+        assert analytics["up_count"].tolist() == [1]
+        tasks = list(service._tasks)
+        await asyncio.sleep(0.5)
+        assert all(task.done() for task in tasks)
+        
+        # 重新启动后第一次计算未完成时不返回停止前的统计
+        async def slow_spot() -> pd.DataFrame:
+            await asyncio.sleep(0.3)
+            return await spot()
+        
+        service.stock_service.get_spot_frame = slow_spot
+        settings.BOARD_ANALYTICS_IDLE_TIMEOUT = 5.0
+        with pytest.raises(ValueError):
+            await service.get_board_analytics()
+        assert all(not task.done() for task in service._tasks)
+        assert len(loads) == 2
+        await asyncio.sleep(0.3)
+        assert (await service.get_board_analytics())["close_at_high_count"].tolist() == [1]
+        for task in service._tasks:
+            task.cancel()
+        await asyncio.gather(*service._tasks, return_exceptions=True)
+    
+    asyncio.run(run())
+
+def test_get_board_constituents_batch():
+    """测试批量获取板块成份股接口"""
+    body = {"concept": ["融资融券"], "industry": ["小金属"]}
+    response = client.post("/api/v1/sector/constituents/batch", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["concept"]["融资融券"]) > 0
+    assert len(data["industry"]["小金属"]) > 0
+    assert data["errors"] == []
+    
+    # 测试长表输出
+    response = client.post("/api/v1/sector/constituents/batch?fields=board_type,board,code", json={**body, "layout": "long"})
+    assert response.status_code == 200
+    data = response.json()
+    assert {item["board"] for item in data} == {"融资融券", "小金属"}
+
+def test_stream_boards():
+    """测试板块排行WebSocket推送的初始快照"""
+    with client.websocket_connect("/api/v1/sector/ws?boards=concept") as websocket:
+        message = websocket.receive_json()
+    assert message["type"] == "snapshot"
+    assert message["board_type"] == "concept"
+    assert len(message["boards"]) > 0
+    assert "rank" in message["boards"][0]
+    assert len(message["leaders"]) > 0
+    assert {"boards_up", "boards_down", "stocks_up", "stocks_down"} <= set(message["breadth"])
+    
+    # 测试不支持的板块类型
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/v1/sector/ws?boards=unknown") as websocket:
+            websocket.receive_json()
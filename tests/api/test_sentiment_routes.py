@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -23,6 +25,47 @@ def test_get_margin_details():
     assert response.status_code == 400
 
 
+def test_get_margin_details_paginated():
+    """测试融资融券明细的游标分页和NDJSON格式"""
+    url = "/api/v1/sentiment/margin/details?trade_date=20230922&page_size=100"
+    response = client.get(url)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page) == 100
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"{url}&cursor={cursor}&format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert 0 < len(lines) <= 100
+    assert json.loads(lines[0]).keys() == first_page[0].keys()
+
+    # 测试无效游标
+    response = client.get(f"{url}&cursor=invalid")
+    assert response.status_code == 400
+
+
+def test_get_margin_details_range():
+    """测试获取日期区间内的融资融券明细数据接口"""
+    url = "/api/v1/sentiment/margin/details/range?start_date=20230918&end_date=20230922"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert {item["trade_date"] for item in data} >= {"2023-09-18", "2023-09-22"}
+    
+    # 测试按股票的时间序列输出
+    response = client.get(f"{url}&layout=series")
+    assert response.status_code == 200
+    series = response.json()
+    assert len(series) > 0
+    assert "trade_date" in next(iter(series.values()))[0]
+    
+    # 测试开始日期晚于结束日期
+    response = client.get("/api/v1/sentiment/margin/details/range?start_date=20230922&end_date=20230918")
+    assert response.status_code == 400
+
+
 def test_get_stock_hot_rank():
     """测试获取股票热度排名数据接口"""
     response = client.get("/api/v1/sentiment/stock/hot-rank")
@@ -62,4 +105,13 @@ def test_get_stock_hot_keywords():
     assert "stock_code" in data[0]
     assert "concept_name" in data[0]
     assert "concept_code" in data[0]
-    assert "heat" in data[0]
\ No newline at end of file
+    assert "heat" in data[0]
+
+def test_get_stock_hot_keywords_batch():
+    """测试批量获取股票热门关键词数据接口"""
+    response = client.post("/api/v1/sentiment/stock/hot-keywords/batch?format=columns", json={"codes": ["000665", "SZ000001"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["stock_code"]) > 0
+    assert set(data["stock_code"]) <= {"000665", "000001"}
+    assert len(data["concept_name"]) == len(data["stock_code"])
@@ -1,6 +1,15 @@
+import asyncio
+import json
+import akshare as ak
+import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api.endpoints.stock_routes import quote_stream_service
+from app.services import stock_service as stock_service_module
+from app.services.movers_service import MoversService
+from app.utils import cache
+from app.utils.query import encode_cursor
 
 client = TestClient(app)
 
@@ -20,6 +29,14 @@ def test_get_stock_info():
     assert "name" in data
     assert "industry" in data
 
+def test_get_stock_infos():
+    """测试批量获取个股基本信息接口"""
+    response = client.post("/api/v1/stock/info/batch", json={"codes": ["000001", "600000", "999999"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["code"] for item in data["items"]] == ["000001", "600000"]
+    assert [error["key"] for error in data["errors"]] == ["999999"]
+
 def test_get_stock_quote():
     """测试获取个股实时行情接口"""
     stock_code = "000001"  # 平安银行
@@ -30,6 +47,156 @@ def test_get_stock_quote():
     assert "price" in data
     assert "change_percent" in data
 
+def test_get_stock_quotes():
+    """测试批量获取个股实时行情接口"""
+    response = client.post("/api/v1/stock/quotes", json={"codes": ["000001", "sh600000", "999999"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [quote["code"] for quote in data["quotes"]] == ["000001", "600000"]
+    assert data["not_found"] == ["999999"]
+    assert "update_time" in data
+
+@pytest.mark.asyncio
+async def test_stream_stock_quotes():
+    """测试实时行情推送的初始快照"""
+    stream = quote_stream_service.stream(["000001", "sh600000"])
+    try:
+        event = await stream.__anext__()
+    finally:
+        await stream.aclose()
+    assert event.startswith(b"event: snapshot\n")
+    quotes = json.loads(event.split(b"data: ", 1)[1])
+    assert {quote["code"] for quote in quotes} == {"000001", "600000"}
+    
+    # 测试未指定股票代码
+    response = client.get("/api/v1/stock/quotes/stream?codes=,")
+    assert response.status_code == 400
+
+def test_get_spot_history():
+    """测试行情历史接口"""
+    response = client.get("/api/v1/stock/spot/as-of?ago=0&codes=000001,sh600000")
+    assert response.status_code == 200
+    data = response.json()
+    assert {quote["code"] for quote in data} == {"000001", "600000"}
+    assert "price" in data[0]
+    
+    response = client.get("/api/v1/stock/000001/spot-history")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) > 0
+    assert "update_time" in data[0]
+    assert "price" in data[0]
+    
+    # 测试超出记录窗口和缺少时间参数
+    response = client.get("/api/v1/stock/spot/as-of?ago=86400")
+    assert response.status_code == 400
+    response = client.get("/api/v1/stock/spot/as-of")
+    assert response.status_code == 400
+    
+    # 测试未知字段和快照变化后的游标
+    response = client.get("/api/v1/stock/spot/as-of?ago=0&fields=bogus")
+    assert response.status_code == 400
+    response = client.get("/api/v1/stock/000001/spot-history?fields=bogus")
+    assert response.status_code == 400
+    stale = encode_cursor(1, "stale")
+    response = client.get(f"/api/v1/stock/spot/as-of?ago=0&page_size=1&cursor={stale}")
+    assert response.status_code == 410
+    response = client.get(f"/api/v1/stock/000001/spot-history?page_size=1&cursor={stale}")
+    assert response.status_code == 410
+
+def test_screen_stocks():
+    """测试全市场选股接口"""
+    response = client.get("/api/v1/stock/screener?where=pb_ratio>0,pb_ratio<3,turnover_rate>1&sort=-market_cap&limit=20")
+    assert response.status_code == 200
+    assert "X-Screen-Time" in response.headers
+    data = response.json()
+    assert 0 < len(data) <= 20
+    assert all(0 < quote["pb_ratio"] < 3 and quote["turnover_rate"] > 1 for quote in data)
+    caps = [quote["market_cap"] for quote in data]
+    assert caps == sorted(caps, reverse=True)
+    
+    # 测试按代码筛选和字段投影
+    response = client.get("/api/v1/stock/screener?where=code=000001&fields=code,name,volume_ratio")
+    assert response.status_code == 200
+    assert response.json()[0]["code"] == "000001"
+    assert set(response.json()[0]) == {"code", "name", "volume_ratio"}
+    
+    # 测试未知字段
+    response = client.get("/api/v1/stock/screener?where=unknown>1")
+    assert response.status_code == 400
+    response = client.get("/api/v1/stock/screener?fields=bogus")
+    assert response.status_code == 400
+    
+    # 测试快照变化后的游标
+    response = client.get(f"/api/v1/stock/screener?page_size=1&cursor={encode_cursor(1, 'stale')}")
+    assert response.status_code == 410
+
+def test_get_stock_movers():
+    """测试全市场行情排行接口"""
+    response = client.get("/api/v1/stock/movers/gainers?limit=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 10
+    changes = [quote["change_percent"] for quote in data]
+    assert changes == sorted(changes, reverse=True)
+    
+    # 测试条件请求
+    response = client.get("/api/v1/stock/movers/gainers?limit=10", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    
+    response = client.get("/api/v1/stock/movers/losers?limit=5")
+    assert response.status_code == 200
+    changes = [quote["change_percent"] for quote in response.json()]
+    assert changes == sorted(changes)
+    
+    # 测试未知排行
+    response = client.get("/api/v1/stock/movers/unknown")
+    assert response.status_code == 422
+
+def test_get_stock_movers_concurrent_first_requests():
+    """测试同一数据源的并发首次请求共用一份排行和一个跟随任务"""
+    calls = []
+    
+    async def snapshot() -> pd.DataFrame:
+        calls.append(len(calls))
+        await asyncio.sleep(0.05)
+        return pd.DataFrame({"code": ["000001", "000002", "000003"], "change_percent": [1.0, -2.0, 3.0]})
+    
+    async def run():
+        service = MoversService()
+        tables = await asyncio.gather(*(service._get_table(("test",), snapshot, (), 60.0) for _ in range(5)))
+        feed = service._feeds[("test",)]
+        feed.task.cancel()
+        await asyncio.gather(feed.task, return_exceptions=True)
+        return service, tables, feed
+    
+    service, tables, feed = asyncio.run(run())
+    assert all(table is feed.table for table in tables)
+    assert not service._starting
+    # 计算第一份排行一次，跟随任务启动后获取一次
+    assert len(calls) == 2
+    assert tables[0].payload("gainers", 1) == b'[{"code":"000003","change_percent":3.0}]'
+
+def test_get_stock_dossier():
+    """测试获取个股综合信息接口"""
+    stock_code = "000001"  # 平安银行
+    response = client.get(f"/api/v1/stock/{stock_code}/dossier")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["code"] == stock_code
+    assert set(data["sections"]) == {"info", "quote", "history", "chip", "hot_keywords", "questions"}
+    assert data["sections"]["info"]["status"] == "ok"
+    assert data["sections"]["info"]["data"]["code"] == stock_code
+    
+    # 测试指定部分
+    response = client.get(f"/api/v1/stock/{stock_code}/dossier?sections=quote,history")
+    assert response.status_code == 200
+    assert list(response.json()["sections"]) == ["quote", "history"]
+    
+    # 测试未知部分
+    response = client.get(f"/api/v1/stock/{stock_code}/dossier?sections=unknown")
+    assert response.status_code == 400
+
 def test_get_stock_history():
     """测试获取个股历史行情数据接口"""
     stock_code = "000001"  # 平安银行
@@ -40,4 +207,136 @@ def test_get_stock_history():
     assert data[0]["stock_code"] == stock_code
     assert "trade_date" in data[0]  # 修改这里，从"date"改为"trade_date"
     assert "open" in data[0]
-    assert "close" in data[0]
\ No newline at end of file
+    assert "close" in data[0]
+
+def test_get_stock_history_adjust():
+    """测试由同一份不复权K线计算的前复权和后复权行情"""
+    stock_code = "000001"  # 平安银行
+    closes = {}
+    for adjust in ("", "qfq", "hfq"):
+        response = client.get(f"/api/v1/stock/{stock_code}/history?start_date=20230102&end_date=20230331&adjust={adjust}&format=columns")
+        assert response.status_code == 200
+        closes[adjust] = response.json()
+    assert closes["qfq"]["trade_date"] == closes["hfq"]["trade_date"] == closes[""]["trade_date"]
+    # 后复权价格不低于不复权价格，涨跌幅不受复权影响
+    assert all(hfq >= raw for hfq, raw in zip(closes["hfq"]["close"], closes[""]["close"]))
+    assert closes["qfq"]["change_percent"] == closes[""]["change_percent"]
+
+def test_get_stock_history_resampled():
+    """测试由日线合成的周线、月线和N日线"""
+    stock_code = "000001"  # 平安银行
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=daily&start_date=20230102&end_date=20230331&format=columns")
+    assert response.status_code == 200
+    daily = response.json()
+    
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=weekly&start_date=20230102&end_date=20230331&format=columns")
+    assert response.status_code == 200
+    weekly = response.json()
+    assert 10 <= len(weekly["trade_date"]) <= 13
+    assert weekly["close"][-1] == daily["close"][-1]
+    assert sum(weekly["volume"]) == sum(daily["volume"])
+    assert max(weekly["high"]) == max(daily["high"])
+    
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=monthly&start_date=20230102&end_date=20230331")
+    assert response.status_code == 200
+    assert [bar["trade_date"][:7] for bar in response.json()] == ["2023-01", "2023-02", "2023-03"]
+    
+    # N日线按交易日历划分，开始日期不同时相同交易日所在的K线一致
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=5d&start_date=20230102&end_date=20230331&format=columns")
+    assert response.status_code == 200
+    days = response.json()
+    assert (len(daily["trade_date"]) + 4) // 5 <= len(days["trade_date"]) <= (len(daily["trade_date"]) + 4) // 5 + 1
+    assert days["close"][-1] == daily["close"][-1]
+    
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=5d&start_date=20230210&end_date=20230331&format=columns")
+    assert response.status_code == 200
+    later = response.json()
+    count = len(later["trade_date"])
+    assert later["trade_date"] == days["trade_date"][-count:]
+    assert later["volume"] == days["volume"][-count:]
+    
+    response = client.get(f"/api/v1/stock/{stock_code}/history?period=2w&start_date=20230102&end_date=20230331")
+    assert response.status_code == 400
+
+def test_get_stock_history_new_ex_dividend(monkeypatch):
+    """测试出现新的除权除息日后前复权价格更新，因子源未更新时间隔一段时间再重新获取"""
+    stock_code = "600999"
+    upstream = {"dates": pd.bdate_range("2024-01-02", "2024-01-10"), "factors": [("1900-01-01", 1.0)]}
+    calls = []
+    
+    def hist(symbol, period, start_date, end_date, adjust):
+        dates = upstream["dates"]
+        close = pd.Series(10.0 + 0.1 * pd.RangeIndex(len(dates)), index=dates)
+        close[close.index >= "2024-01-11"] /= 1.1
+        previous = close.shift(1).fillna(close.iloc[0])
+        previous[previous.index == "2024-01-11"] /= 1.1  # 除权参考价
+        close = close[(close.index >= pd.Timestamp(start_date)) & (close.index <= pd.Timestamp(end_date))]
+        previous = previous[close.index]
+        return pd.DataFrame({
+            "日期": close.index.date, "股票代码": symbol, "开盘": close.values, "收盘": close.values,
+            "最高": close.values, "最低": close.values, "成交量": 1000, "成交额": 1e6, "振幅": 0.0,
+            "涨跌幅": 0.0, "涨跌额": (close - previous).values, "换手率": 1.0,
+        })
+    
+    def factors(symbol, adjust):
+        calls.append(symbol)
+        return pd.DataFrame(upstream["factors"], columns=["date", "hfq_factor"])
+    
+    monkeypatch.setattr(ak, "stock_zh_a_hist", hist)
+    monkeypatch.setattr(ak, "stock_zh_a_daily", factors)
+    monkeypatch.setattr(cache, "redis_client", None)
+    cache._local_cache.clear()
+    stock_service_module._factor_retry.pop(stock_code, None)
+    url = f"/api/v1/stock/{stock_code}/history?start_date=20240102&end_date=20240112"
+    
+    def expire_daily():
+        for key in [key for key in cache._local_cache if "get_daily_history_frame" in key]:
+            cache._local_cache.pop(key)
+    
+    assert client.get(url).json()[0]["close"] == 10.0
+    
+    # K线出现新的除权除息日，因子源尚未更新，重新获取一次后不再立即重复获取
+    upstream["dates"] = pd.bdate_range("2024-01-02", "2024-01-12")
+    expire_daily()
+    assert client.get(url + "&format=columns").json()["close"][0] == 10.0
+    assert client.get(url + "&format=columns").json()["close"][0] == 10.0
+    assert len(calls) == 2
+    
+    # 因子源更新后，到达重试时间时重新获取，按参数缓存的结果也随新的因子更新
+    upstream["factors"].append(("2024-01-11", 1.1))
+    date, _ = stock_service_module._factor_retry[stock_code]
+    stock_service_module._factor_retry[stock_code] = (date, 0.0)
+    assert client.get(url + "&format=columns").json()["close"][0] == pytest.approx(10.0 / 1.1)
+    assert len(calls) == 3
+    assert stock_code not in stock_service_module._factor_retry
+    data = client.get(url).json()
+    assert data[0]["close"] == pytest.approx(10.0 / 1.1)
+    assert data[-1]["close"] == pytest.approx(10.8 / 1.1)
+    cache._local_cache.clear()
+
+def test_get_stock_history_columns():
+    """测试以列式JSON格式获取个股历史行情数据"""
+    stock_code = "000001"  # 平安银行
+    response = client.get(f"/api/v1/stock/{stock_code}/history?start_date=20230101&end_date=20230110&format=columns")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/vnd.columns+json")
+    data = response.json()
+    assert "trade_date" in data
+    assert "close" in data
+    assert len(data["trade_date"]) == len(data["close"]) > 0
+
+def test_get_stock_histories():
+    """测试批量获取多只股票历史行情数据接口"""
+    body = {"codes": ["000001", "600000"], "start_date": "20230101", "end_date": "20230110"}
+    response = client.post("/api/v1/stock/history/batch", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert {item["stock_code"] for item in data} == {"000001", "600000"}
+    
+    # 测试宽表输出
+    response = client.post("/api/v1/stock/history/batch", json={**body, "layout": "wide"})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) > 0
+    assert set(data[0].keys()) == {"trade_date", "000001", "600000"}
+
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.utils.query import encode_cursor
 
 # 创建测试客户端
 client = TestClient(app)
@@ -25,4 +26,84 @@ def test_get_chip_distribution():
     
     # 测试后复权
     response = client.get(f"/api/v1/technical/chip-distribution?symbol={symbol}&adjust=hfq")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_get_chip_distribution_batch():
+    """测试批量获取股票筹码分布数据接口"""
+    response = client.post("/api/v1/technical/chip-distribution/batch?format=columns", json={"codes": ["000001", "600000", "999999"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["stock_code"]) == {"000001", "600000"}
+    assert len(data["avg_cost"]) == len(data["stock_code"])
+    assert response.headers["X-Failed-Codes"] == "999999"
+
+def test_get_indicators():
+    """测试计算技术指标接口"""
+    symbol = "000001"
+    response = client.get(f"/api/v1/technical/indicators?symbol={symbol}&start_date=20240101&end_date=20240630&format=columns")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["trade_date"]) > 60
+    for column in ("ma5", "ma60", "ema12", "dif", "dea", "macd", "rsi6", "boll_upper", "k", "d", "j", "atr14"):
+        assert len(data[column]) == len(data["trade_date"])
+    assert data["ma5"][0] is None
+    assert data["ma5"][-1] is not None
+    
+    # 测试指定指标和参数
+    response = client.get(f"/api/v1/technical/indicators?symbol={symbol}&start_date=20240101&end_date=20240630&indicators=ma,kdj&ma=3,7")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data[0]) == {"trade_date", "stock_code", "close", "ma3", "ma7", "k", "d", "j"}
+    
+    # 测试无效参数
+    response = client.get(f"/api/v1/technical/indicators?symbol={symbol}&macd=12,26")
+    assert response.status_code == 400
+    
+    # 测试未知字段和快照变化后的游标
+    response = client.get(f"/api/v1/technical/indicators?symbol={symbol}&start_date=20240101&end_date=20240630&fields=bogus")
+    assert response.status_code == 400
+    response = client.get(f"/api/v1/technical/indicators?symbol={symbol}&start_date=20240101&end_date=20240630&page_size=10&cursor={encode_cursor(10, 'stale')}")
+    assert response.status_code == 410
+
+def test_get_correlation():
+    """测试股票组合相关性接口"""
+    codes = ["000001", "600000", "600036", "999999"]
+    response = client.post("/api/v1/technical/correlation", json={"codes": codes, "window": 20, "start_date": "20240101", "end_date": "20240630", "rolling": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["codes"] == ["000001", "600000", "600036"]
+    assert len(data["correlation"]) == 3
+    assert all(len(row) == 3 for row in data["covariance"])
+    assert data["correlation"][0][0] == 1.0
+    assert data["correlation"][0][1] == data["correlation"][1][0]
+    assert len(data["beta"]) == 3
+    assert len(data["rolling_beta"]) == len(data["rolling_dates"])
+    assert data["rolling_dates"][-1] == data["end_date"]
+    assert data["errors"][0]["key"] == "999999"
+    
+    # 测试交易日少于窗口长度
+    response = client.post("/api/v1/technical/correlation", json={"codes": codes, "window": 250, "start_date": "20240101", "end_date": "20240630"})
+    assert response.status_code == 400
+
+def test_run_backtest():
+    """测试信号规则回测接口"""
+    backtest = {
+        "codes": ["000001", "600000", "999999"],
+        "entry": ["ma5 cross_above ma20"],
+        "exit": ["ma5 cross_below ma20"],
+        "start_date": "20230101",
+        "end_date": "20231231"
+    }
+    response = client.post("/api/v1/technical/backtest", json=backtest)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["codes"] == ["000001", "600000"]
+    assert len(data["equity"]) == len(data["dates"])
+    assert data["statistics"]["max_drawdown"] <= 0
+    assert [symbol["code"] for symbol in data["symbols"]] == data["codes"]
+    assert len(data["symbols"][0]["equity"]) == len(data["dates"])
+    assert data["errors"][0]["key"] == "999999"
+    
+    # 测试无效规则
+    response = client.post("/api/v1/technical/backtest", json={**backtest, "entry": ["ma5 above ma20"]})
+    assert response.status_code == 400
@@ -149,4 +149,20 @@ async def test_get_industry_board_constituents(sector_mcp):
     assert len(result) > 0
     assert "code" in result[0]
     assert "name" in result[0]
-    assert "price" in result[0]
\ No newline at end of file
+    assert "price" in result[0]
+
+async def test_get_board_constituents_batch(sector_mcp):
+    """测试批量获取板块成份股"""
+    result = await sector_mcp.get_board_constituents_batch(["融资融券"], ["小金属"])
+    assert result is not None
+    assert len(result["concept"]["融资融券"]) > 0
+    assert len(result["industry"]["小金属"]) > 0
+    assert result["errors"] == []
+
+async def test_get_board_analytics(sector_mcp):
+    """测试获取板块统计"""
+    result = await sector_mcp.get_board_analytics("concept", sort_by="limit_up_count", limit=10)
+    assert 0 < len(result) <= 10
+    assert all(item["board_type"] == "concept" for item in result)
+    counts = [item["limit_up_count"] for item in result]
+    assert counts == sorted(counts, reverse=True)
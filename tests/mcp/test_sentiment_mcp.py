@@ -19,6 +19,13 @@ async def test_get_margin_details(sentiment_mcp):
     assert "financing_balance" in result[0]
     assert "securities_balance" in result[0]
 
+async def test_get_margin_details_range(sentiment_mcp):
+    """测试获取日期区间内的融资融券明细数据"""
+    result = await sentiment_mcp.get_margin_details_range("20230918", "20230922", layout="series")
+    assert result is not None
+    assert len(result["data"]) > 0
+    assert result["errors"] == []
+
 async def test_get_stock_hot_rank(sentiment_mcp):
     """测试获取股票热度排名数据"""
     result = await sentiment_mcp.get_stock_hot_rank()
@@ -53,4 +60,11 @@ async def test_get_stock_hot_keywords(sentiment_mcp):
     assert "stock_code" in result[0]
     assert "concept_name" in result[0]
     assert "concept_code" in result[0]
-    assert "heat" in result[0]
\ No newline at end of file
+    assert "heat" in result[0]
+
+async def test_get_stock_hot_keywords_batch(sentiment_mcp):
+    """测试批量获取股票热门关键词数据"""
+    result = await sentiment_mcp.get_stock_hot_keywords_batch(["000665", "SZ000001"])
+    assert result is not None
+    assert len(result["data"]["stock_code"]) > 0
+    assert len(result["data"]["heat"]) == len(result["data"]["stock_code"])
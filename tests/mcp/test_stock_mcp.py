@@ -13,6 +13,13 @@ async def test_get_stock_info(stock_mcp, test_stock_code):
     assert "股票代码" in result or "code" in result
     assert "股票简称" in result or "name" in result
 
+async def test_get_stock_infos(stock_mcp, test_stock_code):
+    """测试批量获取个股基本信息"""
+    result = await stock_mcp.get_stock_infos([test_stock_code, "999999"])
+    assert result is not None
+    assert result["items"][0]["code"] == test_stock_code
+    assert result["errors"][0]["key"] == "999999"
+
 async def test_get_stock_quote(stock_mcp, test_stock_code):
     """测试获取个股实时行情"""
     result = await stock_mcp.get_stock_quote(test_stock_code)
@@ -20,6 +27,28 @@ async def test_get_stock_quote(stock_mcp, test_stock_code):
     assert "代码" in result or "code" in result
     assert "最新价" in result or "price" in result
 
+async def test_get_stock_quotes(stock_mcp, test_stock_code):
+    """测试批量获取个股实时行情"""
+    result = await stock_mcp.get_stock_quotes([test_stock_code, "999999"])
+    assert result is not None
+    assert result["quotes"][0]["code"] == test_stock_code
+    assert result["not_found"] == ["999999"]
+
+async def test_screen_stocks(stock_mcp):
+    """测试全市场选股"""
+    result = await stock_mcp.screen_stocks(where="pe_ratio>0,pe_ratio<30", sort="-change_percent", limit=10, fields="code,pe_ratio,change_percent")
+    assert 0 < len(result["items"]) <= 10
+    assert all(0 < item["pe_ratio"] < 30 for item in result["items"])
+    changes = [item["change_percent"] for item in result["items"]]
+    assert changes == sorted(changes, reverse=True)
+
+async def test_get_stock_movers(stock_mcp):
+    """测试全市场行情排行"""
+    result = await stock_mcp.get_stock_movers("turnover", limit=5)
+    assert len(result) == 5
+    rates = [item["turnover_rate"] for item in result]
+    assert rates == sorted(rates, reverse=True)
+
 async def test_get_stock_history(stock_mcp, test_stock_code):
     """测试获取个股历史行情"""
     result = await stock_mcp.get_stock_history(
@@ -32,4 +61,25 @@ async def test_get_stock_history(stock_mcp, test_stock_code):
     assert len(result) > 0
     assert "trade_date" in result[0]  # 修改这里，使用正确的字段名称
     assert "open" in result[0]
-    assert "close" in result[0]
\ No newline at end of file
+    assert "close" in result[0]
+
+async def test_get_stock_histories(stock_mcp, test_stock_code):
+    """测试批量获取多只股票历史行情"""
+    result = await stock_mcp.get_stock_histories(
+        [test_stock_code, "600000"],
+        start_date="20230101",
+        end_date="20230110",
+        layout="wide"
+    )
+    assert result is not None
+    assert len(result["data"]) > 0
+    assert test_stock_code in result["data"][0]
+    assert result["errors"] == []
+
+async def test_get_stock_dossier(stock_mcp, test_stock_code):
+    """测试获取个股综合信息"""
+    result = await stock_mcp.get_stock_dossier(test_stock_code, sections=["info", "quote"])
+    assert result is not None
+    assert result["code"] == test_stock_code
+    assert result["sections"]["info"]["status"] == "ok"
+    assert result["sections"]["quote"]["data"]["code"] == test_stock_code
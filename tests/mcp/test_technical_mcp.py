@@ -27,4 +27,39 @@ async def test_get_chip_distribution(technical_mcp):
     # 测试后复权
     result = await technical_mcp.get_chip_distribution(symbol, "hfq")
     assert result is not None
-    assert len(result) > 0
\ No newline at end of file
+    assert len(result) > 0
+
+@pytest.mark.asyncio
+async def test_get_chip_distribution_batch(technical_mcp):
+    """测试批量获取股票筹码分布数据"""
+    result = await technical_mcp.get_chip_distribution_batch(["000001", "600000", "999999"])
+    assert result is not None
+    assert set(result["data"]["stock_code"]) == {"000001", "600000"}
+    assert result["errors"][0]["key"] == "999999"
+
+@pytest.mark.asyncio
+async def test_get_indicators(technical_mcp):
+    """测试计算技术指标"""
+    result = await technical_mcp.get_indicators("000001", "macd,rsi", start_date="20240101", end_date="20240630", rsi="14")
+    assert result is not None
+    assert set(result) == {"trade_date", "stock_code", "close", "dif", "dea", "macd", "rsi14"}
+    assert len(result["dif"]) == len(result["trade_date"])
+
+@pytest.mark.asyncio
+async def test_get_correlation(technical_mcp):
+    """测试计算股票组合相关性"""
+    result = await technical_mcp.get_correlation(["000001", "600000"], window=20, start_date="20240101", end_date="20240630")
+    assert result is not None
+    assert result["codes"] == ["000001", "600000"]
+    assert len(result["correlation"]) == 2
+    assert len(result["beta"]) == 2
+    assert result["rolling_beta"] is None
+
+@pytest.mark.asyncio
+async def test_run_backtest(technical_mcp):
+    """测试信号规则回测"""
+    result = await technical_mcp.run_backtest(["000001", "600000"], ["rsi6 < 30"], ["rsi6 > 70"], start_date="20230101", end_date="20231231")
+    assert result is not None
+    assert result["codes"] == ["000001", "600000"]
+    assert len(result["equity"]) == len(result["dates"])
+    assert result["statistics"]["trade_count"] == sum(symbol["statistics"]["trade_count"] for symbol in result["symbols"])
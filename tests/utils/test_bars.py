@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.bars import history_fetch_start, parse_period, period_start, resample_bars
+
+# 以工作日作为交易日历，去掉春节一周
+CALENDAR = pd.bdate_range("2022-01-04", "2024-12-31")
+CALENDAR = CALENDAR[(CALENDAR < "2023-01-23") | (CALENDAR > "2023-01-27")].to_numpy()
+
+
+@pytest.fixture(scope="module")
+def daily():
+    """按交易日历生成的日K线，价格只由日期决定"""
+    dates = pd.DatetimeIndex(CALENDAR)
+    close = 10 + np.sin(np.arange(len(dates)) / 7)
+    return pd.DataFrame({
+        "stock_code": "000001",
+        "trade_date": dates.strftime("%Y-%m-%d"),
+        "open": close - 0.05,
+        "close": close,
+        "high": close + 0.1,
+        "low": close - 0.1,
+        "volume": np.arange(len(dates), dtype=np.int64) + 100,
+        "amount": close * 1000,
+        "amplitude": 2.0,
+        "change_percent": 0.0,
+        "change_amount": 0.0,
+        "turnover": 1.0,
+    })
+
+
+def fetch(daily, start, end, period):
+    """与服务中的方式一致：从对齐的开始日期取日K线，合成后按开始日期截取"""
+    fetch_start = history_fetch_start(start, period, CALENDAR).strftime("%Y-%m-%d")
+    window = daily[(daily["trade_date"] >= fetch_start) & (daily["trade_date"] <= end)].reset_index(drop=True)
+    bars = resample_bars(window, period, CALENDAR)
+    return bars[bars["trade_date"] >= pd.Timestamp(start).strftime("%Y-%m-%d")].reset_index(drop=True)
+
+
+def test_fetch_start_shared_across_periods():
+    """测试日线、周线、月线和季线共享同一个获取开始日期，并覆盖所在周期的第一天"""
+    for date in pd.date_range("2023-01-01", "2024-12-31"):
+        starts = {period: history_fetch_start(date, period) for period in ("daily", "weekly", "monthly", "quarterly")}
+        assert len(set(starts.values())) == 1, date
+        for period in starts:
+            assert starts[period] <= period_start(date, period)
+
+
+@pytest.mark.parametrize("period", ["5d", "20d"])
+def test_days_anchored_to_calendar(daily, period):
+    """测试N日线按交易日历划分，同一交易日所在的K线与开始日期无关"""
+    full = fetch(daily, "2023-01-03", "2023-06-30", period)
+    for start in ("2023-01-05", "2023-02-14", "2023-03-01"):
+        later = fetch(daily, start, "2023-06-30", period)
+        pd.testing.assert_frame_equal(later, full.iloc[len(full) - len(later):].reset_index(drop=True))
+
+    # 每根K线包含N个交易日(停牌日在日历中占位)，开始于日历中N的整数倍位置
+    days = parse_period(period)
+    positions = np.searchsorted(CALENDAR, pd.to_datetime(full["trade_date"]).to_numpy())
+    assert np.all(positions[:-1] % days == days - 1)
+
+
+def test_period_start_days(daily):
+    """测试N日线所在K线的第一个交易日"""
+    start = period_start(pd.Timestamp("2023-02-15"), "5d", CALENDAR)
+    position = np.searchsorted(CALENDAR, start.to_datetime64())
+    assert CALENDAR[position] == start.to_datetime64()
+    assert position % 5 == 0
+    assert start <= pd.Timestamp("2023-02-15") < pd.Timestamp(CALENDAR[position + 5])
+
+
+def test_weekly_matches_daily(daily):
+    """测试周线的开盘、收盘、最高、最低和成交量"""
+    weekly = fetch(daily, "2023-03-01", "2023-03-31", "weekly")
+    days = fetch(daily, "2023-02-27", "2023-03-31", "daily")
+    assert weekly["trade_date"].tolist() == ["2023-03-03", "2023-03-10", "2023-03-17", "2023-03-24", "2023-03-31"]
+    assert weekly["open"].iloc[0] == days["open"].iloc[0]
+    assert weekly["close"].iloc[-1] == days["close"].iloc[-1]
+    assert weekly["volume"].sum() == days["volume"].sum()
+    assert weekly["high"].max() == days["high"].max()
+
+
+def test_parse_period():
+    """测试周期校验"""
+    assert parse_period("weekly") is None
+    assert parse_period("5d") == 5
+    for period in ("2w", "0d", "251d", "day"):
+        with pytest.raises(ValueError):
+            parse_period(period)
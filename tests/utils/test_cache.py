@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+import pandas as pd
+import pytest
+from pydantic import BaseModel
+from app.core.config import settings
+from app.utils import cache
+from app.utils.cache import cache_result, get_cache_entry
+
+
+class Quote(BaseModel):
+    """测试用行情模型"""
+    code: str
+    price: float
+
+
+class Board(BaseModel):
+    """测试用板块行情模型，update_time为获取时间"""
+    code: str
+    change_percent: float
+    update_time: datetime
+
+
+class FakeRedis:
+    """按字节保存数据的内存Redis客户端"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, expiration, value):
+        self.data[key] = bytes(value)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    """每个测试使用空的进程内缓存，默认不使用Redis"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache, "redis_client", None)
+    cache._local_cache.clear()
+    yield
+    cache._local_cache.clear()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """启用内存Redis"""
+    client = FakeRedis()
+    monkeypatch.setattr(settings, "REDIS_ENABLED", True)
+    monkeypatch.setattr(cache, "redis_client", client)
+    return client
+
+
+def test_lru_eviction(monkeypatch):
+    """测试进程内缓存超出容量时淘汰最久未使用的缓存项"""
+    monkeypatch.setattr(settings, "CACHE_MAX_ENTRIES", 2)
+
+    calls = []
+
+    @cache_result()
+    async def lookup(code: str) -> str:
+        calls.append(code)
+        return code
+
+    async def run():
+        for code in ("a", "b", "a", "c", "a", "b"):
+            await lookup(code)
+
+    asyncio.run(run())
+    # a在c写入前被访问过，因此淘汰的是b，最后再次访问b时重新执行
+    assert calls == ["a", "b", "c", "b"]
+    assert len(cache._local_cache) == 2
+
+
+def test_call_styles_share_key():
+    """测试位置参数、关键字参数和省略默认值的调用共享同一缓存键"""
+    calls = []
+
+    @cache_result()
+    async def history(code: str, period: str = "daily", adjust: str = "qfq") -> str:
+        calls.append(code)
+        return f"{code}:{period}:{adjust}"
+
+    async def run():
+        return [
+            await history("000001"),
+            await history("000001", "daily"),
+            await history("000001", period="daily", adjust="qfq"),
+            await history(code="000001", adjust="qfq"),
+            await history("000001", "weekly"),
+        ]
+
+    results = asyncio.run(run())
+    assert results[:4] == ["000001:daily:qfq"] * 4
+    assert results[4] == "000001:weekly:qfq"
+    assert len(calls) == 2
+
+
+def test_method_instances_share_key():
+    """测试不同服务实例调用同一方法共享缓存"""
+    calls = []
+
+    class Service:
+        @cache_result()
+        async def quote(self, code: str) -> Quote:
+            calls.append(code)
+            return Quote(code=code, price=1.0)
+
+    async def run():
+        first = await Service().quote("000001")
+        entry = await get_cache_entry(Service().quote, code="000001")
+        return first, entry
+
+    first, entry = asyncio.run(run())
+    assert entry.value is first
+    assert calls == ["000001"]
+
+
+def test_redis_round_trip_models(fake_redis, monkeypatch):
+    """测试从Redis读取时还原为Pydantic模型列表"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+
+    calls = []
+
+    @cache_result()
+    async def quotes(codes: str) -> List[Quote]:
+        calls.append(codes)
+        return [Quote(code=code, price=float(i)) for i, code in enumerate(codes.split(","))]
+
+    first = asyncio.run(quotes("000001,600000"))
+    second = asyncio.run(quotes("000001,600000"))
+    assert len(calls) == 1
+    assert len(fake_redis.data) == 1
+    assert all(isinstance(item, Quote) for item in second)
+    assert second == first
+
+
+def test_redis_round_trip_frame(fake_redis, monkeypatch):
+    """测试从Redis读取时还原为DataFrame"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+
+    calls = []
+
+    @cache_result()
+    async def bars(code: str) -> pd.DataFrame:
+        calls.append(code)
+        return pd.DataFrame({"trade_date": ["2024-01-02", "2024-01-03"], "close": [10.5, 10.8], "volume": [100, 200]})
+
+    first = asyncio.run(bars("000001"))
+    second = asyncio.run(bars("000001"))
+    assert len(calls) == 1
+    assert isinstance(second, pd.DataFrame)
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_redis_fills_local_cache(fake_redis):
+    """测试Redis命中后写入进程内缓存，并与原结果的编码字节一致"""
+    calls = []
+
+    @cache_result()
+    async def quote(code: str) -> Quote:
+        calls.append(code)
+        return Quote(code=code, price=10.0)
+
+    entry = asyncio.run(quote.cache_entry("000001"))
+    cache._local_cache.clear()
+    restored = asyncio.run(quote.cache_entry("000001"))
+    assert len(calls) == 1
+    assert restored.payload == entry.payload
+    assert restored.value == entry.value
+    assert len(cache._local_cache) == 1
+
+
+def test_etag_stable_across_identical_refresh():
+    """测试两次刷新上游数据相同时ETag不变，数据变化时ETag改变"""
+    upstream = {"BK0001": 1.5, "BK0002": -0.3}
+    now = [datetime(2024, 1, 2, 15, 0, 0)]
+
+    @cache_result()
+    async def boards() -> List[Board]:
+        now[0] += timedelta(seconds=30)
+        return [Board(code=code, change_percent=change, update_time=now[0]) for code, change in upstream.items()]
+
+    @cache_result()
+    async def boards_frame() -> pd.DataFrame:
+        return pd.DataFrame([board.model_dump() for board in await boards()])
+
+    def refresh():
+        entries = [asyncio.run(boards.cache_entry()), asyncio.run(boards_frame.cache_entry())]
+        for entry in entries:
+            entry.expire_at = 0.0
+        return entries
+
+    first = refresh()
+    second = refresh()
+    for before, after in zip(first, second):
+        assert after.payload != before.payload
+        assert after.etag == before.etag
+        assert after.etag.startswith('W/"')
+
+    upstream["BK0002"] = 0.8
+    third = refresh()
+    for before, after in zip(second, third):
+        assert after.etag != before.etag
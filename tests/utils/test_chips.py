@@ -0,0 +1,37 @@
+import json
+import os
+import numpy as np
+import pytest
+from app.utils.chips import compute_chips
+
+# AKShare stock_cyq_em中CYQCalculator在固定K线上的输出，包含一字板和换手率超过100%的K线
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "chip_distribution_upstream.json")
+
+FIELDS = ("open", "close", "high", "low", "turnover")
+
+@pytest.fixture(scope="module")
+def upstream():
+    """加载记录的上游筹码分布"""
+    with open(FIXTURE, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_compute_chips_parity(upstream):
+    """测试本地筹码分布与上游输出一致"""
+    bars = [np.array(upstream["bars"][field]) for field in FIELDS]
+    result, state = compute_chips(*bars)
+    for name, expected in upstream["expected"].items():
+        np.testing.assert_allclose(result[name], expected, rtol=0, atol=1e-9, err_msg=name)
+    assert len(state.close) == len(bars[1])
+
+def test_compute_chips_incremental(upstream):
+    """测试由状态逐日计算与从头计算一致"""
+    bars = [np.array(upstream["bars"][field]) for field in FIELDS]
+    expected, _ = compute_chips(*bars)
+
+    result, state = compute_chips(*[values[:100] for values in bars])
+    rows = [result]
+    for i in range(100, len(bars[1])):
+        result, state = compute_chips(*[values[i:i + 1] for values in bars], state=state)
+        rows.append(result)
+    for name, values in expected.items():
+        np.testing.assert_allclose(np.concatenate([row[name] for row in rows]), values, rtol=0, atol=1e-12, err_msg=name)
@@ -0,0 +1,41 @@
+import asyncio
+from app.utils.concurrency import gather_limited
+
+
+def test_gather_limited_caps_timed_out_fetches():
+    """测试超时后仍在执行的fetch继续计入并发数"""
+    running = []
+    peak = []
+
+    async def fetch(key):
+        running.append(key)
+        peak.append(len(running))
+        try:
+            await asyncio.sleep(0.1)
+            return key
+        finally:
+            running.remove(key)
+
+    async def run():
+        results, errors = await gather_limited(range(6), fetch, concurrency=2, timeout=0.02)
+        await asyncio.sleep(0.15)
+        return results, errors
+
+    results, errors = asyncio.run(run())
+    assert results == {}
+    assert list(errors) == list(range(6))
+    assert max(peak) == 2
+    assert running == []
+
+
+def test_gather_limited_results_in_key_order():
+    """测试结果和错误按键的输入顺序返回"""
+    async def fetch(key):
+        await asyncio.sleep(0.01 * (5 - key))
+        if key % 2:
+            raise ValueError(f"失败: {key}")
+        return key * 10
+
+    results, errors = asyncio.run(gather_limited([0, 1, 2, 3, 4, 2], fetch, concurrency=3, timeout=1))
+    assert list(results.items()) == [(0, 0), (2, 20), (4, 40)]
+    assert errors == {1: "失败: 1", 3: "失败: 3"}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from app.utils.indicators import IndicatorParams, compute_indicators
+
+PARAMS = IndicatorParams(ma=(5, 20), ema=(12,), rsi=(6, 24), atr=14)
+
+
+@pytest.fixture(scope="module")
+def bars():
+    """固定种子的随机游走K线"""
+    rng = np.random.default_rng(42)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    high = close * (1 + rng.uniform(0, 0.02, 300))
+    low = close * (1 - rng.uniform(0, 0.02, 300))
+    # 包含一字板
+    high[100:103] = low[100:103] = close[100:103]
+    return high, low, close
+
+
+def assert_same(actual, expected):
+    """逐列比较指标结果"""
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-10, atol=1e-10, err_msg=name)
+
+
+def test_incremental_equals_full(bars):
+    """测试由状态分批计算与从头计算一致"""
+    expected, _ = compute_indicators(*bars, PARAMS)
+    rows, state = [], None
+    for start, end in [(0, 150), (150, 151), (151, 151), (151, 200), *((i, i + 1) for i in range(200, 300))]:
+        result, state = compute_indicators(*(values[start:end] for values in bars), PARAMS, state)
+        rows.append(result)
+    assert_same({name: np.concatenate([row[name] for row in rows]) for name in expected}, expected)
+
+
+@pytest.mark.parametrize("count", [0, 1, 2])
+def test_short_history(bars, count):
+    """测试没有K线、只有一两根K线时的计算，以及先算前面K线再算最后一根K线的方式"""
+    head = [values[:count] for values in bars]
+    expected, state = compute_indicators(*head, PARAMS)
+    assert all(len(values) == count for values in expected.values())
+    assert len(state.close) == count
+
+    settled, state = compute_indicators(*(values[:count - 1] if count else values for values in head), PARAMS)
+    latest, _ = compute_indicators(*(values[count - 1:] if count else values for values in head), PARAMS, state)
+    assert_same({name: np.concatenate([settled[name], latest[name]]) for name in expected}, expected)
+
+
+def test_single_bar_values(bars):
+    """测试只有一根K线时的指标值"""
+    result, _ = compute_indicators(*(values[:1] for values in bars), PARAMS)
+    assert np.isnan(result["ma5"][0]) and np.isnan(result["rsi6"][0]) and np.isnan(result["atr14"][0])
+    assert result["ema12"][0] == bars[2][0]
+    assert result["dif"][0] == 0.0
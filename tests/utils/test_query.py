@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from app.utils.query import apply_list_query, paginate, parse_list_query
+
+
+def snapshot(prices, update_time="2024-01-02 15:00:00"):
+    """构造行情快照"""
+    return pd.DataFrame({
+        "code": [f"{i:06d}" for i in range(len(prices))],
+        "price": prices,
+        "update_time": pd.Timestamp(update_time),
+    })
+
+
+def fetch(df, cursor=None, snapshot_id=None):
+    """按价格降序分页获取一页"""
+    query = parse_list_query(sort="-price", page_size=2, cursor=cursor)
+    return paginate(apply_list_query(df, query), query, snapshot_id)
+
+
+def test_cursor_walks_snapshot():
+    """测试同一快照上按游标依次翻页"""
+    df = snapshot([5.0, 3.0, 4.0, 1.0, 2.0])
+    codes, cursor = [], None
+    while True:
+        page, cursor = fetch(df, cursor)
+        codes.extend(page["code"])
+        if cursor is None:
+            break
+    assert codes == ["000000", "000002", "000001", "000004", "000003"]
+
+
+def test_cursor_rejected_after_refresh():
+    """测试快照数据变化后旧游标返回410"""
+    _, cursor = fetch(snapshot([5.0, 3.0, 4.0, 1.0, 2.0]))
+    with pytest.raises(HTTPException) as e:
+        fetch(snapshot([5.0, 3.0, 4.0, 6.0, 2.0]), cursor)
+    assert e.value.status_code == 410
+
+
+def test_cursor_survives_identical_refresh():
+    """测试只有update_time变化的刷新不使游标失效"""
+    _, cursor = fetch(snapshot([5.0, 3.0, 4.0, 1.0, 2.0]))
+    page, _ = fetch(snapshot([5.0, 3.0, 4.0, 1.0, 2.0], "2024-01-02 15:00:30"), cursor)
+    assert list(page["code"]) == ["000001", "000004"]
+
+
+def test_cursor_bound_to_snapshot_id():
+    """测试指定快照标识时按标识校验游标"""
+    df = snapshot([5.0, 3.0, 4.0, 1.0, 2.0])
+    _, cursor = fetch(df, snapshot_id='"etag-1"')
+    page, _ = fetch(df, cursor, '"etag-1"')
+    assert len(page) == 2
+    with pytest.raises(HTTPException) as e:
+        fetch(df, cursor, '"etag-2"')
+    assert e.value.status_code == 410
+
+
+def test_invalid_cursor():
+    """测试无效游标"""
+    for cursor in ("invalid", "bzox"):
+        with pytest.raises(ValueError):
+            parse_list_query(page_size=2, cursor=cursor)
@@ -0,0 +1,19 @@
+from app.utils.symbols import normalize_stock_code, stock_market, with_market_prefix
+
+
+def test_stock_market():
+    """测试按号段判断市场"""
+    cases = {
+        "600000": "SH", "688981": "SH", "900901": "SH",
+        "000001": "SZ", "300750": "SZ", "200002": "SZ",
+        "430047": "BJ", "830799": "BJ", "920002": "BJ",
+        "sz000001": "SZ", "BJ920002": "BJ",
+    }
+    assert {code: stock_market(code) for code in cases} == cases
+
+
+def test_with_market_prefix():
+    """测试加上和去掉市场前缀"""
+    assert with_market_prefix("920002") == "BJ920002"
+    assert with_market_prefix("sh600000") == "SH600000"
+    assert normalize_stock_code(" bj920002 ") == "920002"